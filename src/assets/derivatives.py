@@ -0,0 +1,117 @@
+import asyncio
+import hashlib
+import logging
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional, Set
+
+from ..config import BOT_IMAGE_MAX_SIDE, BOT_IMAGE_QUALITY, MEDIA_CACHE_DIR, MEDIA_WORKERS
+from .registry import asset_registry
+
+# Pillow необязателен: без него бот отправляет оригинальные изображения
+try:
+    from PIL import Image, ImageOps
+    PIL_AVAILABLE = True
+except ImportError:
+    PIL_AVAILABLE = False
+
+BOT_DERIVATIVES_DIR = os.path.join(MEDIA_CACHE_DIR, "bot")
+
+_executor: Optional[ProcessPoolExecutor] = None
+_executor_lock = threading.Lock()
+# Ссылки на фоновые задачи, чтобы их не удалил сборщик мусора до завершения
+_background_tasks: Set[asyncio.Task] = set()
+
+
+def get_executor() -> ProcessPoolExecutor:
+    """Общий для процесса пул процессов для обработки изображений"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(max_workers=max(1, MEDIA_WORKERS))
+        return _executor
+
+
+def shutdown_executor():
+    """Остановка пула процессов обработки изображений"""
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
+
+
+def bot_derivative_path(source: str, max_side: int = BOT_IMAGE_MAX_SIDE, quality: int = BOT_IMAGE_QUALITY) -> str:
+    """
+    Путь к производному изображению для бота.
+    Имя зависит от пути, размера и времени изменения оригинала, а также от параметров сжатия,
+    поэтому изменённый оригинал или новые настройки дают новый файл без явной инвалидации.
+    """
+    info = asset_registry.info(source)
+    if info is None:
+        raise FileNotFoundError(source)
+    key = f"{info.path}:{info.size}:{info.mtime_ns}:{max_side}:{quality}"
+    return os.path.join(BOT_DERIVATIVES_DIR, hashlib.sha1(key.encode("utf-8")).hexdigest() + ".jpg")
+
+
+def render_jpeg(source: str, target: str, max_width: int, max_height: int, quality: int) -> str:
+    """
+    Уменьшение изображения до размеров max_width x max_height с сохранением пропорций и сохранение в JPEG.
+    Выполняется в отдельном процессе; результат записывается атомарно через временный файл.
+    """
+    with Image.open(source) as image:
+        # Учитываем ориентацию из EXIF, иначе фото с телефона окажется повёрнутым
+        image = ImageOps.exif_transpose(image)
+        if image.mode in ("RGBA", "LA", "P"):
+            # JPEG не поддерживает прозрачность: накладываем на белый фон
+            image = image.convert("RGBA")
+            background = Image.new("RGB", image.size, (255, 255, 255))
+            background.paste(image, mask=image.getchannel("A"))
+            image = background
+        elif image.mode != "RGB":
+            image = image.convert("RGB")
+        image.thumbnail((max_width, max_height), Image.LANCZOS)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        temp_path = f"{target}.{os.getpid()}.tmp"
+        image.save(temp_path, "JPEG", quality=quality, optimize=True, progressive=True)
+    os.replace(temp_path, target)
+    return target
+
+
+async def render_in_pool(source: str, target: str, max_width: int, max_height: int, quality: int) -> str:
+    """Создание уменьшенной копии изображения в пуле процессов, не блокируя цикл событий"""
+    loop = asyncio.get_running_loop()
+    try:
+        return await loop.run_in_executor(get_executor(), render_jpeg, source, target, max_width, max_height, quality)
+    finally:
+        # Файл записан в другом процессе - сведения о нём в реестре нужно перечитать
+        asset_registry.invalidate(target)
+
+
+async def ensure_bot_derivative(source: str) -> str:
+    """
+    Получение пути к производному изображению для отправки в Telegram.
+    Отсутствующее производное создаётся в пуле процессов; при любой ошибке возвращается оригинал.
+    """
+    if not PIL_AVAILABLE:
+        return source
+    try:
+        target = bot_derivative_path(source)
+        if asset_registry.info(target) is not None:
+            return target
+        await render_in_pool(source, target, BOT_IMAGE_MAX_SIDE, BOT_IMAGE_MAX_SIDE, BOT_IMAGE_QUALITY)
+        logging.info(f"Создано изображение для бота {target} из {source} ({os.path.getsize(source)} -> {os.path.getsize(target)} байт)")
+        return target
+    except Exception as e:
+        logging.error(f"Ошибка при создании изображения для бота из {source}: {e}")
+        return source
+
+
+def schedule_bot_derivative(source: str):
+    """Фоновое создание производного изображения сразу после загрузки оригинала в админке"""
+    if not PIL_AVAILABLE:
+        return
+    task = asyncio.get_running_loop().create_task(ensure_bot_derivative(source))
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
@@ -0,0 +1,240 @@
+import argparse
+import asyncio
+import logging
+import os
+import shutil
+import time
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from ..config import (
+    IMAGE_GC_DRY_RUN,
+    IMAGE_GC_GRACE_SECONDS,
+    IMAGE_GC_INTERVAL,
+    IMAGE_GC_OPS_PER_SECOND,
+    IMAGE_GC_QUARANTINE_DIR,
+    IMAGE_GC_RETENTION_SECONDS,
+)
+from .registry import asset_registry
+from .store import reference_counts
+
+logger = logging.getLogger(__name__)
+
+# Каталог изображений каталога (все разделы и хранилище по содержимому)
+IMAGES_ROOT = "src/web_app/static/img"
+
+
+def _walk_files(root: str) -> Iterator[Tuple[str, os.stat_result]]:
+    """Обход файлов каталога с их stat (выполняется в пуле потоков)"""
+    for directory, _, names in os.walk(root):
+        for name in names:
+            file_path = os.path.join(directory, name)
+            try:
+                yield os.path.realpath(file_path), os.stat(file_path)
+            except OSError:
+                continue
+
+
+def _move(source: str, target: str):
+    """Перенос файла с созданием каталога назначения; время изменения отмечает момент переноса"""
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    shutil.move(source, target)
+    os.utime(target)
+
+
+def _remove_empty_dirs(root: str):
+    """Удаление опустевших подкаталогов (сам root остаётся)"""
+    for directory, _, _ in sorted(os.walk(root), key=lambda item: len(item[0]), reverse=True):
+        if directory != root:
+            try:
+                os.rmdir(directory)
+            except OSError:
+                pass
+
+
+class OrphanImageCollector:
+    """
+    Фоновая уборка файлов изображений, на которые не ссылается ни одна запись каталога.
+    Файлы на диске сравниваются со ссылками из image_path тем, курсов, пунктов меню и акций.
+    Сначала файл без ссылок старше grace_seconds переносится в карантин (вне static, поэтому
+    он перестаёт раздаваться), и только через retention_seconds в карантине удаляется.
+    Если за это время на файл снова появилась ссылка, он возвращается на место.
+    Файловые операции выполняются в пуле потоков и не чаще ops_per_second в секунду,
+    чтобы уборка не конкурировала с обработкой запросов.
+    """
+
+    def __init__(self, db, images_root: str = IMAGES_ROOT, quarantine_dir: str = IMAGE_GC_QUARANTINE_DIR,
+                 grace_seconds: float = IMAGE_GC_GRACE_SECONDS, retention_seconds: float = IMAGE_GC_RETENTION_SECONDS,
+                 ops_per_second: float = IMAGE_GC_OPS_PER_SECOND, interval: float = IMAGE_GC_INTERVAL,
+                 dry_run: bool = IMAGE_GC_DRY_RUN):
+        self.db = db
+        self.images_root = os.path.realpath(images_root)
+        self.quarantine_dir = os.path.realpath(quarantine_dir)
+        self.grace_seconds = grace_seconds
+        self.retention_seconds = retention_seconds
+        self.ops_per_second = ops_per_second
+        self.interval = interval
+        self.dry_run = dry_run
+        self._task: Optional[asyncio.Task] = None
+        # Метрики
+        self.runs = 0
+        self.quarantined = 0
+        self.restored = 0
+        self.deleted = 0
+        self.bytes_freed = 0
+        self.last_run_seconds = 0.0
+        self.last_report: Dict[str, Any] = {}
+
+    def start(self):
+        """Запуск периодической уборки"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _loop(self):
+        while True:
+            # Первый проход - через интервал после запуска, чтобы не нагружать диск при старте
+            await asyncio.sleep(self.interval)
+            try:
+                await self.collect()
+            except Exception as e:
+                logger.error(f"Ошибка при уборке неиспользуемых изображений: {e}")
+
+    async def _throttle(self):
+        """Пауза между файловыми операциями"""
+        if self.ops_per_second > 0:
+            await asyncio.sleep(1 / self.ops_per_second)
+
+    def _past_grace(self, file_path: str) -> bool:
+        """
+        Повторная проверка времени изменения прямо перед переносом: загрузка того же содержимого
+        обновляет время изменения файла хранилища, и такой файл снова получает период ожидания
+        """
+        try:
+            return time.time() - os.stat(file_path).st_mtime >= self.grace_seconds
+        except OSError:
+            return False
+
+    def _quarantine_path(self, file_path: str) -> str:
+        return os.path.join(self.quarantine_dir, os.path.relpath(file_path, self.images_root))
+
+    def _original_path(self, quarantine_path: str) -> str:
+        return os.path.join(self.images_root, os.path.relpath(quarantine_path, self.quarantine_dir))
+
+    async def collect(self, dry_run: Optional[bool] = None) -> Dict[str, Any]:
+        """
+        Один проход уборки. Возвращает отчёт: какие файлы перенесены в карантин, возвращены и удалены
+        (при dry_run - какие были бы) и сколько байт освобождено.
+        """
+        dry_run = self.dry_run if dry_run is None else dry_run
+        started = time.monotonic()
+        report: Dict[str, Any] = {"dry_run": dry_run, "quarantined": [], "restored": [], "deleted": [], "bytes_freed": 0}
+
+        references = await reference_counts(self.db)
+        if references is None:
+            logger.warning("Уборка изображений пропущена: не удалось прочитать ссылки из базы")
+            return report
+        now = time.time()
+
+        # 1. Файлы в карантине: вернуть снова используемые, удалить пролежавшие retention_seconds
+        in_quarantine = await asyncio.to_thread(lambda: list(_walk_files(self.quarantine_dir)))
+        for quarantine_path, stat in in_quarantine:
+            original = self._original_path(quarantine_path)
+            if references.get(original):
+                report["restored"].append(original)
+                if not dry_run:
+                    await self._apply(_move, quarantine_path, original)
+                    self.restored += 1
+            elif now - stat.st_mtime >= self.retention_seconds:
+                report["deleted"].append(original)
+                report["bytes_freed"] += stat.st_size
+                if not dry_run:
+                    await self._apply(os.remove, quarantine_path)
+                    self.deleted += 1
+                    self.bytes_freed += stat.st_size
+            await self._throttle()
+
+        # 2. Файлы без ссылок старше grace_seconds - в карантин
+        candidates = [
+            file_path
+            for file_path, stat in await asyncio.to_thread(lambda: list(_walk_files(self.images_root)))
+            if not references.get(file_path) and now - stat.st_mtime >= self.grace_seconds
+        ]
+        if candidates and not dry_run:
+            # Ссылки перечитываются перед переносом: за время обхода запись могла получить один из файлов
+            references = await reference_counts(self.db)
+            if references is None:
+                logger.warning("Уборка изображений прервана: не удалось прочитать ссылки из базы")
+                return report
+        for file_path in candidates:
+            if references.get(file_path) or not await asyncio.to_thread(self._past_grace, file_path):
+                continue
+            report["quarantined"].append(file_path)
+            if not dry_run:
+                await self._apply(_move, file_path, self._quarantine_path(file_path))
+                self.quarantined += 1
+            await self._throttle()
+
+        if not dry_run:
+            await asyncio.to_thread(_remove_empty_dirs, self.quarantine_dir)
+
+        self.runs += 1
+        self.last_run_seconds = time.monotonic() - started
+        self.last_report = {key: len(value) if isinstance(value, list) else value for key, value in report.items()}
+        logger.info(f"Уборка изображений{' (пробный запуск)' if dry_run else ''}: {self.last_report}")
+        return report
+
+    async def _apply(self, operation, *args):
+        """Файловая операция в пуле потоков; ошибка по одному файлу не прерывает проход"""
+        try:
+            await asyncio.to_thread(operation, *args)
+        except OSError as e:
+            logger.error(f"Уборка изображений: ошибка при обработке {args[0]}: {e}")
+        finally:
+            for file_path in args:
+                asset_registry.invalidate(file_path)
+
+    def stats(self) -> Dict[str, Any]:
+        """Итоги уборки с момента запуска и результат последнего прохода"""
+        return {
+            "runs": self.runs,
+            "quarantined": self.quarantined,
+            "restored": self.restored,
+            "deleted": self.deleted,
+            "bytes_freed": self.bytes_freed,
+            "last_run_seconds": self.last_run_seconds,
+            "last_quarantined": self.last_report.get("quarantined", 0),
+            "last_deleted": self.last_report.get("deleted", 0),
+        }
+
+
+async def _run_once(dry_run: bool):
+    from ..data_manager.database import Database
+
+    db = Database()
+    await db.init_db()
+    try:
+        report = await OrphanImageCollector(db, ops_per_second=0).collect(dry_run=dry_run)
+        for action in ("quarantined", "restored", "deleted"):
+            for file_path in report[action]:
+                print(f"{action}: {file_path}")
+        print(f"bytes freed: {report['bytes_freed']}")
+    finally:
+        await db.close()
+
+
+def main():
+    """Разовая уборка из командной строки: python -m src.assets.orphans [--dry-run]"""
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Уборка изображений, на которые не ссылается каталог")
+    parser.add_argument("--dry-run", action="store_true", help="только показать, что будет сделано")
+    args = parser.parse_args()
+    asyncio.run(_run_once(args.dry_run))
+
+
+if __name__ == "__main__":
+    main()
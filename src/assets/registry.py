@@ -0,0 +1,176 @@
+import logging
+import os
+import stat
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+
+from ..config import ASSET_STAT_TTL
+
+# Размеры изображения читаются из заголовка файла через Pillow; без него они неизвестны
+try:
+    from PIL import Image
+    PIL_AVAILABLE = True
+except ImportError:
+    PIL_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+STATIC_PREFIX = "src/web_app/static/"
+STATIC_DIR = os.path.realpath("src/web_app/static")
+
+
+def static_relative_path(image_path: str) -> str:
+    """
+    Путь к изображению относительно каталога статических файлов.
+    В базе встречаются пути от корня проекта (src/web_app/static/img/...) и URL изображений тем (/topics_img/...).
+    """
+    if image_path.startswith('/topics_img/'):
+        return f"img/topics/{os.path.basename(image_path)}"
+    if image_path.startswith(STATIC_PREFIX):
+        return image_path[len(STATIC_PREFIX):]
+    return image_path.lstrip('/')
+
+
+def resolve_image_path(image_path: str) -> str:
+    """
+    Преобразование пути к изображению из базы данных в путь к файлу на диске.
+    Единая точка для бота (отправка фото) и админ-панели (миниатюры, удаление файлов).
+    """
+    if image_path.startswith('/topics_img/'):
+        return os.path.join(os.getcwd(), STATIC_PREFIX, static_relative_path(image_path))
+    if os.path.isabs(image_path):
+        return image_path
+    return os.path.join(os.getcwd(), image_path)
+
+
+def image_url(image_path: str) -> str:
+    """URL оригинала изображения в веб-приложении"""
+    if not image_path:
+        return ""
+    return f"/static/{static_relative_path(image_path)}"
+
+
+@dataclass(frozen=True)
+class AssetInfo:
+    """
+    Сведения о файле изображения.
+
+    :param path: Канонический абсолютный путь к файлу
+    :param size: Размер в байтах
+    :param mtime_ns: Время изменения в наносекундах
+    """
+    path: str
+    size: int
+    mtime_ns: int
+
+
+class AssetRegistry:
+    """
+    Реестр файлов изображений: приводит любую форму image_path из базы (/topics_img/..., путь от корня
+    проекта, абсолютный путь) к каноническому пути и кэширует существование, размер, время изменения
+    и размеры изображения. Обработчики бота и шаблоны админки больше не вызывают stat на каждый клик.
+    Записи обновляются хуками записи (invalidate из хранилища, уборки и обработки изображений),
+    а изменения файлов в обход приложения подхватываются повторной проверкой не реже раза в ttl секунд.
+    Используется и циклом событий бота, и потоком веб-сервера.
+    """
+
+    # При таком количестве записей кэш очищается целиком
+    MAX_ENTRIES = 50000
+
+    def __init__(self, ttl: float = ASSET_STAT_TTL):
+        self.ttl = ttl
+        # Путь в исходной форме -> канонический путь
+        self._canonical: Dict[str, str] = {}
+        # Канонический путь -> (момент проверки, сведения или None для отсутствующего файла)
+        self._entries: Dict[str, Tuple[float, Optional[AssetInfo]]] = {}
+        self._dimensions: Dict[AssetInfo, Optional[Tuple[int, int]]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.stats_calls = 0
+        self.invalidations = 0
+
+    def canonical(self, image_path: str) -> str:
+        """Канонический абсолютный путь к файлу для пути в любой форме"""
+        with self._lock:
+            path = self._canonical.get(image_path)
+        if path is None:
+            path = os.path.realpath(resolve_image_path(image_path))
+            with self._lock:
+                if len(self._canonical) >= self.MAX_ENTRIES:
+                    self._canonical.clear()
+                self._canonical[image_path] = path
+        return path
+
+    def info(self, image_path: Optional[str]) -> Optional[AssetInfo]:
+        """Сведения о файле или None, если это не существующий обычный файл"""
+        if not image_path:
+            return None
+        path = self.canonical(image_path)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and now - entry[0] < self.ttl:
+                self.hits += 1
+                return entry[1]
+            self.stats_calls += 1
+        try:
+            result = os.stat(path)
+            info = AssetInfo(path, result.st_size, result.st_mtime_ns) if stat.S_ISREG(result.st_mode) else None
+        except OSError:
+            info = None
+        with self._lock:
+            if len(self._entries) >= self.MAX_ENTRIES:
+                self._entries.clear()
+                self._dimensions.clear()
+            self._entries[path] = (now, info)
+        return info
+
+    def existing_file(self, image_path: Optional[str]) -> Optional[str]:
+        """Канонический путь к файлу, если он существует, иначе None"""
+        info = self.info(image_path)
+        return info.path if info is not None else None
+
+    def dimensions(self, image_path: Optional[str]) -> Optional[Tuple[int, int]]:
+        """Ширина и высота изображения (читается только заголовок файла) или None"""
+        info = self.info(image_path)
+        if info is None or not PIL_AVAILABLE:
+            return None
+        with self._lock:
+            if info in self._dimensions:
+                return self._dimensions[info]
+        try:
+            with Image.open(info.path) as image:
+                size = image.size
+        except Exception as e:
+            logger.warning(f"Не удалось прочитать размеры изображения {info.path}: {e}")
+            size = None
+        with self._lock:
+            self._dimensions[info] = size
+        return size
+
+    def invalidate(self, file_path: str):
+        """Хук записи: файл создан, изменён, перемещён или удалён - сведения о нём нужно перечитать"""
+        path = self.canonical(file_path)
+        with self._lock:
+            entry = self._entries.pop(path, None)
+            if entry is not None and entry[1] is not None:
+                self._dimensions.pop(entry[1], None)
+            self.invalidations += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Попадания в кэш, обращения к файловой системе и количество записей"""
+        with self._lock:
+            total = self.hits + self.stats_calls
+            return {
+                "hits": self.hits,
+                "stat_calls": self.stats_calls,
+                "hit_rate": self.hits / total if total else 0.0,
+                "invalidations": self.invalidations,
+                "entries": len(self._entries),
+            }
+
+
+# Реестр один на процесс: его используют и бот, и админ-панель
+asset_registry = AssetRegistry()
@@ -0,0 +1,185 @@
+import argparse
+import asyncio
+import hashlib
+import logging
+import os
+import uuid
+from typing import Dict, Optional, Set
+
+from .registry import asset_registry
+
+# Хранилище изображений по содержимому: один файл на уникальное содержимое для всех разделов каталога.
+# Путь в базе - от корня проекта, как и у остальных изображений: src/web_app/static/img/store/ab/abcd....jpg
+STORE_DIR = "src/web_app/static/img/store"
+# Размер блока при вычислении хэша файла
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def is_store_path(image_path: Optional[str]) -> bool:
+    """Изображение лежит в хранилище по содержимому"""
+    return bool(image_path) and image_path.startswith(STORE_DIR + "/")
+
+
+def normalize_extension(extension: str) -> str:
+    """Расширение в нижнем регистре; у одинакового содержимого с .JPG и .jpg будет один файл"""
+    extension = (extension or "").lower()
+    return ".jpg" if extension == ".jpeg" else extension
+
+
+def blob_path(digest: str, extension: str) -> str:
+    """Путь к файлу хранилища по sha256 содержимого (каталоги по первым двум символам хэша)"""
+    return f"{STORE_DIR}/{digest[:2]}/{digest}{normalize_extension(extension)}"
+
+
+def temp_path() -> str:
+    """Временный файл внутри хранилища (на той же файловой системе, чтобы os.replace был атомарным)"""
+    os.makedirs(STORE_DIR, exist_ok=True)
+    return os.path.join(STORE_DIR, f".{uuid.uuid4().hex}.part")
+
+
+def file_digest(file_path: str) -> str:
+    """sha256 содержимого файла"""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def commit_blob(temp_file: str, digest: str, extension: str) -> str:
+    """
+    Перенос временного файла в хранилище под именем по содержимому.
+    Если такое содержимое уже есть, временный файл удаляется и возвращается путь к существующему.
+    """
+    target = blob_path(digest, extension)
+    if os.path.exists(target):
+        os.remove(temp_file)
+        # Файл снова используется: обновляем время изменения, чтобы уборка не сочла его давно брошенным
+        os.utime(target)
+    else:
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        os.replace(temp_file, target)
+    asset_registry.invalidate(target)
+    return target
+
+
+def import_file(file_path: str) -> str:
+    """Копирование существующего файла в хранилище (оригинал не изменяется); возвращает путь в хранилище"""
+    digest = file_digest(file_path)
+    extension = os.path.splitext(file_path)[1]
+    target = blob_path(digest, extension)
+    if asset_registry.info(target) is not None:
+        return target
+    temp_file = temp_path()
+    try:
+        with open(file_path, "rb") as source, open(temp_file, "wb") as copy:
+            for chunk in iter(lambda: source.read(HASH_CHUNK_SIZE), b""):
+                copy.write(chunk)
+        return commit_blob(temp_file, digest, extension)
+    finally:
+        if os.path.exists(temp_file):
+            os.remove(temp_file)
+
+
+async def reference_counts(db) -> Optional[Dict[str, int]]:
+    """
+    Количество ссылок из базы на каждый файл изображения (ключ - абсолютный путь на диске).
+    Разные записи пути к одному файлу (/topics_img/... и src/web_app/...) учитываются вместе.
+    None, если ссылки прочитать не удалось.
+    """
+    references = await db.get_image_reference_counts()
+    if references is None:
+        return None
+    counts: Dict[str, int] = {}
+    for image_path, count in references.items():
+        file_path = asset_registry.canonical(image_path)
+        counts[file_path] = counts.get(file_path, 0) + count
+    return counts
+
+
+async def migrate(db, remove_originals: bool = False, dry_run: bool = False) -> Dict[str, int]:
+    """
+    Перенос изображений, на которые ссылается база, в хранилище по содержимому.
+    Пути в базе заменяются на пути в хранилище; одинаковые файлы становятся одним.
+    С remove_originals исходные файлы удаляются после обновления всех ссылок на них;
+    файл, ссылки на который обновить не удалось, остаётся на месте.
+
+    Запускать при остановленном боте: события об изменении путей, опубликованные здесь,
+    не доходят до кэшей каталога, экранов и дерева тем работающего процесса,
+    и он продолжит отдавать старые (а с remove_originals - уже удалённые) пути.
+    """
+    result = {"migrated": 0, "deduplicated": 0, "missing": 0, "failed": 0, "bytes_saved": 0}
+    # Исходный файл -> путь в хранилище (на один файл в базе могут ссылаться по-разному записанные пути)
+    imported: Dict[str, str] = {}
+    # Исходные файлы, ссылки на которые не удалось заменить
+    failed: Set[str] = set()
+    for image_path in await db.get_all_image_paths():
+        if is_store_path(image_path):
+            continue
+        file_path = asset_registry.canonical(image_path)
+        target = imported.get(file_path)
+        if target is None:
+            if asset_registry.info(file_path) is None:
+                logging.warning(f"Миграция изображений: файл {file_path} (из '{image_path}') не найден")
+                result["missing"] += 1
+                continue
+            if dry_run:
+                target = blob_path(await asyncio.to_thread(file_digest, file_path), os.path.splitext(file_path)[1])
+            else:
+                target = await asyncio.to_thread(import_file, file_path)
+            if target in imported.values():
+                result["deduplicated"] += 1
+                result["bytes_saved"] += asset_registry.info(file_path).size
+            imported[file_path] = target
+            result["migrated"] += 1
+        if not dry_run and not await db.replace_image_path(image_path, target):
+            logging.error(f"Миграция изображений: не удалось заменить путь '{image_path}' на {target}")
+            failed.add(file_path)
+            result["failed"] += 1
+
+    if remove_originals and not dry_run:
+        references = await reference_counts(db)
+        if references is None:
+            logging.error("Миграция изображений: не удалось прочитать ссылки из базы, исходные файлы не удалены")
+        else:
+            for file_path in imported:
+                if file_path in failed or references.get(file_path):
+                    continue
+                try:
+                    os.remove(file_path)
+                except OSError as e:
+                    logging.error(f"Миграция изображений: ошибка при удалении {file_path}: {e}")
+                finally:
+                    asset_registry.invalidate(file_path)
+    logging.info(f"Миграция изображений{' (пробный запуск)' if dry_run else ''}: {result}")
+    return result
+
+
+async def _run_migration(remove_originals: bool, dry_run: bool):
+    from ..data_manager.database import Database
+
+    db = Database()
+    await db.init_db()
+    try:
+        await migrate(db, remove_originals=remove_originals, dry_run=dry_run)
+    finally:
+        await db.close()
+
+
+def main():
+    """
+    Запуск миграции из командной строки: python -m src.assets.store [--dry-run] [--remove-originals].
+    Бот и админ-панель должны быть остановлены (см. migrate).
+    """
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(
+        description="Перенос изображений каталога в хранилище по содержимому (запускать при остановленном боте)"
+    )
+    parser.add_argument("--dry-run", action="store_true", help="только посчитать, ничего не изменяя")
+    parser.add_argument("--remove-originals", action="store_true", help="удалить исходные файлы после переноса")
+    args = parser.parse_args()
+    asyncio.run(_run_migration(args.remove_originals, args.dry_run))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+import hashlib
+import logging
+import os
+from typing import Optional
+
+from ..config import MEDIA_CACHE_DIR, THUMBNAIL_QUALITY, THUMBNAIL_WIDTHS
+from .derivatives import PIL_AVAILABLE, render_in_pool
+from .registry import STATIC_DIR, asset_registry, static_relative_path
+
+THUMBNAILS_DIR = os.path.join(MEDIA_CACHE_DIR, "thumbs")
+# Ограничение высоты миниатюры относительно ширины, чтобы очень вытянутые изображения не раздувались
+THUMBNAIL_MAX_ASPECT = 3
+
+
+def resolve_static_file(relative_path: str) -> Optional[str]:
+    """Абсолютный путь к файлу внутри каталога статических файлов или None, если путь выходит за его пределы"""
+    file_path = asset_registry.canonical(os.path.join(STATIC_DIR, relative_path))
+    if not file_path.startswith(STATIC_DIR + os.sep):
+        return None
+    return asset_registry.existing_file(file_path)
+
+
+def source_key(file_path: str) -> str:
+    """
+    Ключ версии исходного файла.
+    Строится по пути, размеру и времени изменения, чтобы не читать многомегабайтный файл на каждую страницу.
+    """
+    info = asset_registry.info(file_path)
+    if info is None:
+        raise FileNotFoundError(file_path)
+    key = f"{info.path}:{info.size}:{info.mtime_ns}"
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+
+
+def thumbnail_path(file_path: str, width: int) -> str:
+    """Путь к миниатюре в дисковом кэше"""
+    return os.path.join(THUMBNAILS_DIR, f"{source_key(file_path)}_{width}.jpg")
+
+
+async def ensure_thumbnail(file_path: str, width: int) -> Optional[str]:
+    """
+    Получение миниатюры заданной ширины; отсутствующая миниатюра создаётся в пуле процессов.
+    Возвращает None, если Pillow не установлен или изображение не удалось обработать.
+    """
+    if not PIL_AVAILABLE or width not in THUMBNAIL_WIDTHS:
+        return None
+    target = thumbnail_path(file_path, width)
+    if asset_registry.info(target) is not None:
+        return target
+    try:
+        await render_in_pool(file_path, target, width, width * THUMBNAIL_MAX_ASPECT, THUMBNAIL_QUALITY)
+        return target
+    except Exception as e:
+        logging.error(f"Ошибка при создании миниатюры {width}px для {file_path}: {e}")
+        return None
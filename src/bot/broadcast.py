@@ -0,0 +1,140 @@
+import asyncio
+import logging
+from typing import Any, Dict, Optional, Set
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramForbiddenError
+
+from ..assets.registry import asset_registry
+from ..config import BROADCAST_CHUNK_SIZE, BROADCAST_CONCURRENCY, BROADCAST_POLL_INTERVAL
+from ..data_manager.database import Database
+from .middlewares.outbound import bulk_priority
+from .screens import Screen, render_promotion_details, screen_cache
+
+logger = logging.getLogger(__name__)
+
+# Подпись к фото в Telegram ограничена 1024 символами
+CAPTION_LIMIT = 1024
+
+
+class BroadcastEngine:
+    """
+    Рассылка акций пользователям в цикле событий бота.
+    Админ-панель работает в другом потоке, поэтому управление идёт только через статус в базе:
+    движок периодически находит рассылки со статусом running и обрабатывает их,
+    а перед каждой порцией получателей перечитывает статус (пауза и отмена).
+    Результат по каждому получателю сохраняется сразу, так что после перезапуска
+    рассылка продолжается с того места, где остановилась, и никто не получает её дважды.
+    Все отправки идут в полосе массовых запросов и не задерживают ответы пользователям.
+    """
+
+    def __init__(self, bot: Bot, db: Database, chunk_size: int = BROADCAST_CHUNK_SIZE,
+                 concurrency: int = BROADCAST_CONCURRENCY, poll_interval: float = BROADCAST_POLL_INTERVAL):
+        self.bot = bot
+        self.db = db
+        self.chunk_size = max(1, chunk_size)
+        self.concurrency = max(1, concurrency)
+        self.poll_interval = poll_interval
+        self._supervisor: Optional[asyncio.Task] = None
+        self._running: Dict[int, asyncio.Task] = {}
+        # Метрики
+        self.sent = 0
+        self.blocked = 0
+        self.failed = 0
+
+    def start(self):
+        """Запуск фоновой проверки рассылок"""
+        if self._supervisor is None or self._supervisor.done():
+            self._supervisor = asyncio.create_task(self._supervise())
+
+    async def stop(self):
+        """Остановка движка; незавершённые рассылки сохраняют статус running и продолжатся при следующем запуске"""
+        tasks = [task for task in [self._supervisor, *self._running.values()] if task is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._supervisor = None
+        self._running.clear()
+
+    async def _supervise(self):
+        """Периодический поиск рассылок, которые нужно отправлять"""
+        while True:
+            try:
+                for broadcast_id in await self.db.get_broadcast_ids_by_status("running"):
+                    if broadcast_id not in self._running:
+                        task = asyncio.create_task(self._run(broadcast_id))
+                        self._running[broadcast_id] = task
+                        task.add_done_callback(lambda _, broadcast_id=broadcast_id: self._running.pop(broadcast_id, None))
+            except Exception as e:
+                logger.error(f"Ошибка при проверке рассылок: {e}")
+            await asyncio.sleep(self.poll_interval)
+
+    async def _run(self, broadcast_id: int):
+        """Отправка рассылки порциями получателей до завершения, паузы или отмены"""
+        broadcast = await self.db.get_broadcast(broadcast_id)
+        if broadcast is None:
+            return
+        _, promotion_id, audience, _, _, _, _, last_user_id, _, _ = broadcast
+
+        promotion = await self.db.get_promotion_by_id(promotion_id)
+        if promotion is None:
+            logger.warning(f"Рассылка {broadcast_id}: акция {promotion_id} не найдена, рассылка отменена")
+            await self.db.set_broadcast_status(broadcast_id, "cancelled", expected=("running",))
+            return
+
+        # Тот же экран, что показывает бот по кнопке акции
+        screen = await screen_cache.get_or_render(("promotion", promotion_id), lambda: render_promotion_details(promotion))
+        photo_path = asset_registry.existing_file(promotion[7])
+
+        logger.info(f"Рассылка {broadcast_id} акции {promotion_id}: отправка начата с пользователя {last_user_id}")
+        semaphore = asyncio.Semaphore(self.concurrency)
+        with bulk_priority():
+            while True:
+                broadcast = await self.db.get_broadcast(broadcast_id)
+                if broadcast is None or broadcast[3] != "running":
+                    logger.info(f"Рассылка {broadcast_id} остановлена (статус {broadcast[3] if broadcast else 'удалена'})")
+                    return
+
+                recipients = await self.db.get_broadcast_recipients(broadcast_id, audience, last_user_id, self.chunk_size)
+                if not recipients:
+                    await self.db.set_broadcast_status(broadcast_id, "completed", expected=("running",))
+                    logger.info(f"Рассылка {broadcast_id} завершена")
+                    return
+
+                async def deliver(user_id: int, telegram_id: int):
+                    async with semaphore:
+                        status, error = await self._deliver(telegram_id, screen, photo_path)
+                    await self.db.record_broadcast_delivery(broadcast_id, user_id, status, error)
+
+                await asyncio.gather(*(deliver(user_id, telegram_id) for user_id, telegram_id in recipients))
+                last_user_id = recipients[-1][0]
+                await self.db.save_broadcast_cursor(broadcast_id, last_user_id)
+
+    async def _deliver(self, telegram_id: int, screen: Screen, photo_path: Optional[str]):
+        """Отправка акции одному пользователю; возвращает (статус, текст ошибки)"""
+        text, reply_markup = screen
+        try:
+            if photo_path and len(text) <= CAPTION_LIMIT:
+                await self.bot.media.send_photo(self.bot, chat_id=telegram_id, path=photo_path,
+                                                caption=text, reply_markup=reply_markup)
+            else:
+                await self.bot.send_message(chat_id=telegram_id, text=text, reply_markup=reply_markup)
+            self.sent += 1
+            return "sent", None
+        except TelegramForbiddenError as e:
+            # Пользователь заблокировал бота - повторять бессмысленно
+            self.blocked += 1
+            return "blocked", str(e)
+        except Exception as e:
+            self.failed += 1
+            logger.warning(f"Не удалось отправить рассылку пользователю {telegram_id}: {e}")
+            return "failed", str(e)
+
+    def stats(self) -> Dict[str, Any]:
+        """Активные рассылки и результаты отправок с момента запуска"""
+        return {
+            "active": len(self._running),
+            "sent": self.sent,
+            "blocked": self.blocked,
+            "failed": self.failed,
+        }
@@ -1,10 +1,9 @@
 
 from aiogram import Router, F
-from aiogram.types import Message, CallbackQuery, FSInputFile
+from aiogram.types import Message, CallbackQuery
 from aiogram.filters import CommandStart
 from aiogram.fsm.state import State, StatesGroup
 import logging
-import os
 
 logger = logging.getLogger(__name__)
 
@@ -15,17 +14,26 @@ from aiogram import Bot
 
 from .keyboards import (
     main_menu_inline_keyboard,
-    topics_keyboard,
-    courses_keyboard,
-    course_keyboard,
     NavigationCallback,
     main_menu_reply_keyboard,
     back_to_main_menu_keyboard,
     get_payment_keyboard,
-    get_promotion_keyboard,
     promotions_list_keyboard
 )
 
+from .screens import (
+    screen_cache,
+    render_topics_page,
+    render_courses_page,
+    render_topic_details,
+    render_course_details,
+    render_promotion_details
+)
+
+from ..data_manager.loader import DataLoader
+from ..assets.registry import asset_registry
+from .navigation import show_screen
+
 from src.config import PAYMENT_PROVIDER_TOKEN
 
 # Создаем роутер
@@ -99,11 +107,12 @@ async def send_main_menu(chat_id, bot, send_photo=True):
     main_menu_text = "📚 Главное меню\n\nВыберите действие:"
 
     if send_photo:
-        photo_path = "src/bot/media/start.png"
-        if os.path.exists(photo_path):
-            await bot.send_photo(
+        photo_path = asset_registry.existing_file("src/bot/media/start.png")
+        if photo_path:
+            await bot.media.send_photo(
+                bot,
                 chat_id=chat_id,
-                photo=FSInputFile(photo_path),
+                path=photo_path,
                 caption=main_menu_text,
                 reply_markup=main_menu_inline_keyboard()
             )
@@ -138,11 +147,12 @@ async def send_main_menu_editable(message, bot, send_photo=False):
     if send_photo:
         # Удаляем старое сообщение и отправляем новое с фото
         await message.delete()
-        photo_path = "src/bot/media/start.png"
-        if os.path.exists(photo_path):
-            await bot.send_photo(
+        photo_path = asset_registry.existing_file("src/bot/media/start.png")
+        if photo_path:
+            await bot.media.send_photo(
+                bot,
                 chat_id=message.chat.id,
-                photo=FSInputFile(photo_path),
+                path=photo_path,
                 caption=main_menu_text,
                 reply_markup=main_menu_inline_keyboard()
             )
@@ -173,6 +183,21 @@ async def send_main_menu_editable(message, bot, send_photo=False):
             )
 
 
+async def show_main_menu_screen(message, bot):
+    """
+    Показ главного меню на месте текущего сообщения.
+    Если сообщение с фото, фото заменяется фото главного меню; текстовое сообщение редактируется.
+    """
+    photo_path = "src/bot/media/start.png"
+    await show_screen(
+        bot,
+        message,
+        text="📚 Главное меню\n\nВыберите действие:",
+        reply_markup=main_menu_inline_keyboard(),
+        photo_path=asset_registry.existing_file(photo_path) if message.photo else None
+    )
+
+
 @router.message(CommandStart())
 async def start_handler(message: Message, bot: Bot):
     """
@@ -208,17 +233,8 @@ async def show_main_menu_callback(callback: CallbackQuery, callback_data: Naviga
     """
     Обработчик для показа главного меню по нажатию кнопки "Назад в главное меню".
     """
-    # Проверяем, является ли текущее сообщение сообщением с фото
-    # Если да, то удаляем его и отправляем новое с фото
-    # Если нет, то редактируем текст
-    if callback.message.photo:
-        # Это сообщение с фото, удаляем его и отправляем новое с фото
-        await callback.message.delete()
-        await send_main_menu(callback.message.chat.id, bot, send_photo=True)
-    else:
-        # Это сообщение с текстом, редактируем его
-        await send_main_menu_editable(callback.message, bot, send_photo=False)
-    await callback.answer()
+    # Сообщение с фото заменяем фото главного меню, текстовое - текстом меню, не удаляя сообщение
+    await show_main_menu_screen(callback.message, bot)
 
 
 @router.callback_query(NavigationCallback.filter(F.action == "main_menu"))
@@ -226,28 +242,18 @@ async def main_menu_handler(callback: CallbackQuery, callback_data: NavigationCa
     """
     Обработчик для возврата в главное меню по нажатию кнопки "Назад в главное меню".
     """
-    # Проверяем, является ли текущее сообщение сообщением с фото
-    # Если да, то удаляем его и отправляем новое с фото
-    # Если нет, то редактируем текст
-    if callback.message.photo:
-        # Это сообщение с фото, удаляем его и отправляем новое с фото
-        await callback.message.delete()
-        await send_main_menu(callback.message.chat.id, bot, send_photo=True)
-    else:
-        # Это сообщение с текстом, редактируем его
-        await send_main_menu_editable(callback.message, bot, send_photo=False)
-    
-    await callback.answer()
+    # Сообщение с фото заменяем фото главного меню, текстовое - текстом меню, не удаляя сообщение
+    await show_main_menu_screen(callback.message, bot)
 
 
 
 @router.callback_query(NavigationCallback.filter(F.action == "about_project"))
-async def about_project_handler(callback: CallbackQuery, callback_data: NavigationCallback, bot: Bot):
+async def about_project_handler(callback: CallbackQuery, callback_data: NavigationCallback, bot: Bot, loader: DataLoader):
     """
     Обработчик для показа информации о проекте.
     """
-    # Используем объект базы данных, прикрепленный к боту
-    db = bot.db
+    # Загрузчик данных текущего обновления: повторные чтения не обращаются к базе
+    db = loader
     
     # Получаем контент из базы данных
     menu_item = await db.get_menu_item('about_project')
@@ -258,9 +264,6 @@ async def about_project_handler(callback: CallbackQuery, callback_data: Navigati
         content = "Информация о проекте временно недоступна."
         image_path = None
     
-    # Удаляем старое сообщение
-    await callback.message.delete()
-    
     # Создаем клавиатуру с кнопкой "Назад в главное меню" с новым callback_data
     from aiogram.utils.keyboard import InlineKeyboardBuilder
     from aiogram.types import InlineKeyboardButton
@@ -273,137 +276,85 @@ async def about_project_handler(callback: CallbackQuery, callback_data: Navigati
         callback_data=NavigationCallback(action="main_menu").pack()
     ))
     
-    # Проверяем наличие изображения и отправляем его, если оно есть
-    if image_path and os.path.exists(image_path):
-        # Отправляем новое сообщение с фото
-        await bot.send_photo(
-            chat_id=callback.message.chat.id,
-            photo=FSInputFile(image_path),
-            caption=content,
-            reply_markup=keyboard_builder.as_markup(),
-            parse_mode="HTML"
-        )
-    else:
-        # Если изображение не указано или не существует, отправляем только текст
-        await bot.send_message(
-            chat_id=callback.message.chat.id,
-            text=content,
-            reply_markup=keyboard_builder.as_markup(),
-            parse_mode="HTML"
-        )
-    
-    await callback.answer()
+    # Показываем экран на месте текущего сообщения (с фото, если оно есть)
+    await show_screen(
+        bot,
+        callback.message,
+        text=content,
+        reply_markup=keyboard_builder.as_markup(),
+        photo_path=asset_registry.existing_file(image_path)
+    )
 
 
 @router.callback_query(NavigationCallback.filter(F.action == "promotions"))
-async def promotions_handler(callback: CallbackQuery, callback_data: NavigationCallback, bot: Bot):
+async def promotions_handler(callback: CallbackQuery, callback_data: NavigationCallback, bot: Bot, loader: DataLoader):
     """
     Обработчик для показа списка акций.
     """
-    db = bot.db
+    db = loader
     
     promotions = await db.get_all_active_promotions()
     
-    await callback.message.delete()
-    
     if not promotions:
-        await bot.send_message(
-            chat_id=callback.message.chat.id,
+        await show_screen(
+            bot,
+            callback.message,
             text="К сожалению, в данный момент активных акций нет.",
-            reply_markup=back_to_main_menu_keyboard(),
-            parse_mode="HTML"
+            reply_markup=back_to_main_menu_keyboard()
         )
     else:
         # Создаем клавиатуру с акциями
         keyboard = promotions_list_keyboard(promotions)
         
-        await bot.send_message(
-            chat_id=callback.message.chat.id,
+        await show_screen(
+            bot,
+            callback.message,
             text="Выберите акцию:",
-            reply_markup=keyboard.as_markup(),
-            parse_mode="HTML"
+            reply_markup=keyboard.as_markup()
         )
-            
-    await callback.answer()
 
 
 @router.callback_query(NavigationCallback.filter(F.action == "show_promotion_details"))
-async def show_promotion_details_handler(callback: CallbackQuery, callback_data: NavigationCallback, bot: Bot):
+async def show_promotion_details_handler(callback: CallbackQuery, callback_data: NavigationCallback, bot: Bot, loader: DataLoader):
     """
     Обработчик для показа деталей выбранной акции.
     """
-    db = bot.db
+    db = loader
     promotion_id = callback_data.promotion_id
     
     promotion = await db.get_promotion_by_id(promotion_id)
-    
-    await callback.message.delete()
 
     if not promotion:
-        await bot.send_message(
-            chat_id=callback.message.chat.id,
+        await show_screen(
+            bot,
+            callback.message,
             text="К сожалению, акция не найдена или неактивна.",
-            reply_markup=back_to_main_menu_keyboard(),
-            parse_mode="HTML"
+            reply_markup=back_to_main_menu_keyboard()
         )
-        await callback.answer()
         return
 
-    promo_id, name, description, course_link, discounted_price, start_date_str, end_date_str, image_path, is_period_enabled, is_price_enabled = promotion
-     
-    # Форматирование дат с обработкой None значений
-    import datetime
-    if start_date_str is None:
-        start_date = "Дата не указана"
-    else:
-        start_date = datetime.datetime.strptime(start_date_str, '%Y-%m-%d').strftime('%d.%m.%Y')
-    
-    if end_date_str is None:
-        end_date = "Дата не указана"
-    else:
-        end_date = datetime.datetime.strptime(end_date_str, '%Y-%m-%d').strftime('%d.%m.%Y')
-
-    promo_text = f"✨ <b>{name}</b>\n\n{description}\n\n"
-    
-    # Добавляем цену со скидкой, если она включена и не равна None
-    if is_price_enabled and discounted_price is not None:
-        promo_text += f"💰 Цена по акции: {discounted_price} руб.\n"
-    
-    # Добавляем период действия, если он включен и даты не равны None
-    if is_period_enabled and start_date_str is not None and end_date_str is not None:
-        promo_text += f"🗓️ Период действия: с {start_date} по {end_date}"
-    
-    # Убираем лишний символ новой строки в конце, если он есть
-    promo_text = promo_text.rstrip('\n')
-    
-    reply_markup = get_promotion_keyboard(course_link)
+    image_path = promotion[7]
+    promo_text, reply_markup = await screen_cache.get_or_render(
+        ("promotion", promotion_id),
+        lambda: render_promotion_details(promotion)
+    )
     
-    if image_path and os.path.exists(image_path):
-        await bot.send_photo(
-            chat_id=callback.message.chat.id,
-            photo=FSInputFile(image_path),
-            caption=promo_text,
-            reply_markup=reply_markup,
-            parse_mode="HTML"
-        )
-    else:
-        await bot.send_message(
-            chat_id=callback.message.chat.id,
-            text=promo_text,
-            reply_markup=reply_markup,
-            parse_mode="HTML"
-        )
-        
-    await callback.answer()
+    await show_screen(
+        bot,
+        callback.message,
+        text=promo_text,
+        reply_markup=reply_markup,
+        photo_path=asset_registry.existing_file(image_path)
+    )
 
 
 @router.callback_query(NavigationCallback.filter(F.action == "reviews"))
-async def reviews_handler(callback: CallbackQuery, callback_data: NavigationCallback, bot: Bot):
+async def reviews_handler(callback: CallbackQuery, callback_data: NavigationCallback, bot: Bot, loader: DataLoader):
     """
     Обработчик для показа информации об отзывах.
     """
-    # Используем объект базы данных, прикрепленный к боту
-    db = bot.db
+    # Загрузчик данных текущего обновления: повторные чтения не обращаются к базе
+    db = loader
     
     # Получаем контент из базы данных
     menu_item = await db.get_menu_item('reviews')
@@ -416,9 +367,6 @@ async def reviews_handler(callback: CallbackQuery, callback_data: NavigationCall
         image_path = None
         url_link = None
     
-    # Удаляем старое сообщение
-    await callback.message.delete()
-    
     # Создаем клавиатуру с URL-кнопкой "Перейти к отзывам" и кнопкой "Назад в главное меню"
     from aiogram.types import InlineKeyboardButton
     from aiogram.utils.keyboard import InlineKeyboardBuilder
@@ -435,35 +383,23 @@ async def reviews_handler(callback: CallbackQuery, callback_data: NavigationCall
         callback_data=NavigationCallback(action="show_main_menu").pack()
     ))
     
-    # Проверяем наличие изображения и отправляем его, если оно есть
-    if image_path and os.path.exists(image_path):
-        # Отправляем новое сообщение с фото
-        await bot.send_photo(
-            chat_id=callback.message.chat.id,
-            photo=FSInputFile(image_path),
-            caption=content,
-            reply_markup=keyboard_builder.as_markup(),
-            parse_mode="HTML"
-        )
-    else:
-        # Если изображение не указано или не существует, отправляем только текст
-        await bot.send_message(
-            chat_id=callback.message.chat.id,
-            text=content,
-            reply_markup=keyboard_builder.as_markup(),
-            parse_mode="HTML"
-        )
-    
-    await callback.answer()
+    # Показываем экран на месте текущего сообщения (с фото, если оно есть)
+    await show_screen(
+        bot,
+        callback.message,
+        text=content,
+        reply_markup=keyboard_builder.as_markup(),
+        photo_path=asset_registry.existing_file(image_path)
+    )
 
 
 @router.callback_query(NavigationCallback.filter(F.action == "support"))
-async def support_handler(callback: CallbackQuery, callback_data: NavigationCallback, bot: Bot):
+async def support_handler(callback: CallbackQuery, callback_data: NavigationCallback, bot: Bot, loader: DataLoader):
     """
     Обработчик для показа информации о поддержке.
     """
-    # Используем объект базы данных, прикрепленный к боту
-    db = bot.db
+    # Загрузчик данных текущего обновления: повторные чтения не обращаются к базе
+    db = loader
     
     # Получаем контент из базы данных
     menu_item = await db.get_menu_item('support')
@@ -474,9 +410,6 @@ async def support_handler(callback: CallbackQuery, callback_data: NavigationCall
         content = "Информация о поддержке временно недоступна."
         image_path = None
     
-    # Удаляем старое сообщение
-    await callback.message.delete()
-    
     # Создаем клавиатуру с кнопкой "Назад в главное меню"
     from aiogram.utils.keyboard import InlineKeyboardBuilder
     from aiogram.types import InlineKeyboardButton
@@ -489,35 +422,23 @@ async def support_handler(callback: CallbackQuery, callback_data: NavigationCall
         callback_data=NavigationCallback(action="main_menu").pack()
     ))
     
-    # Проверяем наличие изображения и отправляем его, если оно есть
-    if image_path and os.path.exists(image_path):
-        # Отправляем новое сообщение с фото
-        await bot.send_photo(
-            chat_id=callback.message.chat.id,
-            photo=FSInputFile(image_path),
-            caption=content,
-            reply_markup=keyboard_builder.as_markup(),
-            parse_mode="HTML"
-        )
-    else:
-        # Если изображение не указано или не существует, отправляем только текст
-        await bot.send_message(
-            chat_id=callback.message.chat.id,
-            text=content,
-            reply_markup=keyboard_builder.as_markup(),
-            parse_mode="HTML"
-        )
-    
-    await callback.answer()
+    # Показываем экран на месте текущего сообщения (с фото, если оно есть)
+    await show_screen(
+        bot,
+        callback.message,
+        text=content,
+        reply_markup=keyboard_builder.as_markup(),
+        photo_path=asset_registry.existing_file(image_path)
+    )
 
 
 @router.callback_query(NavigationCallback.filter(F.action == "catalog"))
-async def catalog_handler(callback: CallbackQuery, callback_data: NavigationCallback, bot: Bot):
+async def catalog_handler(callback: CallbackQuery, callback_data: NavigationCallback, bot: Bot, loader: DataLoader):
     """
     Обработчик для показа ссылки на каталог.
     """
-    # Используем объект базы данных, прикрепленный к боту
-    db = bot.db
+    # Загрузчик данных текущего обновления: повторные чтения не обращаются к базе
+    db = loader
     
     # Получаем контент (текст) и ссылку (url_link) из пункта меню 'catalog'
     menu_item = await db.get_menu_item('catalog')
@@ -530,9 +451,6 @@ async def catalog_handler(callback: CallbackQuery, callback_data: NavigationCall
         url_link = "https://example.com" # значение по умолчанию
         image_path = None
     
-    # Удаляем старое сообщение
-    await callback.message.delete()
-    
     # Создаем клавиатуру с URL-кнопкой "Перейти в каталог" и кнопкой "Назад в главное меню"
     from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
     keyboard = InlineKeyboardMarkup(inline_keyboard=[
@@ -550,33 +468,23 @@ async def catalog_handler(callback: CallbackQuery, callback_data: NavigationCall
         ]
     ])
     
-    # Проверяем наличие изображения и отправляем его, если оно есть
-    if image_path and os.path.exists(image_path):
-        # Отправляем новое сообщение с фото
-        await bot.send_photo(
-            chat_id=callback.message.chat.id,
-            photo=FSInputFile(image_path),
-            caption=content, # Используем content как текст
-            reply_markup=keyboard # Используем новую клавиатуру
-        )
-    else:
-        # Если изображение не указано или не существует, отправляем только текст
-        await bot.send_message(
-            chat_id=callback.message.chat.id,
-            text=content, # Используем content как текст
-            reply_markup=keyboard # Используем новую клавиатуру
-        )
-    
-    await callback.answer()
+    # Показываем экран на месте текущего сообщения (с фото, если оно есть)
+    await show_screen(
+        bot,
+        callback.message,
+        text=content,
+        reply_markup=keyboard,
+        photo_path=asset_registry.existing_file(image_path)
+    )
 
 
 @router.callback_query(NavigationCallback.filter(F.action == "topics"))
-async def show_topics(callback: CallbackQuery, callback_data: NavigationCallback, bot: Bot):
+async def show_topics(callback: CallbackQuery, callback_data: NavigationCallback, bot: Bot, loader: DataLoader):
     """
     Обработчик для показа списка тем курсов.
     """
-    # Используем объект базы данных, прикрепленный к боту
-    db = bot.db
+    # Загрузчик данных текущего обновления: повторные чтения не обращаются к базе
+    db = loader
     
     # Получаем список тем из БД
     topics = await db.get_topics()
@@ -586,45 +494,34 @@ async def show_topics(callback: CallbackQuery, callback_data: NavigationCallback
     # Определяем путь к изображению
     photo_path = "src/bot/media/topics.png"
 
-    # Удаляем старое сообщение
-    await callback.message.delete()
-
     if not topics:
-        await bot.send_message(
-            chat_id=callback.message.chat.id,
+        await show_screen(
+            bot,
+            callback.message,
             text="К сожалению, пока нет доступных тем курсов.",
             reply_markup=main_menu_inline_keyboard()
         )
-        await callback.answer()
         return
 
-    # Если изображение существует, отправляем его вместе с подписью и клавиатурой
-    if os.path.exists(photo_path):
-        await bot.send_photo(
-            chat_id=callback.message.chat.id,
-            photo=FSInputFile(photo_path),
-            caption="Здесь представлен список всех наших когда-либо созданных цифровых продуктов, мы разбили на категории для удобства. Выбирайте что вам по душе:",
-            reply_markup=topics_keyboard(topics, page),
-            parse_mode="HTML"
-        )
-    else:
-        # Иначе отправляем только текст
-        await bot.send_message(
-            chat_id=callback.message.chat.id,
-            text="Здесь представлен список всех наших когда-либо созданных цифровых продуктов, мы разбили на категории для удобства. Выбирайте что вам по душе:",
-            reply_markup=topics_keyboard(topics, page),
-            parse_mode="HTML"
-        )
-    await callback.answer()
+    topics_text, keyboard = await screen_cache.get_or_render(("topics", page), lambda: render_topics_page(topics, page))
+
+    # Если изображение существует, показываем его вместе с подписью и клавиатурой
+    await show_screen(
+        bot,
+        callback.message,
+        text=topics_text,
+        reply_markup=keyboard,
+        photo_path=asset_registry.existing_file(photo_path)
+    )
 
 
 @router.callback_query(NavigationCallback.filter(F.action == "show_topic_details"))
-async def show_topic_details(callback: CallbackQuery, callback_data: NavigationCallback, bot: Bot):
+async def show_topic_details(callback: CallbackQuery, callback_data: NavigationCallback, bot: Bot, loader: DataLoader):
     """
     Обработчик для показа детальной информации о теме, включая изображение.
     """
-    # Используем объект базы данных, прикрепленный к боту
-    db = bot.db
+    # Загрузчик данных текущего обновления: повторные чтения не обращаются к базе
+    db = loader
     
     topic_id = callback_data.topic_id
     
@@ -643,109 +540,35 @@ async def show_topic_details(callback: CallbackQuery, callback_data: NavigationC
             )
         else:
             await safe_edit_text(bot, callback.message, text=stripped_text)
-        await callback.answer()
         return
 
     # Извлекаем данные темы (id, name, parent_id, image_path)
     topic_id, topic_name, parent_id, image_path = topic
 
-    # Формируем сообщение с информацией о теме
-    topic_info = f"📚 <b>{topic_name}</b>\n\nВыберите курс в этой теме:"
+    # Формируем сообщение с информацией о теме и клавиатуру с курсами
+    topic_info, keyboard = await screen_cache.get_or_render(
+        ("topic_details", topic_id),
+        lambda: render_topic_details(db, topic_id, topic_name)
+    )
 
-    # Проверяем наличие изображения и отправляем его, если оно есть
-    if image_path:
-        # Используем FSInputFile для отправки изображения
-        from aiogram.types import FSInputFile
-        import os
-        
-        # Добавляем логирование для отладки проблемы с изображениями
-        logging.info(f"Topic Image Path from DB: {image_path}")
-        logging.info(f"Current Working Directory: {os.getcwd()}")
-        
-        # Формируем путь к файлу изображения
-        # Если image_path - это URL-путь (как в веб-приложении), преобразуем его в путь к файлу
-        if image_path.startswith('/topics_img/'):
-            # Это URL-путь к изображению темы, преобразуем в локальный путь
-            # Предполагаем, что изображения тем хранятся в src/web_app/static/img/topics/
-            file_path = os.path.join(os.getcwd(), 'src', 'web_app', 'static', 'img', 'topics', os.path.basename(image_path))
-        else:
-            # Используем путь как есть
-            file_path = os.path.join(os.getcwd(), image_path) if not os.path.isabs(image_path) else image_path
-        
-        # Формируем путь к файлу изображения
-        # Если image_path - это URL-путь (как в веб-приложении), преобразуем его в путь к файлу
-        if image_path.startswith('/topics_img/'):
-            # Это URL-путь к изображению темы, преобразуем в локальный путь
-            # Предполагаем, что изображения тем хранятся в src/web_app/static/img/topics/
-            file_path = os.path.join(os.getcwd(), 'src', 'web_app', 'static', 'img', 'topics', os.path.basename(image_path))
-        else:
-            # Используем путь как есть
-            file_path = os.path.join(os.getcwd(), image_path) if not os.path.isabs(image_path) else image_path
-        
-        logging.info(f"Formed File Path: {file_path}")
-        logging.info(f"File Exists: {os.path.exists(file_path)}")
-        
-        if os.path.exists(file_path):
-            # Удаляем старое сообщение и отправляем новое с фото
-            await callback.message.delete()
-            await bot.send_photo(
-                chat_id=callback.message.chat.id,
-                photo=FSInputFile(file_path),
-                caption=topic_info,
-                reply_markup=courses_keyboard(await db.get_courses_by_topic(topic_id), topic_id=topic_id, page=0),
-                parse_mode="HTML"
-            )
-        else:
-            # Если файл не найден, отправляем только текст
-            # Проверяем, есть ли текст для редактирования
-            stripped_text = topic_info.strip() if topic_info else ""
-            if not stripped_text:
-                await callback.message.delete()
-                await bot.send_message(
-                    chat_id=callback.message.chat.id,
-                    text="Произошла ошибка при отображении информации о теме.",
-                    reply_markup=courses_keyboard(await db.get_courses_by_topic(topic_id), topic_id=topic_id, page=0),
-                    parse_mode="HTML"
-                )
-            else:
-                await safe_edit_text(
-                    bot,
-                    callback.message,
-                    text=stripped_text,
-                    reply_markup=courses_keyboard(await db.get_courses_by_topic(topic_id), topic_id=topic_id, page=0),
-                    parse_mode="HTML"
-                )
-    else:
-        # Если изображение не указано, отправляем только текст
-        # Проверяем, есть ли текст для редактирования
-        stripped_text = topic_info.strip() if topic_info else ""
-        if not stripped_text:
-            await callback.message.delete()
-            await bot.send_message(
-                chat_id=callback.message.chat.id,
-                text="Произошла ошибка при отображении информации о теме.",
-                reply_markup=courses_keyboard(await db.get_courses_by_topic(topic_id), topic_id=topic_id, page=0),
-                parse_mode="HTML"
-            )
-        else:
-            await safe_edit_text(
-                bot,
-                callback.message,
-                text=stripped_text,
-                reply_markup=courses_keyboard(await db.get_courses_by_topic(topic_id), topic_id=topic_id, page=0),
-                parse_mode="HTML"
-            )
+    # Показываем тему с изображением, если файл изображения существует
+    await show_screen(
+        bot,
+        callback.message,
+        text=topic_info,
+        reply_markup=keyboard,
+        photo_path=asset_registry.existing_file(image_path)
+    )
 
-    await callback.answer()
 
 
 @router.callback_query(NavigationCallback.filter(F.action == "prev_page_topics"))
-async def show_prev_page_topics(callback: CallbackQuery, callback_data: NavigationCallback, bot: Bot):
+async def show_prev_page_topics(callback: CallbackQuery, callback_data: NavigationCallback, bot: Bot, loader: DataLoader):
     """
     Обработчик для показа предыдущей страницы списка тем курсов.
     """
-    # Используем объект базы данных, прикрепленный к боту
-    db = bot.db
+    # Загрузчик данных текущего обновления: повторные чтения не обращаются к базе
+    db = loader
     
     # Получаем список тем из БД
     topics = await db.get_topics()
@@ -764,10 +587,9 @@ async def show_prev_page_topics(callback: CallbackQuery, callback_data: Navigati
             )
         else:
             await safe_edit_text(bot, callback.message, text=stripped_text)
-        await callback.answer()
         return
 
-    message_text = "Здесь представлен список всех наших когда-либо созданных цифровых продуктов, мы разбили на категории для удобства. Выбирайте что вам по душе:"
+    message_text, keyboard = await screen_cache.get_or_render(("topics", page), lambda: render_topics_page(topics, page))
     # Проверяем, есть ли текст для редактирования
     stripped_text = message_text.strip() if message_text else ""
     if not stripped_text:
@@ -775,25 +597,24 @@ async def show_prev_page_topics(callback: CallbackQuery, callback_data: Navigati
         await bot.send_message(
             chat_id=callback.message.chat.id,
             text="Произошла ошибка при отображении тем.",
-            reply_markup=topics_keyboard(topics, page)
+            reply_markup=keyboard
         )
     else:
         await safe_edit_text(
             bot,
             callback.message,
             text=stripped_text,
-            reply_markup=topics_keyboard(topics, page)
+            reply_markup=keyboard
         )
-    await callback.answer()
 
 
 @router.callback_query(NavigationCallback.filter(F.action == "next_page_topics"))
-async def show_next_page_topics(callback: CallbackQuery, callback_data: NavigationCallback, bot: Bot):
+async def show_next_page_topics(callback: CallbackQuery, callback_data: NavigationCallback, bot: Bot, loader: DataLoader):
     """
     Обработчик для показа следующей страницы списка тем курсов.
     """
-    # Используем объект базы данных, прикрепленный к боту
-    db = bot.db
+    # Загрузчик данных текущего обновления: повторные чтения не обращаются к базе
+    db = loader
     
     # Получаем список тем из БД
     topics = await db.get_topics()
@@ -812,10 +633,9 @@ async def show_next_page_topics(callback: CallbackQuery, callback_data: Navigati
             )
         else:
             await safe_edit_text(bot, callback.message, text=stripped_text)
-        await callback.answer()
         return
 
-    message_text = "Здесь представлен список всех наших когда-либо созданных цифровых продуктов, мы разбили на категории для удобства. Выбирайте что вам по душе:"
+    message_text, keyboard = await screen_cache.get_or_render(("topics", page), lambda: render_topics_page(topics, page))
     # Проверяем, есть ли текст для редактирования
     stripped_text = message_text.strip() if message_text else ""
     if not stripped_text:
@@ -823,25 +643,24 @@ async def show_next_page_topics(callback: CallbackQuery, callback_data: Navigati
         await bot.send_message(
             chat_id=callback.message.chat.id,
             text="Произошла ошибка при отображении тем.",
-            reply_markup=topics_keyboard(topics, page)
+            reply_markup=keyboard
         )
     else:
         await safe_edit_text(
             bot,
             callback.message,
             text=stripped_text,
-            reply_markup=topics_keyboard(topics, page)
+            reply_markup=keyboard
         )
-    await callback.answer()
 
 
 @router.callback_query(NavigationCallback.filter(F.action == "courses"))
-async def show_courses(callback: CallbackQuery, callback_data: NavigationCallback, bot: Bot):
+async def show_courses(callback: CallbackQuery, callback_data: NavigationCallback, bot: Bot, loader: DataLoader):
     """
     Обработчик для показа списка курсов в выбранной теме.
     """
-    # Используем объект базы данных, прикрепленный к боту
-    db = bot.db
+    # Загрузчик данных текущего обновления: повторные чтения не обращаются к базе
+    db = loader
     
     # Преобразуем topic_id из строки в целое число с обработкой ошибок
     topic_id = None
@@ -863,7 +682,6 @@ async def show_courses(callback: CallbackQuery, callback_data: NavigationCallbac
                 )
             else:
                 await safe_edit_text(bot, callback.message, text=stripped_text)
-            await callback.answer()
             return
 
     page = callback_data.page
@@ -880,7 +698,6 @@ async def show_courses(callback: CallbackQuery, callback_data: NavigationCallbac
             )
         else:
             await safe_edit_text(bot, callback.message, text=stripped_text)
-        await callback.answer()
         return
       
     # Получаем список курсов для выбранной темы
@@ -899,17 +716,13 @@ async def show_courses(callback: CallbackQuery, callback_data: NavigationCallbac
             )
         else:
             await safe_edit_text(bot, callback.message, text=stripped_text)
-        await callback.answer()
         return
 
-    # Получаем название темы для отображения
-    topic = await db.get_topic_by_id(topic_id)
-    topic_name = (topic[1] if topic and topic[1] else "Неизвестная тема").strip()
-    if not topic_name:
-        topic_name = "Неизвестная тема"
-
-    message_text = f"Товары в теме '{topic_name}':"
-    keyboard = courses_keyboard(courses, topic_id=topic_id, page=page)
+    # Экран страницы курсов (название темы и клавиатура) берём из кэша экранов
+    message_text, keyboard = await screen_cache.get_or_render(
+        ("courses", topic_id, page),
+        lambda: render_courses_page(db, courses, topic_id, page)
+    )
 
     # Проверяем, что текст не пустой перед редактированием
     # Проверяем, есть ли текст для редактирования
@@ -929,16 +742,15 @@ async def show_courses(callback: CallbackQuery, callback_data: NavigationCallbac
             text=stripped_text,
             reply_markup=keyboard
         )
-    await callback.answer()
 
 
 @router.callback_query(NavigationCallback.filter(F.action == "prev_page_courses"))
-async def show_prev_page_courses(callback: CallbackQuery, callback_data: NavigationCallback, bot: Bot):
+async def show_prev_page_courses(callback: CallbackQuery, callback_data: NavigationCallback, bot: Bot, loader: DataLoader):
     """
     Обработчик для показа предыдущей страницы списка курсов.
     """
-    # Используем объект базы данных, прикрепленный к боту
-    db = bot.db
+    # Загрузчик данных текущего обновления: повторные чтения не обращаются к базе
+    db = loader
     
     # Преобразуем topic_id из строки в целое число с обработкой ошибок
     topic_id = None
@@ -957,7 +769,6 @@ async def show_prev_page_courses(callback: CallbackQuery, callback_data: Navigat
                 )
             else:
                 await safe_edit_text(bot, callback.message, text=stripped_text)
-            await callback.answer()
             return
 
     page = callback_data.page
@@ -974,7 +785,6 @@ async def show_prev_page_courses(callback: CallbackQuery, callback_data: Navigat
             )
         else:
             await safe_edit_text(bot, callback.message, text=stripped_text)
-        await callback.answer()
         return
       
     # Получаем список курсов для выбранной темы
@@ -992,17 +802,13 @@ async def show_prev_page_courses(callback: CallbackQuery, callback_data: Navigat
             )
         else:
             await safe_edit_text(bot, callback.message, text=stripped_text)
-        await callback.answer()
         return
 
-    # Получаем название темы для отображения
-    topic = await db.get_topic_by_id(topic_id)
-    topic_name = (topic[1] if topic and topic[1] else "Неизвестная тема").strip()
-    if not topic_name:
-        topic_name = "Неизвестная тема"
-
-    message_text = f"Товары в теме '{topic_name}':"
-    keyboard = courses_keyboard(courses, topic_id=topic_id, page=page)
+    # Экран страницы курсов (название темы и клавиатура) берём из кэша экранов
+    message_text, keyboard = await screen_cache.get_or_render(
+        ("courses", topic_id, page),
+        lambda: render_courses_page(db, courses, topic_id, page)
+    )
 
     # Проверяем, что текст не пустой перед редактированием
     # Проверяем, есть ли текст для редактирования
@@ -1022,16 +828,15 @@ async def show_prev_page_courses(callback: CallbackQuery, callback_data: Navigat
             text=stripped_text,
             reply_markup=keyboard
         )
-    await callback.answer()
 
 
 @router.callback_query(NavigationCallback.filter(F.action == "next_page_courses"))
-async def show_next_page_courses(callback: CallbackQuery, callback_data: NavigationCallback, bot: Bot):
+async def show_next_page_courses(callback: CallbackQuery, callback_data: NavigationCallback, bot: Bot, loader: DataLoader):
     """
     Обработчик для показа следующей страницы списка курсов.
     """
-    # Используем объект базы данных, прикрепленный к боту
-    db = bot.db
+    # Загрузчик данных текущего обновления: повторные чтения не обращаются к базе
+    db = loader
     
     # Преобразуем topic_id из строки в целое число с обработкой ошибок
     topic_id = None
@@ -1050,7 +855,6 @@ async def show_next_page_courses(callback: CallbackQuery, callback_data: Navigat
                 )
             else:
                 await safe_edit_text(bot, callback.message, text=stripped_text)
-            await callback.answer()
             return
 
     page = callback_data.page
@@ -1067,7 +871,6 @@ async def show_next_page_courses(callback: CallbackQuery, callback_data: Navigat
             )
         else:
             await safe_edit_text(bot, callback.message, text=stripped_text)
-        await callback.answer()
         return
       
     # Получаем список курсов для выбранной темы
@@ -1085,17 +888,13 @@ async def show_next_page_courses(callback: CallbackQuery, callback_data: Navigat
             )
         else:
             await safe_edit_text(bot, callback.message, text=stripped_text)
-        await callback.answer()
         return
 
-    # Получаем название темы для отображения
-    topic = await db.get_topic_by_id(topic_id)
-    topic_name = (topic[1] if topic and topic[1] else "Неизвестная тема").strip()
-    if not topic_name:
-        topic_name = "Неизвестная тема"
-
-    message_text = f"Товары в теме '{topic_name}':"
-    keyboard = courses_keyboard(courses, topic_id=topic_id, page=page)
+    # Экран страницы курсов (название темы и клавиатура) берём из кэша экранов
+    message_text, keyboard = await screen_cache.get_or_render(
+        ("courses", topic_id, page),
+        lambda: render_courses_page(db, courses, topic_id, page)
+    )
     
     # Проверяем, есть ли текст для редактирования
     stripped_text = message_text.strip() if message_text else ""
@@ -1125,16 +924,15 @@ async def show_next_page_courses(callback: CallbackQuery, callback_data: Navigat
                 reply_markup=keyboard,
                 parse_mode="HTML"
             )
-    await callback.answer()
 
 
 @router.callback_query(NavigationCallback.filter(F.action == "course"))
-async def show_course_details(callback: CallbackQuery, callback_data: NavigationCallback, bot: Bot):
+async def show_course_details(callback: CallbackQuery, callback_data: NavigationCallback, bot: Bot, loader: DataLoader):
     """
     Обработчик для показа детальной информации о курсе.
     """
-    # Используем объект базы данных, прикрепленный к боту
-    db = bot.db
+    # Загрузчик данных текущего обновления: повторные чтения не обращаются к базе
+    db = loader
     
     course_id = callback_data.course_id
     
@@ -1153,27 +951,10 @@ async def show_course_details(callback: CallbackQuery, callback_data: Navigation
             )
         else:
             await safe_edit_text(bot, callback.message, text=stripped_text)
-        await callback.answer()
         return
 
     # Извлекаем данные курса (id, name, description, price, topic_id, payment_link, image_path)
-    course_details = await db.get_course_by_id(course_id)
-    if not course_details:
-        message_text = "К сожалению, информация о курсе недоступна."
-        # Проверяем, есть ли текст для редактирования
-        stripped_text = message_text.strip() if message_text else ""
-        if not stripped_text:
-            await callback.message.delete()
-            await bot.send_message(
-                chat_id=callback.message.chat.id,
-                text="Произошла ошибка при отображении информации о курсе."
-            )
-        else:
-            await safe_edit_text(bot, callback.message, text=stripped_text)
-        await callback.answer()
-        return
-
-    course_id, course_name, description, price, topic_id_str, payment_link, image_path = course_details
+    course_id, course_name, description, price, topic_id_str, payment_link, image_path = course
 
     # Преобразуем topic_id из строки в целое число с обработкой ошибок
     topic_id = None
@@ -1183,98 +964,32 @@ async def show_course_details(callback: CallbackQuery, callback_data: Navigation
         except ValueError:
             topic_id = 0  # значение по умолчанию в случае ошибки
 
-    # Формируем сообщение с информацией о курсе
-    course_info = (
-        f"📚 <b>{course_name}</b>\n\n"
-        f"{description}\n\n"
-        f"<b>Цена:</b> {price} руб."
+    # Сообщение с информацией о курсе и клавиатура (оплата по ссылке или навигация)
+    course_info, reply_markup = await screen_cache.get_or_render(
+        ("course", course_id),
+        lambda: render_course_details(course_id, course_name, description, price, topic_id, payment_link, bot.topic_tree)
     )
 
-    # Проверяем наличие payment_link и создаем соответствующую клавиатуру
-    if payment_link:
-        reply_markup = get_payment_keyboard(payment_link)
-    else:
-        reply_markup = await course_keyboard(course_id, topic_id)
-
-    # Проверяем наличие изображения и отправляем его, если оно есть
-    if image_path:
-        # Используем FSInputFile для отправки изображения
-        from aiogram.types import FSInputFile
-        # Убедимся, что путь к изображению корректен
-        import os
-        
-        # Добавляем логирование для отладки проблемы с изображениями
-        logging.info(f"Course Image Path from DB: {image_path}")
-        logging.info(f"Current Working Directory: {os.getcwd()}")
-        
-        # Путь к файлу изображения
-        file_path = os.path.join(os.getcwd(), image_path)
-        logging.info(f"Formed File Path: {file_path}")
-        logging.info(f"File Exists: {os.path.exists(file_path)}")
-        
-        if os.path.exists(file_path):
-            # Отправляем фото с информацией о курсе
-            await callback.message.delete()  # Удаляем старое сообщение
-            await bot.send_photo(
-                chat_id=callback.message.chat.id,
-                photo=FSInputFile(file_path),
-                caption=course_info,
-                reply_markup=reply_markup,
-                parse_mode="HTML"
-            )
-        else:
-            # Если файл не найден, отправляем только текст
-            # Проверяем, есть ли текст для редактирования
-            stripped_text = course_info.strip() if course_info else ""
-            if not stripped_text:
-                await callback.message.delete()
-                await bot.send_message(
-                    chat_id=callback.message.chat.id,
-                    text="Произошла ошибка при отображении информации о курсе.",
-                    reply_markup=reply_markup,
-                    parse_mode="HTML"
-                )
-            else:
-                await safe_edit_text(
-                    bot,
-                    callback.message,
-                    text=stripped_text,
-                    reply_markup=reply_markup,
-                    parse_mode="HTML"
-                )
-    else:
-        # Если изображение не указано, отправляем только текст
-        # Проверяем, есть ли текст для редактирования
-        stripped_text = course_info.strip() if course_info else ""
-        if not stripped_text:
-            await callback.message.delete()
-            await bot.send_message(
-                chat_id=callback.message.chat.id,
-                text="Произошла ошибка при отображении информации о курсе.",
-                reply_markup=reply_markup,
-                parse_mode="HTML"
-            )
-        else:
-            await safe_edit_text(
-                bot,
-                callback.message,
-                text=stripped_text,
-                reply_markup=reply_markup,
-                parse_mode="HTML"
-            )
+    # Показываем курс с изображением, если файл изображения существует
+    await show_screen(
+        bot,
+        callback.message,
+        text=course_info,
+        reply_markup=reply_markup,
+        photo_path=asset_registry.existing_file(image_path)
+    )
 
-    await callback.answer()
 
 
 @router.callback_query(NavigationCallback.filter(F.action == "payment"))
-async def handle_payment(callback: CallbackQuery, callback_data: NavigationCallback, bot: Bot):
+async def handle_payment(callback: CallbackQuery, callback_data: NavigationCallback, bot: Bot, loader: DataLoader):
     """
     Обработчик для кнопки "Оплатить".
     Проверяет, куплен ли курс пользователем. Если куплен, отправляет ссылку на курс.
     Если не куплен, запускает процесс оплаты.
     """
-    # Используем объект базы данных, прикрепленный к боту
-    db = bot.db
+    # Загрузчик данных текущего обновления: повторные чтения не обращаются к базе
+    db = loader
     
     user_id = callback.from_user.id
     course_id = callback_data.course_id
@@ -1294,7 +1009,6 @@ async def handle_payment(callback: CallbackQuery, callback_data: NavigationCallb
             )
         else:
             await safe_edit_text(bot, callback.message, text=stripped_text)
-        await callback.answer()
         return
 
     course_id, course_name, description, price, payment_link, topic_id_str, image_path = course_details
@@ -1318,7 +1032,6 @@ async def handle_payment(callback: CallbackQuery, callback_data: NavigationCallb
                 text=stripped_text,
                 reply_markup=back_to_main_menu_keyboard()
             )
-        await callback.answer()
         return
 
     # Преобразуем topic_id из строки в целое число с обработкой ошибок
@@ -1359,68 +1072,14 @@ async def handle_payment(callback: CallbackQuery, callback_data: NavigationCallb
             # Формируем сообщение о покупке
             message_text = f"Курс '{course_name}' доступен для покупки за {price} руб."
             
-            # Проверяем наличие изображения и отправляем его, если оно есть
-            if image_path:
-                # Используем FSInputFile для отправки изображения
-                from aiogram.types import FSInputFile
-                # Убедимся, что путь к изображению корректен
-                import os
-                
-                # Добавляем логирование для отладки проблемы с изображениями
-                logging.info(f"Payment Course Image Path from DB: {image_path}")
-                logging.info(f"Current Working Directory: {os.getcwd()}")
-                
-                # Путь к файлу изображения
-                file_path = os.path.join(os.getcwd(), image_path)
-                logging.info(f"Formed File Path: {file_path}")
-                logging.info(f"File Exists: {os.path.exists(file_path)}")
-                
-                if os.path.exists(file_path):
-                    # Отправляем фото с информацией о курсе и клавиатурой оплаты
-                    await callback.message.delete()  # Удаляем старое сообщение
-                    await bot.send_photo(
-                        chat_id=callback.message.chat.id,
-                        photo=FSInputFile(file_path),
-                        caption=message_text,
-                        reply_markup=get_payment_keyboard(payment_link),
-                        parse_mode="HTML"
-                    )
-                else:
-                    # Если файл не найден, отправляем только текст
-                    # Проверяем, есть ли текст для редактирования
-                    stripped_text = message_text.strip() if message_text else ""
-                    if not stripped_text:
-                        await callback.message.delete()
-                        await bot.send_message(
-                            chat_id=callback.message.chat.id,
-                            text="Произошла ошибка при отображении информации о курсе.",
-                            reply_markup=get_payment_keyboard(payment_link)
-                        )
-                    else:
-                        await safe_edit_text(
-                            bot,
-                            callback.message,
-                            text=stripped_text,
-                            reply_markup=get_payment_keyboard(payment_link)
-                        )
-            else:
-                # Если изображение не указано, отправляем только текст
-                # Проверяем, есть ли текст для редактирования
-                stripped_text = message_text.strip() if message_text else ""
-                if not stripped_text:
-                    await callback.message.delete()
-                    await bot.send_message(
-                        chat_id=callback.message.chat.id,
-                        text="Произошла ошибка при отображении информации о курсе.",
-                        reply_markup=get_payment_keyboard(payment_link)
-                    )
-                else:
-                    await safe_edit_text(
-                        bot,
-                        callback.message,
-                        text=stripped_text,
-                        reply_markup=get_payment_keyboard(payment_link)
-                    )
+            # Показываем курс с изображением и клавиатурой оплаты, если файл изображения существует
+            await show_screen(
+                bot,
+                callback.message,
+                text=message_text,
+                reply_markup=get_payment_keyboard(payment_link),
+                photo_path=asset_registry.existing_file(image_path)
+            )
         else:
             # Ссылка на оплату не найдена в настройках
             message_text = (
@@ -1444,4 +1103,3 @@ async def handle_payment(callback: CallbackQuery, callback_data: NavigationCallb
                     reply_markup=back_to_main_menu_keyboard()
                 )
     
-    await callback.answer()
@@ -3,7 +3,7 @@ from aiogram.filters.callback_data import CallbackData
 from typing import Optional, Union
 from pydantic import field_validator
 import logging
-from ..data_manager.database import Database
+from ..data_manager.topic_tree import TopicTree
 
 logger = logging.getLogger(__name__)
 
@@ -197,12 +197,13 @@ def courses_keyboard(courses: list, topic_id: int = None, page: int = 0) -> Inli
     return InlineKeyboardMarkup(inline_keyboard=keyboard)
 
 
-async def course_keyboard(course_id: Optional[int], topic_id: int = 0) -> InlineKeyboardMarkup:
+def course_keyboard(course_id: Optional[int], topic_id: int = 0, topic_tree: Optional[TopicTree] = None) -> InlineKeyboardMarkup:
     """
     Клавиатура для конкретного курса с кнопками "Оплатить", "Назад" и "Главное меню".
     
     :param course_id: ID курса (может быть None)
     :param topic_id: ID темы, к которой относится курс (опционально)
+    :param topic_tree: Дерево тем для определения родительской темы без запроса к базе
     :return: InlineKeyboardMarkup
     """
     inline_keyboard = [
@@ -214,9 +215,8 @@ async def course_keyboard(course_id: Optional[int], topic_id: int = 0) -> Inline
         ],
     ]
     
-    # Получаем parent_id для текущего topic_id из базы данных
-    db = Database()
-    parent_id = await db.get_topic_parent_id(topic_id) if topic_id else None
+    # Получаем parent_id для текущего topic_id из дерева тем
+    parent_id = topic_tree.parent_id(topic_id) if topic_tree is not None and topic_id else None
     
     # Формируем back_callback_data в зависимости от наличия parent_id
     if parent_id and parent_id != 0:
@@ -231,7 +231,6 @@ async def course_keyboard(course_id: Optional[int], topic_id: int = 0) -> Inline
         )
     ])
     
-    logger.info(f"course_keyboard: topic_id={topic_id}, course_id={course_id}, parent_id={parent_id}")
     return InlineKeyboardMarkup(inline_keyboard=inline_keyboard)
 
 
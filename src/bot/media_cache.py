@@ -0,0 +1,153 @@
+import logging
+import threading
+from typing import Dict, Optional, Tuple
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.types import FSInputFile, InputMediaPhoto, Message
+
+from ..assets.derivatives import ensure_bot_derivative
+from ..assets.registry import asset_registry
+from ..data_manager.database import Database
+
+logger = logging.getLogger(__name__)
+
+
+# Ответы Telegram, означающие, что сохранённый file_id больше не действителен
+REJECTED_FILE_ID_MESSAGES = (
+    "wrong file identifier",
+    "wrong remote file identifier",
+    "file reference expired",
+    "wrong type of the web page content",
+)
+
+
+def is_file_id_rejected(error: TelegramBadRequest) -> bool:
+    """Проверка, что Telegram отклонил именно сохранённый file_id, а не сам запрос"""
+    message = str(error).lower()
+    return any(rejected in message for rejected in REJECTED_FILE_ID_MESSAGES)
+
+
+class MediaCache:
+    """
+    Реестр file_id фотографий, уже загруженных в Telegram.
+    После первой загрузки файла Telegram возвращает file_id, по которому фото можно
+    отправлять повторно без передачи самого файла. Реестр хранится в SQLite (таблица media_files)
+    и ключуется абсолютным путём к файлу вместе с его размером и временем изменения,
+    поэтому изменённый файл автоматически загружается заново.
+    """
+
+    def __init__(self, db: Database):
+        self.db = db
+        # Копия реестра в памяти, чтобы не обращаться к базе на каждое нажатие кнопки
+        self._memory: Dict[str, Tuple[int, int, str]] = {}
+        self._lock = threading.Lock()
+        self.uploads = 0
+        self.reuses = 0
+
+    @staticmethod
+    def _stat(path: str) -> Tuple[str, int, int]:
+        """Абсолютный путь, размер и время изменения файла (из реестра файлов, без stat на каждое нажатие)"""
+        info = asset_registry.info(path)
+        if info is None:
+            raise FileNotFoundError(path)
+        return info.path, info.size, info.mtime_ns
+
+    async def lookup(self, path: str) -> Optional[str]:
+        """Получение сохранённого file_id для актуальной версии файла"""
+        resolved, size, mtime_ns = self._stat(path)
+        with self._lock:
+            cached = self._memory.get(resolved)
+        if cached is None:
+            record = await self.db.get_media_file(resolved)
+            if record is None:
+                return None
+            cached = (record[1], record[2], record[3])
+            with self._lock:
+                self._memory[resolved] = cached
+        cached_size, cached_mtime_ns, file_id = cached
+        if cached_size != size or cached_mtime_ns != mtime_ns:
+            # Файл изменился после загрузки, старый file_id больше не соответствует содержимому
+            return None
+        return file_id
+
+    async def remember(self, path: str, file_id: str):
+        """Сохранение file_id, полученного после загрузки файла"""
+        resolved, size, mtime_ns = self._stat(path)
+        with self._lock:
+            self._memory[resolved] = (size, mtime_ns, file_id)
+        await self.db.save_media_file(resolved, size, mtime_ns, file_id)
+
+    async def forget(self, path: str):
+        """Удаление file_id, который Telegram больше не принимает"""
+        resolved = asset_registry.canonical(path)
+        with self._lock:
+            self._memory.pop(resolved, None)
+        await self.db.delete_media_file(resolved)
+
+    async def upload(self, bot: Bot, chat_id: int, path: str, **kwargs) -> Message:
+        """Загрузка файла в Telegram с сохранением полученного file_id"""
+        message = await bot.send_photo(chat_id=chat_id, photo=FSInputFile(path), **kwargs)
+        self.uploads += 1
+        if message.photo:
+            # Последний элемент - вариант фото с наибольшим разрешением
+            await self.remember(path, message.photo[-1].file_id)
+        return message
+
+    async def send_photo(self, bot: Bot, chat_id: int, path: str, **kwargs) -> Message:
+        """
+        Отправка фото по сохранённому file_id или, если его нет, загрузкой файла.
+        Если Telegram отклоняет file_id, запись удаляется и файл загружается заново.
+        Вместо оригинала отправляется уменьшенная копия, подготовленная для Telegram.
+        """
+        path = await ensure_bot_derivative(path)
+        file_id = await self.lookup(path)
+        if file_id:
+            try:
+                message = await bot.send_photo(chat_id=chat_id, photo=file_id, **kwargs)
+                self.reuses += 1
+                return message
+            except TelegramBadRequest as e:
+                if not is_file_id_rejected(e):
+                    raise
+                logger.warning(f"Telegram отклонил file_id для {path}: {e}. Файл будет загружен заново")
+                await self.forget(path)
+        return await self.upload(bot, chat_id, path, **kwargs)
+
+    async def edit_photo(self, bot: Bot, message: Message, path: str, caption: str, **kwargs) -> Message:
+        """
+        Замена фото и подписи в существующем сообщении одним вызовом edit_message_media.
+        Как и send_photo, использует сохранённый file_id и загружает файл только при его отсутствии.
+        """
+        path = await ensure_bot_derivative(path)
+        parse_mode = kwargs.pop("parse_mode", None)
+        file_id = await self.lookup(path)
+        if file_id:
+            try:
+                result = await bot.edit_message_media(
+                    chat_id=message.chat.id,
+                    message_id=message.message_id,
+                    media=InputMediaPhoto(media=file_id, caption=caption, parse_mode=parse_mode),
+                    **kwargs
+                )
+                self.reuses += 1
+                return result
+            except TelegramBadRequest as e:
+                if not is_file_id_rejected(e):
+                    raise
+                logger.warning(f"Telegram отклонил file_id для {path}: {e}. Файл будет загружен заново")
+                await self.forget(path)
+        result = await bot.edit_message_media(
+            chat_id=message.chat.id,
+            message_id=message.message_id,
+            media=InputMediaPhoto(media=FSInputFile(path), caption=caption, parse_mode=parse_mode),
+            **kwargs
+        )
+        self.uploads += 1
+        if isinstance(result, Message) and result.photo:
+            await self.remember(path, result.photo[-1].file_id)
+        return result
+
+    def stats(self) -> Dict[str, int]:
+        """Количество загрузок файлов и повторных отправок по file_id"""
+        return {"uploads": self.uploads, "reuses": self.reuses, "entries": len(self._memory)}
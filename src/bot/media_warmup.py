@@ -0,0 +1,102 @@
+import asyncio
+import logging
+import os
+from typing import Dict, List
+
+from aiogram import Bot
+
+from ..assets.derivatives import ensure_bot_derivative
+from ..assets.registry import asset_registry
+from ..config import MEDIA_WARMUP_CHAT_ID, MEDIA_WARMUP_CONCURRENCY
+from ..data_manager.database import Database
+from .media_cache import MediaCache
+from .middlewares.outbound import bulk_priority
+
+# Постоянные изображения экранов бота, которые не хранятся в базе
+STATIC_BOT_IMAGES = [
+    "src/bot/media/start.png",
+    "src/bot/media/topics.png",
+]
+
+
+async def collect_image_files(db: Database) -> List[str]:
+    """Список существующих файлов изображений каталога и экранов бота без повторов"""
+    files = []
+    seen = set()
+    for image_path in STATIC_BOT_IMAGES + await db.get_all_image_paths():
+        file_path = asset_registry.canonical(image_path)
+        if file_path in seen:
+            continue
+        seen.add(file_path)
+        if asset_registry.info(file_path) is not None:
+            files.append(file_path)
+        else:
+            logging.warning(f"Прогрев медиа: файл {file_path} (из '{image_path}') не найден")
+    return files
+
+
+async def warm_up_media(bot: Bot, media: MediaCache, chat_id: int = MEDIA_WARMUP_CHAT_ID,
+                        concurrency: int = MEDIA_WARMUP_CONCURRENCY) -> Dict[str, int]:
+    """
+    Загрузка всех изображений в служебный чат для заполнения реестра file_id.
+    Уже зарегистрированные файлы пропускаются, одновременно загружается не более concurrency файлов.
+    Отправленные сообщения сразу удаляются: file_id остаётся действительным и после удаления.
+    """
+    files = await collect_image_files(media.db)
+    result = {"total": len(files), "uploaded": 0, "skipped": 0, "failed": 0}
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    done = 0
+
+    logging.info(f"Прогрев медиа: найдено {len(files)} изображений, чат {chat_id}")
+
+    async def warm_up(file_path: str):
+        nonlocal done
+        async with semaphore:
+            try:
+                # Регистрируем то же производное изображение, которое отправляют обработчики
+                file_path = await ensure_bot_derivative(file_path)
+                if await media.lookup(file_path):
+                    result["skipped"] += 1
+                else:
+                    message = await media.upload(bot, chat_id, file_path, disable_notification=True)
+                    result["uploaded"] += 1
+                    try:
+                        await bot.delete_message(chat_id=chat_id, message_id=message.message_id)
+                    except Exception as e:
+                        logging.warning(f"Прогрев медиа: не удалось удалить служебное сообщение: {e}")
+            except Exception as e:
+                result["failed"] += 1
+                logging.error(f"Прогрев медиа: ошибка при загрузке {file_path}: {e}")
+            done += 1
+            logging.info(f"Прогрев медиа: {done}/{len(files)} ({os.path.basename(file_path)})")
+
+    # Прогрев не должен задерживать ответы пользователям
+    with bulk_priority():
+        await asyncio.gather(*(warm_up(file_path) for file_path in files))
+    logging.info(
+        f"Прогрев медиа завершён: загружено {result['uploaded']}, пропущено {result['skipped']}, "
+        f"ошибок {result['failed']} из {result['total']}"
+    )
+    return result
+
+
+async def main():
+    """Запуск прогрева из командной строки: python -m src.bot.media_warmup"""
+    from ..config import BOT_TOKEN
+
+    if MEDIA_WARMUP_CHAT_ID is None:
+        logging.error("Не задан MEDIA_WARMUP_CHAT_ID - служебный чат для загрузки изображений")
+        return
+    bot = Bot(token=BOT_TOKEN)
+    db = Database()
+    await db.init_db()
+    try:
+        await warm_up_media(bot, MediaCache(db))
+    finally:
+        await bot.session.close()
+        await db.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main())
@@ -0,0 +1,74 @@
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Set
+
+from aiogram import BaseMiddleware
+from aiogram.exceptions import TelegramAPIError
+from aiogram.types import CallbackQuery
+
+logger = logging.getLogger(__name__)
+
+
+class EarlyCallbackAnswerMiddleware(BaseMiddleware):
+    """
+    Отвечает на нажатие инлайн-кнопки сразу при получении, параллельно с работой обработчика.
+    Пока ответ не получен, клиент Telegram показывает индикатор загрузки на кнопке,
+    поэтому обработчики больше не вызывают callback.answer() в конце.
+    Собирает статистику: время до ответа на нажатие (то, что видит пользователь) и полное время обработки.
+    """
+
+    def __init__(self):
+        # Ссылки на задачи ответа, чтобы их не удалил сборщик мусора до завершения
+        self._tasks: Set[asyncio.Task] = set()
+        self.answered = 0
+        self.failed = 0
+        self.answer_seconds = 0.0
+        self.handler_seconds = 0.0
+        self.handled = 0
+        self.max_answer_seconds = 0.0
+        self.max_handler_seconds = 0.0
+
+    async def __call__(
+        self,
+        handler: Callable[[CallbackQuery, Dict[str, Any]], Awaitable[Any]],
+        event: CallbackQuery,
+        data: Dict[str, Any],
+    ) -> Any:
+        started = time.monotonic()
+        task = asyncio.create_task(self._answer(event, started))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        try:
+            return await handler(event, data)
+        finally:
+            elapsed = time.monotonic() - started
+            self.handled += 1
+            self.handler_seconds += elapsed
+            self.max_handler_seconds = max(self.max_handler_seconds, elapsed)
+
+    async def _answer(self, event: CallbackQuery, started: float):
+        """Ответ на нажатие без текста, только чтобы убрать индикатор загрузки"""
+        try:
+            await event.answer()
+        except TelegramAPIError as e:
+            # Например, нажатие устарело: обработчик при этом продолжает работу
+            self.failed += 1
+            logger.warning(f"Не удалось ответить на нажатие {event.id}: {e}")
+            return
+        elapsed = time.monotonic() - started
+        self.answered += 1
+        self.answer_seconds += elapsed
+        self.max_answer_seconds = max(self.max_answer_seconds, elapsed)
+
+    def stats(self) -> Dict[str, Any]:
+        """Среднее и максимальное время до ответа на нажатие и до завершения обработчика, в миллисекундах"""
+        return {
+            "answered": self.answered,
+            "failed": self.failed,
+            "handled": self.handled,
+            "avg_answer_ms": self.answer_seconds / self.answered * 1000 if self.answered else 0.0,
+            "max_answer_ms": self.max_answer_seconds * 1000,
+            "avg_handler_ms": self.handler_seconds / self.handled * 1000 if self.handled else 0.0,
+            "max_handler_ms": self.max_handler_seconds * 1000,
+        }
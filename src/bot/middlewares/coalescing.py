@@ -0,0 +1,128 @@
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+from aiogram import BaseMiddleware
+from aiogram.exceptions import TelegramAPIError
+from aiogram.types import CallbackQuery, TelegramObject, Update
+
+from ...config import CALLBACK_BACKLOG_BY_MESSAGE_AGE, CALLBACK_MAX_AGE
+
+logger = logging.getLogger(__name__)
+
+
+class CallbackCoalescer(BaseMiddleware):
+    """
+    Схлопывание повторных нажатий кнопок одного сообщения.
+    Регистрируется дважды:
+    - track - внешний middleware dp.update перед исполнителем обновлений: в момент постановки
+      в очередь запоминает последнее нажатие для каждого сообщения (чат, message_id);
+    - сам объект - внешний middleware dp.callback_query: перед запуском обработчика проверяет,
+      не пришло ли после этого нажатия более новое на том же сообщении.
+    Вытесненные и устаревшие нажатия не доходят до обработчика: на них только отвечают,
+    чтобы убрать индикатор загрузки на кнопке.
+
+    Устаревшими считаются нажатия, ожидавшие в очереди дольше max_age. Нажатия из очереди,
+    накопившейся до перезапуска бота, по умолчанию пропускаются, только если вытеснены:
+    время самого нажатия Telegram не передаёт, а возраст сообщения с кнопкой его не отражает
+    (кнопку могли нажать за секунду до перезапуска на меню, показанном минуту назад).
+    С backlog_by_message_age такие нажатия отбрасываются и по возрасту сообщения.
+    """
+
+    def __init__(self, max_age: float = CALLBACK_MAX_AGE, backlog_by_message_age: bool = CALLBACK_BACKLOG_BY_MESSAGE_AGE):
+        self.max_age = max_age
+        self.backlog_by_message_age = backlog_by_message_age
+        # Последнее поставленное в очередь нажатие (update_id) для каждого сообщения
+        self._latest: Dict[Hashable, int] = {}
+        # Сколько обновлений из очереди, накопившейся до запуска, ещё не получено
+        self._backlog = 0
+        # Метрики
+        self.superseded = 0
+        self.stale = 0
+
+    def mark_backlog(self, pending_update_count: int):
+        """Количество обновлений, ожидавших бота на момент запуска (из getWebhookInfo)"""
+        self._backlog = max(0, pending_update_count)
+        if self._backlog:
+            logger.info(f"При запуске ожидают обработки {self._backlog} обновлений")
+
+    @staticmethod
+    def _message_key(callback: CallbackQuery) -> Optional[Hashable]:
+        if callback.message is not None:
+            return callback.message.chat.id, callback.message.message_id
+        if callback.inline_message_id:
+            return callback.inline_message_id
+        return None
+
+    async def track(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: Update,
+        data: Dict[str, Any],
+    ) -> Any:
+        """Учёт нажатия в момент получения обновления, до постановки в очередь чата"""
+        from_backlog = self._backlog > 0
+        if from_backlog:
+            self._backlog -= 1
+        callback = event.callback_query
+        if callback is not None:
+            key = self._message_key(callback)
+            if key is not None:
+                self._latest[key] = event.update_id
+            data["callback_received_at"] = time.monotonic()
+            data["callback_from_backlog"] = from_backlog
+        return await handler(event, data)
+
+    def _is_stale(self, callback: CallbackQuery, data: Dict[str, Any]) -> bool:
+        received_at = data.get("callback_received_at")
+        if received_at is not None and time.monotonic() - received_at > self.max_age:
+            return True
+        if self.backlog_by_message_age and data.get("callback_from_backlog") and callback.message is not None:
+            message = callback.message
+            shown_at = max(filter(None, [message.date, getattr(message, "edit_date", None)]), default=None)
+            if isinstance(shown_at, datetime):
+                age = (datetime.now(timezone.utc) - shown_at).total_seconds()
+                return age > self.max_age
+        return False
+
+    async def __call__(
+        self,
+        handler: Callable[[CallbackQuery, Dict[str, Any]], Awaitable[Any]],
+        event: CallbackQuery,
+        data: Dict[str, Any],
+    ) -> Any:
+        key = self._message_key(event)
+        update = data.get("event_update")
+        update_id = update.update_id if update is not None else None
+
+        try:
+            if key is not None and update_id is not None and self._latest.get(key, update_id) > update_id:
+                # На этом сообщении уже нажата другая кнопка - её обработчик и покажет итоговый экран
+                self.superseded += 1
+                await self._answer(event)
+                return None
+            if self._is_stale(event, data):
+                self.stale += 1
+                await self._answer(event)
+                return None
+            return await handler(event, data)
+        finally:
+            if key is not None and self._latest.get(key) == update_id:
+                del self._latest[key]
+
+    @staticmethod
+    async def _answer(event: CallbackQuery):
+        """Ответ без запуска обработчика; для старых нажатий Telegram может вернуть ошибку"""
+        try:
+            await event.answer()
+        except TelegramAPIError as e:
+            logger.debug(f"Не удалось ответить на пропущенное нажатие {event.id}: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Количество вытесненных и устаревших нажатий"""
+        return {
+            "superseded": self.superseded,
+            "stale": self.stale,
+            "tracked_messages": len(self._latest),
+        }
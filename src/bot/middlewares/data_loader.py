@@ -0,0 +1,23 @@
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject
+
+from ...data_manager.loader import DataLoader
+
+
+class DataLoaderMiddleware(BaseMiddleware):
+    """
+    Создаёт для каждого обновления свой DataLoader и передаёт его обработчикам как аргумент loader.
+    Данные, прочитанные при обработке одного обновления, не переживают его,
+    поэтому следующий клик всегда видит актуальное состояние каталога.
+    """
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        data["loader"] = DataLoader(data["bot"].db)
+        return await handler(event, data)
@@ -0,0 +1,99 @@
+import time
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware, Bot
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.methods import TelegramMethod
+from aiogram.methods.base import Response, TelegramType
+from aiogram.types import CallbackQuery, Message, TelegramObject
+
+from ...metrics import registry
+from ..keyboards import NavigationCallback
+
+HANDLER_SECONDS = registry.histogram("handler_seconds", "Время работы обработчиков бота", ["handler"])
+HANDLER_ERRORS = registry.counter("handler_errors_total", "Исключения в обработчиках бота", ["handler"])
+HANDLER_IN_FLIGHT = registry.gauge("handler_in_flight", "Обработчики, выполняющиеся в данный момент", ["handler"])
+API_SECONDS = registry.histogram("bot_api_seconds", "Время выполнения запросов к Bot API", ["method"])
+API_ERRORS = registry.counter("bot_api_errors_total", "Ошибки запросов к Bot API", ["method", "error"])
+
+# Значения меток берутся только из этих списков: текст команды и callback-данные присылает пользователь,
+# и без ограничения каждая выдуманная команда или действие создавали бы новый временной ряд.
+# При добавлении обработчика его команду или действие нужно внести сюда, иначе он попадёт в метку other.
+KNOWN_COMMANDS = frozenset({"/start"})
+KNOWN_NAV_ACTIONS = frozenset({
+    "show_main_menu", "main_menu", "about_project", "promotions", "show_promotion_details",
+    "reviews", "support", "catalog", "topics", "show_topic_details",
+    "prev_page_topics", "next_page_topics", "courses", "prev_page_courses", "next_page_courses",
+    "course", "payment",
+})
+# Префиксы callback-данных, кроме NavigationCallback (его действия размечаются отдельно)
+KNOWN_CALLBACK_PREFIXES = frozenset()
+
+
+def handler_label(event: TelegramObject) -> str:
+    """Метка обработчика: действие NavigationCallback, префикс иных callback-данных или команда"""
+    if isinstance(event, CallbackQuery):
+        data = event.data or ""
+        if data.startswith(f"{NavigationCallback.__prefix__}{NavigationCallback.__separator__}"):
+            try:
+                action = NavigationCallback.unpack(data).action
+            except (TypeError, ValueError):
+                return "nav:invalid"
+            return f"nav:{action if action in KNOWN_NAV_ACTIONS else 'other'}"
+        prefix = data.split(':', 1)[0]
+        return f"callback:{prefix if prefix in KNOWN_CALLBACK_PREFIXES else 'other'}"
+    if isinstance(event, Message):
+        if event.text and event.text.startswith("/"):
+            command = event.text.split()[0].split('@')[0]
+            return f"command:{command if command in KNOWN_COMMANDS else 'other'}"
+        return "message"
+    return type(event).__name__.lower()
+
+
+class HandlerMetricsMiddleware(BaseMiddleware):
+    """
+    Время работы, ошибки и количество выполняющихся обработчиков по меткам handler_label.
+    Регистрируется как внешний middleware для callback_query и message.
+    """
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        label = handler_label(event)
+        HANDLER_IN_FLIGHT.inc(label)
+        started = time.perf_counter()
+        try:
+            return await handler(event, data)
+        except Exception:
+            HANDLER_ERRORS.inc(label)
+            raise
+        finally:
+            HANDLER_SECONDS.observe(time.perf_counter() - started, label)
+            HANDLER_IN_FLIGHT.dec(label)
+
+
+class ApiMetricsMiddleware(BaseRequestMiddleware):
+    """
+    Время запросов к Bot API по методам (middleware сессии).
+    Регистрируется после планировщика исходящих запросов, поэтому ожидание
+    в очереди планировщика не входит в измеряемое время.
+    """
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: Bot,
+        method: TelegramMethod[TelegramType],
+    ) -> Response[TelegramType]:
+        name = getattr(method, "__api_method__", type(method).__name__)
+        started = time.perf_counter()
+        try:
+            return await make_request(bot, method)
+        except Exception as e:
+            API_ERRORS.inc(name, type(e).__name__)
+            raise
+        finally:
+            API_SECONDS.observe(time.perf_counter() - started, name)
@@ -0,0 +1,141 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Hashable, List, Optional, Set, Tuple
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject
+
+from ...config import UPDATE_QUEUE_LIMIT, UPDATE_WORKERS
+
+logger = logging.getLogger(__name__)
+
+# Отложенный вызов обработчика и момент постановки в очередь
+QueuedUpdate = Tuple[Callable[[], Awaitable[Any]], float]
+
+
+class ChatOrderedExecutor(BaseMiddleware):
+    """
+    Исполнитель обновлений (внешний middleware для dp.update).
+    Обновления одного чата обрабатываются строго по очереди в порядке поступления,
+    поэтому два быстрых нажатия "Вперёд" не редактируют одно сообщение одновременно.
+    Разные чаты обрабатываются параллельно, не более workers одновременно.
+
+    Middleware только ставит обновление в очередь и сразу возвращает управление, поэтому
+    поллинг запускается с handle_as_tasks=False: порядок постановки совпадает с порядком
+    update_id. Когда в очереди накопилось queue_limit обновлений, постановка ждёт
+    освобождения места, и поллинг (или ответ вебхуку) притормаживает - это обратное давление.
+    """
+
+    def __init__(self, workers: int = UPDATE_WORKERS, queue_limit: int = UPDATE_QUEUE_LIMIT):
+        self.workers = max(1, workers)
+        self.queue_limit = max(1, queue_limit)
+        # Очереди обновлений по чатам; чат присутствует, пока у него есть необработанные обновления
+        self._queues: Dict[Hashable, Deque[QueuedUpdate]] = {}
+        self._ready: Optional[asyncio.Queue] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._worker_tasks: List[asyncio.Task] = []
+        # Метрики
+        self.pending = 0
+        self.max_pending = 0
+        self.processed = 0
+        self.errors = 0
+        self.backpressure_waits = 0
+        self.queue_wait_seconds = 0.0
+        self.max_queue_wait_seconds = 0.0
+        self.handler_seconds = 0.0
+        self.max_handler_seconds = 0.0
+
+    def _ensure_started(self):
+        """Запуск обработчиков в текущем цикле событий при первом обновлении"""
+        if self._worker_tasks:
+            return
+        self._ready = asyncio.Queue()
+        self._slots = asyncio.Semaphore(self.queue_limit)
+        self._worker_tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    @staticmethod
+    def _chat_key(event: TelegramObject, data: Dict[str, Any]) -> Hashable:
+        """Ключ очереди: чат события, пользователь или (для прочих обновлений) само обновление"""
+        chat = data.get("event_chat")
+        if chat is not None:
+            return chat.id
+        user = data.get("event_from_user")
+        if user is not None:
+            return ("user", user.id)
+        return ("update", getattr(event, "update_id", id(event)))
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        self._ensure_started()
+        if self._slots.locked():
+            self.backpressure_waits += 1
+        await self._slots.acquire()
+
+        self.pending += 1
+        self.max_pending = max(self.max_pending, self.pending)
+        key = self._chat_key(event, data)
+        queue = self._queues.get(key)
+        if queue is None:
+            # У чата нет необработанных обновлений - он становится в очередь к обработчикам
+            queue = self._queues[key] = deque()
+            self._ready.put_nowait(key)
+        queue.append((lambda: handler(event, data), time.monotonic()))
+        return None
+
+    async def _worker(self):
+        """Обработчик: берёт готовый чат и выполняет его обновления по одному"""
+        while True:
+            key = await self._ready.get()
+            queue = self._queues[key]
+            call, enqueued = queue[0]
+            started = time.monotonic()
+            waited = started - enqueued
+            self.queue_wait_seconds += waited
+            self.max_queue_wait_seconds = max(self.max_queue_wait_seconds, waited)
+            try:
+                await call()
+            except Exception as e:
+                self.errors += 1
+                logger.exception(f"Ошибка при обработке обновления чата {key}: {e}")
+            finally:
+                elapsed = time.monotonic() - started
+                self.processed += 1
+                self.handler_seconds += elapsed
+                self.max_handler_seconds = max(self.max_handler_seconds, elapsed)
+                self.pending -= 1
+                self._slots.release()
+                queue.popleft()
+                if queue:
+                    # Следующее обновление чата - в конец общей очереди, чтобы не задерживать другие чаты
+                    self._ready.put_nowait(key)
+                else:
+                    del self._queues[key]
+
+    async def stop(self):
+        """Остановка обработчиков (необработанные обновления отбрасываются)"""
+        for task in self._worker_tasks:
+            task.cancel()
+        await asyncio.gather(*self._worker_tasks, return_exceptions=True)
+        self._worker_tasks = []
+
+    def stats(self) -> Dict[str, Any]:
+        """Глубина очереди, время ожидания в очереди и время работы обработчиков"""
+        processed = self.processed
+        return {
+            "pending": self.pending,
+            "max_pending": self.max_pending,
+            "active_chats": len(self._queues),
+            "processed": processed,
+            "errors": self.errors,
+            "backpressure_waits": self.backpressure_waits,
+            "avg_queue_wait_ms": self.queue_wait_seconds / processed * 1000 if processed else 0.0,
+            "max_queue_wait_ms": self.max_queue_wait_seconds * 1000,
+            "avg_handler_ms": self.handler_seconds / processed * 1000 if processed else 0.0,
+            "max_handler_ms": self.max_handler_seconds * 1000,
+        }
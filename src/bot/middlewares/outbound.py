@@ -0,0 +1,240 @@
+import asyncio
+import bisect
+import itertools
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional, Tuple
+
+from aiogram import Bot
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import TelegramMethod
+from aiogram.methods.base import Response, TelegramType
+
+from ...config import (
+    OUTBOUND_CHAT_BURST,
+    OUTBOUND_CHAT_RATE,
+    OUTBOUND_GLOBAL_BURST,
+    OUTBOUND_GLOBAL_RATE,
+    OUTBOUND_MAX_RETRIES,
+)
+
+logger = logging.getLogger(__name__)
+
+# Полосы приоритета: ответы пользователям обслуживаются раньше массовых рассылок
+INTERACTIVE = 0
+BULK = 1
+LANE_NAMES = {INTERACTIVE: "interactive", BULK: "bulk"}
+
+outbound_priority: ContextVar[int] = ContextVar("outbound_priority", default=INTERACTIVE)
+
+# Лимит сообщений в чат относится только к запросам, создающим новые сообщения (send*, кроме sendChatAction);
+# правка и удаление сообщений ограничиваются только общим ведром
+CHAT_LIMITED_METHODS = frozenset({"copyMessage", "copyMessages", "forwardMessage", "forwardMessages"})
+
+
+def is_chat_limited(method: TelegramMethod) -> bool:
+    """Запрос создаёт сообщение в чате и подпадает под лимит сообщений в конкретный чат"""
+    name = getattr(method, "__api_method__", "")
+    return name in CHAT_LIMITED_METHODS or (name.startswith("send") and name != "sendChatAction")
+
+
+@contextmanager
+def bulk_priority():
+    """Пометка запросов, отправленных внутри блока, как массовых (низкий приоритет)"""
+    token = outbound_priority.set(BULK)
+    try:
+        yield
+    finally:
+        outbound_priority.reset(token)
+
+
+class TokenBucket:
+    """Ведро токенов: rate токенов в секунду, не более burst накопленных"""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        # Момент, до которого запросы запрещены после ответа 429
+        self.blocked_until = 0.0
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self, now: float) -> float:
+        """Сколько секунд ждать до появления токена"""
+        if now < self.blocked_until:
+            return self.blocked_until - now
+        self._refill(now)
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def consume(self, now: float):
+        self._refill(now)
+        self.tokens -= 1
+
+    def block(self, seconds: float):
+        """Запрет запросов на время, указанное Telegram в ответе 429"""
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+    def is_idle(self, now: float) -> bool:
+        """Ведро полное и не заблокировано - его можно удалить без потери состояния"""
+        self._refill(now)
+        return self.tokens >= self.capacity and now >= self.blocked_until
+
+
+class OutboundScheduler(BaseRequestMiddleware):
+    """
+    Планировщик исходящих запросов к Bot API (middleware сессии aiogram).
+    Запросы, адресованные чату, проходят через общее ведро токенов (~30 сообщений в секунду),
+    а отправка сообщений (is_chat_limited) - ещё и через ведро конкретного чата
+    (~1 сообщение в секунду со всплеском). Ожидающие запросы
+    обслуживаются по приоритету: интерактивные ответы раньше массовых, при этом запрос
+    в заблокированный чат не задерживает запросы в другие чаты.
+    Ответ 429 (RetryAfter) блокирует ведро чата на указанное время (для правки и удаления
+    ждёт только сам запрос), и запрос повторяется автоматически.
+    Запросы без chat_id (getUpdates, answerCallbackQuery) не ограничиваются.
+    """
+
+    # При таком количестве вёдер чатов неактивные удаляются
+    MAX_IDLE_BUCKETS = 10000
+
+    def __init__(self, global_rate: float = OUTBOUND_GLOBAL_RATE, global_burst: int = OUTBOUND_GLOBAL_BURST,
+                 chat_rate: float = OUTBOUND_CHAT_RATE, chat_burst: int = OUTBOUND_CHAT_BURST,
+                 max_retries: int = OUTBOUND_MAX_RETRIES):
+        self.global_bucket = TokenBucket(global_rate, global_burst)
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.max_retries = max_retries
+        self._chat_buckets: Dict[Any, TokenBucket] = {}
+        # Ожидающие запросы, упорядоченные по (приоритет, порядок поступления)
+        self._waiters: List[Tuple[int, int, Any, asyncio.Future]] = []
+        self._sequence = itertools.count()
+        self._changed: Optional[asyncio.Event] = None
+        self._dispatcher: Optional[asyncio.Task] = None
+        # Метрики
+        self.max_queue_depth = 0
+        self.granted = {lane: 0 for lane in LANE_NAMES}
+        self.wait_seconds = {lane: 0.0 for lane in LANE_NAMES}
+        self.max_wait_seconds = {lane: 0.0 for lane in LANE_NAMES}
+        self.retry_after = 0
+
+    def _chat_bucket(self, chat_id) -> TokenBucket:
+        bucket = self._chat_buckets.get(chat_id)
+        if bucket is None:
+            if len(self._chat_buckets) >= self.MAX_IDLE_BUCKETS:
+                now = time.monotonic()
+                for idle_chat_id in [key for key, value in self._chat_buckets.items() if value.is_idle(now)]:
+                    del self._chat_buckets[idle_chat_id]
+            bucket = TokenBucket(self.chat_rate, self.chat_burst)
+            self._chat_buckets[chat_id] = bucket
+        return bucket
+
+    async def _acquire(self, chat_id, priority: int):
+        """Ожидание разрешения на отправку запроса в чат (chat_id None - только общее ведро)"""
+        loop = asyncio.get_running_loop()
+        if self._dispatcher is None or self._dispatcher.done():
+            self._changed = asyncio.Event()
+            self._dispatcher = loop.create_task(self._dispatch())
+        future = loop.create_future()
+        bisect.insort(self._waiters, (priority, next(self._sequence), chat_id, future), key=lambda item: item[:2])
+        self.max_queue_depth = max(self.max_queue_depth, len(self._waiters))
+        self._changed.set()
+        enqueued = time.monotonic()
+        try:
+            await future
+        except asyncio.CancelledError:
+            self._waiters = [waiter for waiter in self._waiters if waiter[3] is not future]
+            raise
+        waited = time.monotonic() - enqueued
+        self.granted[priority] += 1
+        self.wait_seconds[priority] += waited
+        self.max_wait_seconds[priority] = max(self.max_wait_seconds[priority], waited)
+
+    async def _dispatch(self):
+        """Выдача разрешений ожидающим запросам с учётом приоритета и вёдер токенов"""
+        while True:
+            self._changed.clear()
+            now = time.monotonic()
+            delay = self.global_bucket.delay(now)
+            if delay == 0 and self._waiters:
+                delay = None
+                for index, (_, _, chat_id, future) in enumerate(self._waiters):
+                    chat_delay = self._chat_bucket(chat_id).delay(now) if chat_id is not None else 0.0
+                    if chat_delay == 0:
+                        del self._waiters[index]
+                        self.global_bucket.consume(now)
+                        if chat_id is not None:
+                            self._chat_bucket(chat_id).consume(now)
+                        if not future.done():
+                            future.set_result(None)
+                        break
+                    delay = chat_delay if delay is None else min(delay, chat_delay)
+                else:
+                    # Все ожидающие чаты исчерпали лимит - ждём ближайшего освобождения
+                    await self._wait(delay)
+                continue
+            if not self._waiters:
+                await self._wait(None)
+            else:
+                await self._wait(delay)
+
+    async def _wait(self, timeout: Optional[float]):
+        """Ожидание нового запроса или истечения таймаута"""
+        try:
+            await asyncio.wait_for(self._changed.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: Bot,
+        method: TelegramMethod[TelegramType],
+    ) -> Response[TelegramType]:
+        chat_id = getattr(method, "chat_id", None)
+        if chat_id is None:
+            return await make_request(bot, method)
+
+        chat_limited = is_chat_limited(method)
+        priority = outbound_priority.get()
+        attempt = 0
+        while True:
+            await self._acquire(chat_id if chat_limited else None, priority)
+            try:
+                return await make_request(bot, method)
+            except TelegramRetryAfter as e:
+                attempt += 1
+                self.retry_after += 1
+                if chat_limited:
+                    # Блокируем только чат: остальные пользователи продолжают получать ответы
+                    self._chat_bucket(chat_id).block(e.retry_after)
+                    if self._changed is not None:
+                        self._changed.set()
+                if attempt > self.max_retries:
+                    raise
+                logger.warning(f"Telegram ограничил отправку в чат {chat_id} на {e.retry_after} с, повтор {attempt}/{self.max_retries}")
+                if not chat_limited:
+                    # Правка или удаление: ждёт только этот запрос, ведро чата не затрагивается
+                    await asyncio.sleep(e.retry_after)
+
+    def stats(self) -> Dict[str, Any]:
+        """Глубина очереди, время ожидания по полосам приоритета и количество ответов 429"""
+        result = {
+            "queued": len(self._waiters),
+            "max_queue_depth": self.max_queue_depth,
+            "chat_buckets": len(self._chat_buckets),
+            "retry_after": self.retry_after,
+        }
+        for lane, name in LANE_NAMES.items():
+            granted = self.granted[lane]
+            result[f"{name}_granted"] = granted
+            result[f"{name}_avg_wait_ms"] = self.wait_seconds[lane] / granted * 1000 if granted else 0.0
+            result[f"{name}_max_wait_ms"] = self.max_wait_seconds[lane] * 1000
+        return result
@@ -0,0 +1,57 @@
+import asyncio
+import logging
+from typing import Optional
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.types import InlineKeyboardMarkup, Message
+
+logger = logging.getLogger(__name__)
+
+
+def is_not_modified(error: TelegramBadRequest) -> bool:
+    """Telegram отвечает ошибкой, если новое содержимое совпадает с текущим"""
+    return "message is not modified" in str(error).lower()
+
+
+async def delete_quietly(message: Message):
+    """Удаление сообщения; ошибка (например, сообщение уже удалено) только записывается в журнал"""
+    try:
+        await message.delete()
+    except TelegramBadRequest as e:
+        logger.warning(f"Не удалось удалить сообщение {message.message_id}: {e}")
+
+
+async def show_screen(bot: Bot, message: Message, text: str, reply_markup: Optional[InlineKeyboardMarkup] = None,
+                      photo_path: Optional[str] = None, parse_mode: Optional[str] = "HTML") -> Message:
+    """
+    Показ экрана на месте сообщения, из которого пришло нажатие.
+    Фото сменяется фото через edit_message_media, текст - текстом через edit_message_text, то есть одним вызовом API.
+    Сообщение удаляется и отправляется заново, только если меняется его тип (фото <-> текст)
+    или Telegram отклонил редактирование.
+
+    :param message: Сообщение, которое нужно заменить новым экраном
+    :param text: Текст экрана (подпись, если указано фото)
+    :param photo_path: Путь к файлу изображения или None для текстового экрана
+    :return: Сообщение с новым экраном
+    """
+    try:
+        if photo_path and message.photo:
+            return await bot.media.edit_photo(bot, message, photo_path, caption=text,
+                                              reply_markup=reply_markup, parse_mode=parse_mode)
+        if not photo_path and message.text is not None:
+            return await bot.edit_message_text(chat_id=message.chat.id, message_id=message.message_id, text=text,
+                                               reply_markup=reply_markup, parse_mode=parse_mode)
+    except TelegramBadRequest as e:
+        if is_not_modified(e):
+            return message
+        logger.warning(f"Не удалось отредактировать сообщение {message.message_id}, будет отправлено новое: {e}")
+
+    # Удаление старого сообщения и отправка нового не зависят друг от друга, поэтому выполняются параллельно
+    if photo_path:
+        send = bot.media.send_photo(bot, chat_id=message.chat.id, path=photo_path, caption=text,
+                                    reply_markup=reply_markup, parse_mode=parse_mode)
+    else:
+        send = bot.send_message(chat_id=message.chat.id, text=text, reply_markup=reply_markup, parse_mode=parse_mode)
+    _, sent = await asyncio.gather(delete_quietly(message), send)
+    return sent
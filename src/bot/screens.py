@@ -0,0 +1,158 @@
+import datetime
+import threading
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
+
+from aiogram.types import InlineKeyboardMarkup
+
+from ..config import SCREEN_CACHE_MAX_ENTRIES
+from ..data_manager.database import Database
+from ..data_manager.events import ChangeEvent, invalidation_bus
+from ..data_manager.topic_tree import TopicTree
+from .keyboards import (
+    course_keyboard,
+    courses_keyboard,
+    get_payment_keyboard,
+    get_promotion_keyboard,
+    topics_keyboard,
+)
+
+# Готовый экран: текст сообщения и клавиатура
+Screen = Tuple[str, InlineKeyboardMarkup]
+
+TOPICS_TEXT = "Здесь представлен список всех наших когда-либо созданных цифровых продуктов, мы разбили на категории для удобства. Выбирайте что вам по душе:"
+
+
+class ScreenCache:
+    """
+    Кэш готовых экранов бота (текст и клавиатура).
+    Сборка клавиатуры упаковывает NavigationCallback через pydantic для каждой кнопки,
+    поэтому экраны собираются один раз и переиспользуются до изменения каталога.
+    Версия каталога увеличивается по каждому событию шины изменений, и кэш целиком сбрасывается.
+    Ключи содержат номер страницы и ID из callback-данных, которые может подделать пользователь,
+    поэтому размер кэша ограничен max_entries: при переполнении вытесняется давно не использованный экран.
+    """
+
+    def __init__(self, max_entries: int = SCREEN_CACHE_MAX_ENTRIES):
+        self._screens: "OrderedDict[Hashable, Screen]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.max_entries = max_entries
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def handle_event(self, event: ChangeEvent):
+        """Сброс экранов при любом изменении каталога"""
+        self.invalidate()
+
+    def invalidate(self):
+        """Сброс всех экранов; экраны, собираемые в этот момент, не будут сохранены"""
+        with self._lock:
+            self.version += 1
+            self._screens.clear()
+
+    async def get_or_render(self, key: Hashable, render: Callable[[], Awaitable[Screen]]) -> Screen:
+        """Получение экрана из кэша или его сборка"""
+        with self._lock:
+            screen = self._screens.get(key)
+            if screen is not None:
+                self._screens.move_to_end(key)
+                self.hits += 1
+                return screen
+            self.misses += 1
+            version = self.version
+        screen = await render()
+        with self._lock:
+            # Экран, собранный до изменения каталога, мог устареть - не сохраняем его
+            if self.version == version:
+                self._screens[key] = screen
+                self._screens.move_to_end(key)
+                while len(self._screens) > self.max_entries:
+                    self._screens.popitem(last=False)
+                    self.evictions += 1
+        return screen
+
+    def stats(self) -> Dict[str, Any]:
+        """Счётчики попаданий, промахов и вытеснений кэша экранов"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "entries": len(self._screens),
+                "evictions": self.evictions,
+                "version": self.version,
+            }
+
+
+# Кэш экранов один на процесс и сбрасывается по событиям шины изменений каталога
+screen_cache = ScreenCache()
+invalidation_bus.subscribe(screen_cache.handle_event)
+
+
+async def render_topics_page(topics: List[Tuple], page: int) -> Screen:
+    """Экран списка тем"""
+    return TOPICS_TEXT, topics_keyboard(topics, page)
+
+
+async def render_courses_page(db: Database, courses: List[Tuple], topic_id: int, page: int) -> Screen:
+    """Экран списка курсов темы"""
+    topic = await db.get_topic_by_id(topic_id)
+    topic_name = (topic[1] if topic and topic[1] else "Неизвестная тема").strip()
+    if not topic_name:
+        topic_name = "Неизвестная тема"
+    return f"Товары в теме '{topic_name}':", courses_keyboard(courses, topic_id=topic_id, page=page)
+
+
+async def render_topic_details(db: Database, topic_id: int, topic_name: str) -> Screen:
+    """Экран темы с первой страницей её курсов"""
+    topic_info = f"📚 <b>{topic_name}</b>\n\nВыберите курс в этой теме:"
+    return topic_info, courses_keyboard(await db.get_courses_by_topic(topic_id), topic_id=topic_id, page=0)
+
+
+async def render_course_details(course_id: int, course_name: str, description: str, price: float,
+                                topic_id: Optional[int], payment_link: Optional[str], topic_tree: TopicTree) -> Screen:
+    """Экран курса"""
+    course_info = (
+        f"📚 <b>{course_name}</b>\n\n"
+        f"{description}\n\n"
+        f"<b>Цена:</b> {price} руб."
+    )
+    if payment_link:
+        reply_markup = get_payment_keyboard(payment_link)
+    else:
+        reply_markup = course_keyboard(course_id, topic_id, topic_tree)
+    return course_info, reply_markup
+
+
+async def render_promotion_details(promotion: Tuple) -> Screen:
+    """Экран акции"""
+    promo_id, name, description, course_link, discounted_price, start_date_str, end_date_str, image_path, is_period_enabled, is_price_enabled = promotion
+
+    # Форматирование дат с обработкой None значений
+    if start_date_str is None:
+        start_date = "Дата не указана"
+    else:
+        start_date = datetime.datetime.strptime(start_date_str, '%Y-%m-%d').strftime('%d.%m.%Y')
+
+    if end_date_str is None:
+        end_date = "Дата не указана"
+    else:
+        end_date = datetime.datetime.strptime(end_date_str, '%Y-%m-%d').strftime('%d.%m.%Y')
+
+    promo_text = f"✨ <b>{name}</b>\n\n{description}\n\n"
+
+    # Добавляем цену со скидкой, если она включена и не равна None
+    if is_price_enabled and discounted_price is not None:
+        promo_text += f"💰 Цена по акции: {discounted_price} руб.\n"
+
+    # Добавляем период действия, если он включен и даты не равны None
+    if is_period_enabled and start_date_str is not None and end_date_str is not None:
+        promo_text += f"🗓️ Период действия: с {start_date} по {end_date}"
+
+    # Убираем лишний символ новой строки в конце, если он есть
+    promo_text = promo_text.rstrip('\n')
+
+    return promo_text, get_promotion_keyboard(course_link)
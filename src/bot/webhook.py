@@ -0,0 +1,180 @@
+import asyncio
+import hmac
+import logging
+import secrets
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from aiogram import Bot, Dispatcher
+from aiogram.types import Update
+
+from ..config import (
+    WEBHOOK_BASE_URL,
+    WEBHOOK_DEDUP_SIZE,
+    WEBHOOK_HOST,
+    WEBHOOK_PATH,
+    WEBHOOK_PORT,
+    WEBHOOK_SECRET,
+    WEBHOOK_SERVER,
+)
+from ..metrics import registry
+
+logger = logging.getLogger(__name__)
+
+# Заголовок, в котором Telegram передаёт секрет, указанный в setWebhook
+SECRET_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+
+
+class UpdateDeduplicator:
+    """
+    Последние полученные update_id (LRU).
+    Telegram повторяет доставку, если не получил ответ вовремя, и одно обновление
+    может прийти дважды - повтор отбрасывается, чтобы обработчик не сработал второй раз.
+    """
+
+    def __init__(self, maxsize: int = WEBHOOK_DEDUP_SIZE):
+        self.maxsize = max(1, maxsize)
+        self._seen: "OrderedDict[int, None]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def is_duplicate(self, update_id: int) -> bool:
+        """Проверка и запоминание update_id"""
+        with self._lock:
+            if update_id in self._seen:
+                self._seen.move_to_end(update_id)
+                return True
+            self._seen[update_id] = None
+            if len(self._seen) > self.maxsize:
+                self._seen.popitem(last=False)
+            return False
+
+
+class WebhookReceiver:
+    """
+    Приём обновлений через вебхук и передача их в тот же Dispatcher, что и при поллинге.
+    Создаётся в цикле событий бота; HTTP-сервер может работать в другом потоке
+    (приложение FastAPI) - тогда обновления передаются в цикл бота через submit.
+    Ответ Telegram отправляется после постановки обновления в очередь исполнителя обновлений.
+    """
+
+    def __init__(self, bot: Bot, dp: Dispatcher, secret: str = WEBHOOK_SECRET, dedup_size: int = WEBHOOK_DEDUP_SIZE):
+        self.bot = bot
+        self.dp = dp
+        self.secret = secret
+        self.loop = asyncio.get_running_loop()
+        self.dedup = UpdateDeduplicator(dedup_size)
+        # Метрики
+        self.received = 0
+        self.duplicates = 0
+        self.rejected = 0
+
+    def check_secret(self, token: Optional[str]) -> bool:
+        """Проверка секрета из заголовка запроса (сравнение за постоянное время)"""
+        if not self.secret:
+            return True
+        if token is None or not hmac.compare_digest(token, self.secret):
+            self.rejected += 1
+            return False
+        return True
+
+    async def feed(self, payload: Dict[str, Any]) -> bool:
+        """Постановка обновления в обработку (в цикле бота); False для повторной доставки"""
+        update = Update.model_validate(payload, context={"bot": self.bot})
+        if self.dedup.is_duplicate(update.update_id):
+            self.duplicates += 1
+            logger.info(f"Повторная доставка обновления {update.update_id} пропущена")
+            return False
+        self.received += 1
+        # Исполнитель обновлений только ставит обновление в очередь чата, поэтому ожидание
+        # здесь короткое и затягивается лишь при переполнении очереди (обратное давление)
+        await self.dp.feed_update(self.bot, update)
+        return True
+
+    async def submit(self, payload: Dict[str, Any]) -> bool:
+        """Передача обновления из любого цикла событий (например, из потока веб-сервера)"""
+        if asyncio.get_running_loop() is self.loop:
+            return await self.feed(payload)
+        future = asyncio.run_coroutine_threadsafe(self.feed(payload), self.loop)
+        return await asyncio.wrap_future(future)
+
+    def stats(self) -> Dict[str, Any]:
+        """Количество принятых, повторных и отклонённых по секрету обновлений"""
+        return {
+            "received": self.received,
+            "duplicates": self.duplicates,
+            "rejected": self.rejected,
+        }
+
+
+# Приёмник, к которому обращается маршрут вебхука в приложении FastAPI
+_receiver: Optional[WebhookReceiver] = None
+
+
+def get_receiver() -> Optional[WebhookReceiver]:
+    return _receiver
+
+
+async def serve_aiohttp(receiver: WebhookReceiver, host: str = WEBHOOK_HOST, port: int = WEBHOOK_PORT, path: str = WEBHOOK_PATH):
+    """Отдельный сервер aiohttp для вебхука в цикле событий бота (работает до отмены)"""
+    from aiohttp import web
+
+    async def handle(request: web.Request) -> web.Response:
+        if not receiver.check_secret(request.headers.get(SECRET_HEADER)):
+            return web.Response(status=401)
+        try:
+            await receiver.feed(await request.json())
+        except ValueError as e:
+            logger.warning(f"Некорректное обновление в вебхуке: {e}")
+            return web.Response(status=400)
+        return web.Response()
+
+    app = web.Application()
+    app.router.add_post(path, handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    logger.info(f"Вебхук принимается на http://{host}:{port}{path}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()
+
+
+async def run_webhook(bot: Bot, dp: Dispatcher):
+    """
+    Работа бота в режиме вебхука: регистрация адреса в Telegram и приём обновлений
+    в приложении FastAPI или в отдельном сервере aiohttp (WEBHOOK_SERVER).
+    """
+    global _receiver
+
+    if not WEBHOOK_BASE_URL:
+        raise RuntimeError("Для режима webhook необходимо задать WEBHOOK_BASE_URL")
+    secret = WEBHOOK_SECRET
+    if not secret:
+        # Без общего секрета несколько процессов бота не смогут проверять запросы друг друга
+        secret = secrets.token_urlsafe(32)
+        logger.warning("WEBHOOK_SECRET не задан - используется случайный секрет, действующий до перезапуска")
+
+    receiver = WebhookReceiver(bot, dp, secret=secret)
+    bot.webhook = receiver
+    registry.register_collector("webhook", receiver.stats)
+    await dp.emit_startup(bot=bot)
+    await bot.set_webhook(
+        url=WEBHOOK_BASE_URL.rstrip("/") + WEBHOOK_PATH,
+        secret_token=secret,
+        allowed_updates=dp.resolve_used_update_types(),
+    )
+    logger.info(f"Вебхук зарегистрирован: {WEBHOOK_BASE_URL.rstrip('/')}{WEBHOOK_PATH}")
+
+    try:
+        if WEBHOOK_SERVER == "aiohttp":
+            await serve_aiohttp(receiver)
+        else:
+            # Маршрут в приложении FastAPI передаёт обновления через get_receiver()
+            _receiver = receiver
+            await asyncio.Event().wait()
+    finally:
+        _receiver = None
+        await dp.emit_shutdown(bot=bot)
+        await bot.session.close()
@@ -5,4 +5,94 @@ load_dotenv()
 
 BOT_TOKEN = os.getenv("BOT_TOKEN")
 DB_PATH = os.getenv("DB_PATH", "data/shop.db")
-PAYMENT_PROVIDER_TOKEN = os.getenv("PAYMENT_PROVIDER_TOKEN")
\ No newline at end of file
+PAYMENT_PROVIDER_TOKEN = os.getenv("PAYMENT_PROVIDER_TOKEN")
+
+# Количество долгоживущих соединений на чтение в пуле базы данных
+DB_POOL_READERS = int(os.getenv("DB_POOL_READERS", "4"))
+
+# Групповая фиксация записей: максимальный размер пачки и окно ожидания в миллисекундах
+DB_WRITE_BATCH_SIZE = int(os.getenv("DB_WRITE_BATCH_SIZE", "64"))
+DB_WRITE_WINDOW_MS = float(os.getenv("DB_WRITE_WINDOW_MS", "5"))
+
+# Профиль настроек SQLite: "durable", "balanced" или "throughput"
+DB_PRAGMA_PROFILE = os.getenv("DB_PRAGMA_PROFILE", "balanced")
+
+# Предварительная загрузка изображений каталога в служебный чат для получения file_id
+MEDIA_WARMUP_CHAT_ID = int(os.getenv("MEDIA_WARMUP_CHAT_ID")) if os.getenv("MEDIA_WARMUP_CHAT_ID") else None
+MEDIA_WARMUP_CONCURRENCY = int(os.getenv("MEDIA_WARMUP_CONCURRENCY", "3"))
+MEDIA_WARMUP_ON_START = os.getenv("MEDIA_WARMUP_ON_START", "false").lower() in ("1", "true", "yes")
+
+# Каталог производных изображений (уменьшенные копии для бота, миниатюры для админки)
+MEDIA_CACHE_DIR = os.getenv("MEDIA_CACHE_DIR", "data/media_cache")
+# Производные изображения для отправки в Telegram: наибольшая сторона и качество JPEG
+BOT_IMAGE_MAX_SIDE = int(os.getenv("BOT_IMAGE_MAX_SIDE", "1280"))
+BOT_IMAGE_QUALITY = int(os.getenv("BOT_IMAGE_QUALITY", "85"))
+# Количество процессов для обработки изображений
+MEDIA_WORKERS = int(os.getenv("MEDIA_WORKERS", "2"))
+# Миниатюры для админ-панели: допустимые ширины (через запятую) и качество JPEG
+THUMBNAIL_WIDTHS = [int(width) for width in os.getenv("THUMBNAIL_WIDTHS", "100,200,400").split(",")]
+THUMBNAIL_QUALITY = int(os.getenv("THUMBNAIL_QUALITY", "80"))
+
+# Ограничение исходящих запросов к Bot API (сообщений в секунду и размер всплеска)
+OUTBOUND_GLOBAL_RATE = float(os.getenv("OUTBOUND_GLOBAL_RATE", "30"))
+OUTBOUND_GLOBAL_BURST = int(os.getenv("OUTBOUND_GLOBAL_BURST", "30"))
+OUTBOUND_CHAT_RATE = float(os.getenv("OUTBOUND_CHAT_RATE", "1"))
+OUTBOUND_CHAT_BURST = int(os.getenv("OUTBOUND_CHAT_BURST", "3"))
+# Сколько раз повторять запрос после ответа 429 (RetryAfter)
+OUTBOUND_MAX_RETRIES = int(os.getenv("OUTBOUND_MAX_RETRIES", "3"))
+
+# Рассылки акций: размер порции получателей, параллельных отправок и интервал проверки новых рассылок (с)
+BROADCAST_CHUNK_SIZE = int(os.getenv("BROADCAST_CHUNK_SIZE", "50"))
+BROADCAST_CONCURRENCY = int(os.getenv("BROADCAST_CONCURRENCY", "10"))
+BROADCAST_POLL_INTERVAL = float(os.getenv("BROADCAST_POLL_INTERVAL", "5"))
+
+# Режим получения обновлений: "polling" (long polling) или "webhook"
+BOT_RUN_MODE = os.getenv("BOT_RUN_MODE", "polling").lower()
+# Публичный адрес сервера (без пути) и путь, на который Telegram отправляет обновления
+WEBHOOK_BASE_URL = os.getenv("WEBHOOK_BASE_URL", "")
+WEBHOOK_PATH = os.getenv("WEBHOOK_PATH", "/telegram/webhook")
+# Секрет, который Telegram передаёт в заголовке X-Telegram-Bot-Api-Secret-Token
+WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET", "")
+# Где принимать вебхук: "fastapi" (в приложении админ-панели) или "aiohttp" (отдельный сервер)
+WEBHOOK_SERVER = os.getenv("WEBHOOK_SERVER", "fastapi").lower()
+WEBHOOK_HOST = os.getenv("WEBHOOK_HOST", "127.0.0.1")
+WEBHOOK_PORT = int(os.getenv("WEBHOOK_PORT", "8080"))
+# Сколько последних update_id помнить для отбрасывания повторных доставок
+WEBHOOK_DEDUP_SIZE = int(os.getenv("WEBHOOK_DEDUP_SIZE", "10000"))
+# Адрес Bot API (локальный сервер Bot API или тестовая заглушка); по умолчанию api.telegram.org
+BOT_API_BASE = os.getenv("BOT_API_BASE", "")
+
+# Обработка обновлений: параллельных обработчиков (по разным чатам) и предел очереди
+UPDATE_WORKERS = int(os.getenv("UPDATE_WORKERS", "8"))
+UPDATE_QUEUE_LIMIT = int(os.getenv("UPDATE_QUEUE_LIMIT", "1000"))
+
+# Нажатия кнопок старше этого возраста (с) отбрасываются без запуска обработчика
+CALLBACK_MAX_AGE = float(os.getenv("CALLBACK_MAX_AGE", "30"))
+# Отбрасывать нажатия, накопившиеся до запуска бота, если сообщение с кнопкой старше CALLBACK_MAX_AGE
+# (время нажатия неизвестно, поэтому можно потерять свежее нажатие на старом меню)
+CALLBACK_BACKLOG_BY_MESSAGE_AGE = os.getenv("CALLBACK_BACKLOG_BY_MESSAGE_AGE", "false").lower() in ("1", "true", "yes")
+
+# Загрузка изображений в админ-панели: максимальный размер файла и размер блока копирования (байт)
+UPLOAD_MAX_BYTES = int(os.getenv("UPLOAD_MAX_BYTES", str(10 * 1024 * 1024)))
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", str(1024 * 1024)))
+
+# Уборка изображений без ссылок из каталога: интервал проходов (с), возраст файла, после которого
+# он считается брошенным, и срок хранения в карантине перед удалением (с)
+IMAGE_GC_INTERVAL = float(os.getenv("IMAGE_GC_INTERVAL", str(6 * 60 * 60)))
+IMAGE_GC_GRACE_SECONDS = float(os.getenv("IMAGE_GC_GRACE_SECONDS", str(24 * 60 * 60)))
+IMAGE_GC_RETENTION_SECONDS = float(os.getenv("IMAGE_GC_RETENTION_SECONDS", str(7 * 24 * 60 * 60)))
+IMAGE_GC_QUARANTINE_DIR = os.getenv("IMAGE_GC_QUARANTINE_DIR", "data/image_quarantine")
+# Не более стольких файловых операций уборки в секунду
+IMAGE_GC_OPS_PER_SECOND = float(os.getenv("IMAGE_GC_OPS_PER_SECOND", "20"))
+# Пробный режим: только отчёт в логе, файлы не переносятся и не удаляются
+IMAGE_GC_DRY_RUN = os.getenv("IMAGE_GC_DRY_RUN", "false").lower() in ("1", "true", "yes")
+
+# Сведения о файлах изображений (существование, размер, время изменения) перепроверяются не реже раза в столько секунд
+ASSET_STAT_TTL = float(os.getenv("ASSET_STAT_TTL", "60"))
+
+# Доступ к /metrics: адреса клиентов (через запятую) и необязательный токен (Authorization: Bearer ...)
+METRICS_ALLOWED_HOSTS = [host.strip() for host in os.getenv("METRICS_ALLOWED_HOSTS", "127.0.0.1,::1").split(",") if host.strip()]
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+
+# Не более стольких готовых экранов бота в памяти; при переполнении вытесняются давно не использованные
+SCREEN_CACHE_MAX_ENTRIES = int(os.getenv("SCREEN_CACHE_MAX_ENTRIES", "2000"))
@@ -0,0 +1,132 @@
+import logging
+import os
+import threading
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Tuple
+
+from .events import ChangeEvent, COURSE, MENU_ITEM, PROMOTION, TOPIC, invalidation_bus
+
+
+def entity_id(value: Any) -> Any:
+    """
+    ID сущности для ключа кэша. Из callback data ID приходят строками ("3"), а события
+    инвалидации несут int (3); без приведения такие ключи не совпадают и запись не сбрасывается.
+    Значение, не являющееся числом, возвращается как есть.
+    """
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return value
+
+
+class CatalogCache:
+    """
+    Кэш каталога в памяти (темы, курсы, пункты меню, акции).
+    Данные читаются из базы при первом обращении и хранятся до инвалидации
+    по событиям шины изменений. Кэш общий для бота и веб-сервера, поэтому защищён блокировкой потоков.
+    """
+
+    def __init__(self):
+        self._entries: Dict[Tuple, Any] = {}
+        self._lock = threading.Lock()
+        # Версия увеличивается при каждой инвалидации; значение, загруженное
+        # до инвалидации, в кэш не попадает, чтобы не вернуть устаревшие данные
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+
+    async def get_or_load(self, key: Tuple, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """Получение значения из кэша или загрузка его из базы данных"""
+        with self._lock:
+            if key in self._entries:
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+            version = self.version
+        value = await loader()
+        with self._lock:
+            if self.version == version:
+                self._entries[key] = value
+        return value
+
+    def get_many(self, keys: List[Tuple]) -> Tuple[Dict[Tuple, Any], int]:
+        """
+        Получение уже закэшированных значений для нескольких ключей.
+        Возвращает найденные значения и версию кэша для последующего store_many.
+        """
+        with self._lock:
+            found = {key: self._entries[key] for key in keys if key in self._entries}
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+            return found, self.version
+
+    def store_many(self, values: Dict[Tuple, Any], version: int):
+        """Сохранение значений, загруженных одним запросом (если с момента get_many не было инвалидации)"""
+        with self._lock:
+            if self.version == version:
+                self._entries.update(values)
+
+    def invalidate(self, *keys: Tuple):
+        """Удаление конкретных записей кэша"""
+        with self._lock:
+            self.version += 1
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def invalidate_kind(self, *kinds: Hashable):
+        """Удаление всех записей указанных видов (первый элемент ключа)"""
+        with self._lock:
+            self.version += 1
+            for key in [key for key in self._entries if key[0] in kinds]:
+                del self._entries[key]
+
+    def handle_event(self, event: ChangeEvent):
+        """Точечная инвалидация записей, затронутых изменением каталога"""
+        if event.entity == TOPIC:
+            if event.action == "delete":
+                # Удаление темы каскадно затрагивает дочерние темы и их курсы
+                self.invalidate_kind("topics", "topic", "courses_by_topic", "course")
+            else:
+                self.invalidate(("topics",), ("topic", event.entity_id))
+        elif event.entity == COURSE:
+            self.invalidate(("course", event.entity_id), ("courses_by_topic", event.topic_id))
+        elif event.entity == MENU_ITEM:
+            self.invalidate(("menu_item", event.entity_id))
+        elif event.entity == PROMOTION:
+            self.invalidate(("active_promotions",))
+
+    def refresh(self):
+        """Принудительный сброс всего кэша; данные будут перечитаны при следующем обращении"""
+        with self._lock:
+            self.version += 1
+            self._entries.clear()
+        logging.info("Кэш каталога сброшен")
+
+    def stats(self) -> Dict[str, Any]:
+        """Счётчики попаданий и промахов кэша"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "entries": len(self._entries),
+                "version": self.version,
+            }
+
+
+# Один кэш на файл базы данных: экземпляры Database, создаваемые роутерами
+# на каждый запрос, и долгоживущий экземпляр бота видят одни и те же данные.
+_caches: Dict[str, CatalogCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_catalog_cache(db_path: str) -> CatalogCache:
+    """Получение кэша каталога для базы данных"""
+    key = os.path.abspath(db_path)
+    with _caches_lock:
+        cache = _caches.get(key)
+        if cache is None:
+            cache = CatalogCache()
+            invalidation_bus.subscribe(cache.handle_event)
+            _caches[key] = cache
+        return cache
@@ -1,108 +1,206 @@
-import aiosqlite
 import logging
-from typing import List, Tuple, Optional
+from typing import Dict, List, Tuple, Optional
 from datetime import date, datetime
 from ..config import DB_PATH
-
-
+from .pool import ConnectionPool, get_pool, close_pool
+from .writer import WriteOperation, get_writer, close_writer
+from .cache import CatalogCache, entity_id, get_catalog_cache
+from .events import ChangeEvent, COURSE, MENU_ITEM, PROMOTION, TOPIC, invalidation_bus
+from ..metrics import DB_METHOD_ERRORS, DB_METHOD_SECONDS, timed_methods
+
+# Аудитории рассылок: название для админ-панели и условие отбора пользователей (таблица users как u)
+BROADCAST_AUDIENCES = {
+    "all": ("Все пользователи", "1 = 1"),
+    "buyers": ("Покупатели", "EXISTS (SELECT 1 FROM purchases p WHERE p.user_id = u.id)"),
+    "non_buyers": ("Пользователи без покупок", "NOT EXISTS (SELECT 1 FROM purchases p WHERE p.user_id = u.id)"),
+}
+BROADCAST_COLUMNS = "id, promotion_id, audience, status, total, sent, failed, last_user_id, created_at, finished_at"
+
+
+# Время каждого публичного метода учитывается в метрике coursebot_db_method_seconds
+@timed_methods(DB_METHOD_SECONDS, DB_METHOD_ERRORS)
 class Database:
     def __init__(self, db_path: str = DB_PATH):
         self.db_path = db_path
+        # Кэш каталога, общий для всех экземпляров Database с тем же файлом базы
+        self.cache: CatalogCache = get_catalog_cache(db_path)
+
+    @property
+    def _pool(self) -> ConnectionPool:
+        """Пул соединений для текущего event loop (общий для всех экземпляров Database)"""
+        return get_pool(self.db_path)
+
+    async def _write(self, operation: WriteOperation):
+        """Выполнение операции записи через общий поток записи с групповой фиксацией"""
+        return await get_writer(self.db_path).submit(operation)
+
+    async def _execute_write(self, query: str, params: tuple = ()) -> int:
+        """Выполнение одиночного изменяющего запроса; возвращает lastrowid"""
+        async def operation(db):
+            async with db.execute(query, params) as cursor:
+                return cursor.lastrowid
+        return await self._write(operation)
+
+    @staticmethod
+    def _publish(entity: str, action: str, entity_id=None, topic_id: Optional[int] = None):
+        """Публикация события об изменении каталога для всех кэшей процесса"""
+        invalidation_bus.publish(ChangeEvent(entity, action, entity_id, topic_id))
+
+    async def _fetchall(self, query: str, params: tuple = ()) -> List[Tuple]:
+        """Выполнение читающего запроса на соединении из пула; возвращает все строки"""
+        async with self._pool.reader() as db:
+            async with db.execute(query, params) as cursor:
+                return await cursor.fetchall()
+
+    async def _fetchone(self, query: str, params: tuple = ()) -> Optional[Tuple]:
+        """Выполнение читающего запроса на соединении из пула; возвращает первую строку"""
+        async with self._pool.reader() as db:
+            async with db.execute(query, params) as cursor:
+                return await cursor.fetchone()
+
+    async def close(self):
+        """Остановка потока записи и закрытие пула соединений с базой данных"""
+        await close_writer(self.db_path)
+        await close_pool(self.db_path)
 
     async def init_db(self):
-        """Инициализация базы данных и создание таблиц"""
-        async with aiosqlite.connect(self.db_path) as db:
-            # Создание таблицы users
-            await db.execute("""
-            CREATE TABLE IF NOT EXISTS users (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                telegram_id INTEGER NOT NULL UNIQUE,
-                username TEXT,
-                registration_date DATETIME NOT NULL
-            );
-            """)
-
-            # Создание таблицы course_topics
-            await db.execute("""
-            CREATE TABLE IF NOT EXISTS course_topics (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT NOT NULL UNIQUE,
-                parent_id INTEGER,
-                image_path TEXT,
-                FOREIGN KEY (parent_id) REFERENCES course_topics (id) ON DELETE CASCADE
-            );
-            """)
-
-            # Создание таблицы courses
-            await db.execute("""
-            CREATE TABLE IF NOT EXISTS courses (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                topic_id INTEGER,
-                name TEXT NOT NULL,
-                description TEXT,
-                price REAL NOT NULL CHECK (price >= 0),
-                payment_link TEXT,
-                image_path TEXT,
-                FOREIGN KEY (topic_id) REFERENCES course_topics (id) ON DELETE CASCADE
-            );
-            """)
-
-            # Создание таблицы purchases
-            await db.execute("""
-            CREATE TABLE IF NOT EXISTS purchases (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER NOT NULL,
-                course_id INTEGER NOT NULL,
-                purchase_date DATETIME NOT NULL,
-                amount REAL NOT NULL,
-                FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE,
-                FOREIGN KEY (course_id) REFERENCES courses (id) ON DELETE CASCADE
-            );
-            """)
-
-            # Создание таблицы menu_items
-            await db.execute("""
-            CREATE TABLE IF NOT EXISTS menu_items (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                key TEXT NOT NULL UNIQUE,
-                title TEXT NOT NULL,
-                content TEXT NOT NULL,
-                image_path TEXT,
-                url_link TEXT DEFAULT ''
-            );
-            """)
-            
-            # Создание таблицы promotions
-            await db.execute("""
-            CREATE TABLE IF NOT EXISTS promotions (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT NOT NULL,
-                description TEXT,
-                course_link TEXT NOT NULL,
-                discounted_price REAL,
-                start_date TEXT,
-                end_date TEXT,
-                image_path TEXT,
-                is_period_enabled INTEGER DEFAULT 1,
-                is_price_enabled INTEGER DEFAULT 1
-            );
-            """)
-            
-            # Создание индексов
-            await db.execute("CREATE INDEX IF NOT EXISTS idx_courses_topic_id ON courses (topic_id);")
-            await db.execute("CREATE INDEX IF NOT EXISTS idx_purchases_user_id ON purchases (user_id);")
-            await db.execute("CREATE INDEX IF NOT EXISTS idx_purchases_course_id ON purchases (course_id);")
-            await db.execute("CREATE INDEX IF NOT EXISTS idx_promotions_start_date ON promotions (start_date);")
-            await db.execute("CREATE INDEX IF NOT EXISTS idx_promotions_end_date ON promotions (end_date);")
-            
-            await db.commit()
-            logging.info("База данных инициализирована")
-            
-            # Добавление тестовых данных
-            await self._add_sample_data(db)
-            
-            # Добавление начальных данных для пунктов меню
-            await self._add_menu_items_data(db)
+        """Инициализация базы данных, открытие пула соединений и создание таблиц"""
+        await self._write(self._create_schema)
+        await self._pool.open()
+        logging.info("База данных инициализирована")
+
+        # Добавление тестовых данных
+        await self._write(self._add_sample_data)
+
+        # Добавление начальных данных для пунктов меню
+        await self._write(self._add_menu_items_data)
+
+    async def _create_schema(self, db):
+        """Создание таблиц и индексов"""
+        # Создание таблицы users
+        await db.execute("""
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            telegram_id INTEGER NOT NULL UNIQUE,
+            username TEXT,
+            registration_date DATETIME NOT NULL
+        );
+        """)
+
+        # Создание таблицы course_topics
+        await db.execute("""
+        CREATE TABLE IF NOT EXISTS course_topics (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL UNIQUE,
+            parent_id INTEGER,
+            image_path TEXT,
+            FOREIGN KEY (parent_id) REFERENCES course_topics (id) ON DELETE CASCADE
+        );
+        """)
+
+        # Создание таблицы courses
+        await db.execute("""
+        CREATE TABLE IF NOT EXISTS courses (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            topic_id INTEGER,
+            name TEXT NOT NULL,
+            description TEXT,
+            price REAL NOT NULL CHECK (price >= 0),
+            payment_link TEXT,
+            image_path TEXT,
+            FOREIGN KEY (topic_id) REFERENCES course_topics (id) ON DELETE CASCADE
+        );
+        """)
+
+        # Создание таблицы purchases
+        await db.execute("""
+        CREATE TABLE IF NOT EXISTS purchases (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            course_id INTEGER NOT NULL,
+            purchase_date DATETIME NOT NULL,
+            amount REAL NOT NULL,
+            FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE,
+            FOREIGN KEY (course_id) REFERENCES courses (id) ON DELETE CASCADE
+        );
+        """)
+
+        # Создание таблицы menu_items
+        await db.execute("""
+        CREATE TABLE IF NOT EXISTS menu_items (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            key TEXT NOT NULL UNIQUE,
+            title TEXT NOT NULL,
+            content TEXT NOT NULL,
+            image_path TEXT,
+            url_link TEXT DEFAULT ''
+        );
+        """)
+        
+        # Создание таблицы promotions
+        await db.execute("""
+        CREATE TABLE IF NOT EXISTS promotions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            description TEXT,
+            course_link TEXT NOT NULL,
+            discounted_price REAL,
+            start_date TEXT,
+            end_date TEXT,
+            image_path TEXT,
+            is_period_enabled INTEGER DEFAULT 1,
+            is_price_enabled INTEGER DEFAULT 1
+        );
+        """)
+        
+        # Создание таблицы media_files (file_id фотографий, уже загруженных в Telegram)
+        await db.execute("""
+        CREATE TABLE IF NOT EXISTS media_files (
+            path TEXT PRIMARY KEY,
+            size INTEGER NOT NULL,
+            mtime_ns INTEGER NOT NULL,
+            file_id TEXT NOT NULL,
+            updated_at DATETIME NOT NULL
+        );
+        """)
+        
+        # Создание таблицы broadcasts (рассылки акций пользователям)
+        await db.execute("""
+        CREATE TABLE IF NOT EXISTS broadcasts (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            promotion_id INTEGER NOT NULL,
+            audience TEXT NOT NULL DEFAULT 'all',
+            status TEXT NOT NULL DEFAULT 'running',
+            total INTEGER NOT NULL DEFAULT 0,
+            sent INTEGER NOT NULL DEFAULT 0,
+            failed INTEGER NOT NULL DEFAULT 0,
+            last_user_id INTEGER NOT NULL DEFAULT 0,
+            created_at DATETIME NOT NULL,
+            finished_at DATETIME,
+            FOREIGN KEY (promotion_id) REFERENCES promotions (id) ON DELETE CASCADE
+        );
+        """)
+        
+        # Создание таблицы broadcast_recipients (результат отправки каждому получателю)
+        await db.execute("""
+        CREATE TABLE IF NOT EXISTS broadcast_recipients (
+            broadcast_id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            status TEXT NOT NULL,
+            error TEXT,
+            processed_at DATETIME NOT NULL,
+            PRIMARY KEY (broadcast_id, user_id),
+            FOREIGN KEY (broadcast_id) REFERENCES broadcasts (id) ON DELETE CASCADE
+        );
+        """)
+        
+        # Создание индексов
+        await db.execute("CREATE INDEX IF NOT EXISTS idx_courses_topic_id ON courses (topic_id);")
+        await db.execute("CREATE INDEX IF NOT EXISTS idx_purchases_user_id ON purchases (user_id);")
+        await db.execute("CREATE INDEX IF NOT EXISTS idx_purchases_course_id ON purchases (course_id);")
+        await db.execute("CREATE INDEX IF NOT EXISTS idx_promotions_start_date ON promotions (start_date);")
+        await db.execute("CREATE INDEX IF NOT EXISTS idx_promotions_end_date ON promotions (end_date);")
+        await db.execute("CREATE INDEX IF NOT EXISTS idx_broadcasts_status ON broadcasts (status);")
 
     async def _add_sample_data(self, db):
         """Добавление тестовых данных в базу данных"""
@@ -147,7 +245,6 @@ class Database:
                 INSERT INTO courses (topic_id, name, description, price) VALUES (?, ?, ?, ?)
             ''', courses_data)
             
-            await db.commit()
             logging.info("Тестовые данные добавлены в базу данных")
 
     async def _add_menu_items_data(self, db):
@@ -170,30 +267,30 @@ class Database:
                 INSERT OR IGNORE INTO menu_items (key, title, content, image_path) VALUES (?, ?, ?, ?)
             ''', menu_items_data)
             
-            await db.commit()
             logging.info("Начальные данные для пунктов меню добавлены в базу данных")
 
     async def add_user(self, user_id: int, username: str, first_name: str, last_name: str):
         """Добавление пользователя в базу данных"""
         try:
-            async with aiosqlite.connect(self.db_path) as db:
-                # Используем full name, так как в таблице только поле username
-                full_name = f"{first_name} {last_name}".strip() if first_name or last_name else None
-                registration_date = datetime.now().isoformat()
+            # Используем full name, так как в таблице только поле username
+            full_name = f"{first_name} {last_name}".strip() if first_name or last_name else None
+            registration_date = datetime.now().isoformat()
                 
-                await db.execute("""
-                INSERT OR REPLACE INTO users (telegram_id, username, registration_date)
-                VALUES (?, ?, ?)
-                """, (user_id, username or full_name, registration_date))
-                await db.commit()
-                logging.info(f"Пользователь {user_id} добавлен/обновлен в базе данных")
+            # Повторный /start обновляет только имя: строка пользователя и её id сохраняются
+            # (на id опираются курсор и список получателей рассылок)
+            await self._execute_write("""
+            INSERT INTO users (telegram_id, username, registration_date)
+            VALUES (?, ?, ?)
+            ON CONFLICT(telegram_id) DO UPDATE SET username = excluded.username
+            """, (user_id, username or full_name, registration_date))
+            logging.info(f"Пользователь {user_id} добавлен/обновлен в базе данных")
         except Exception as e:
             logging.error(f"Ошибка при добавлении пользователя: {e}")
 
     async def get_user(self, user_id: int) -> Optional[Tuple]:
         """Получение информации о пользователе"""
         try:
-            async with aiosqlite.connect(self.db_path) as db:
+            async with self._pool.reader() as db:
                 async with db.execute("SELECT * FROM users WHERE telegram_id = ?", (user_id,)) as cursor:
                     return await cursor.fetchone()
         except Exception as e:
@@ -203,19 +300,22 @@ class Database:
     async def get_topics(self) -> List[Tuple]:
         """Получение всех тем (адаптируем под существующую структуру)"""
         try:
-            async with aiosqlite.connect(self.db_path) as db:
-                async with db.execute("SELECT id, name, parent_id, image_path FROM course_topics") as cursor:
-                    return await cursor.fetchall()
+            return await self.cache.get_or_load(
+                ("topics",),
+                lambda: self._fetchall("SELECT id, name, parent_id, image_path FROM course_topics")
+            )
         except Exception as e:
             logging.error(f"Ошибка при получении тем: {e}")
             return []
 
     async def get_topic_by_id(self, topic_id: int) -> Optional[Tuple]:
         """Получение темы по ID (адаптируем под существующую структуру)"""
+        topic_id = entity_id(topic_id)
         try:
-            async with aiosqlite.connect(self.db_path) as db:
-                async with db.execute("SELECT id, name, parent_id, image_path FROM course_topics WHERE id = ?", (topic_id,)) as cursor:
-                    return await cursor.fetchone()
+            return await self.cache.get_or_load(
+                ("topic", topic_id),
+                lambda: self._fetchone("SELECT id, name, parent_id, image_path FROM course_topics WHERE id = ?", (topic_id,))
+            )
         except Exception as e:
             logging.error(f"Ошибка при получении темы: {e}")
             return None
@@ -223,10 +323,9 @@ class Database:
     async def get_topic_parent_id(self, topic_id: int) -> Optional[int]:
         """Получение parent_id для темы по ID"""
         try:
-            async with aiosqlite.connect(self.db_path) as db:
-                async with db.execute("SELECT parent_id FROM course_topics WHERE id = ?", (topic_id,)) as cursor:
-                    result = await cursor.fetchone()
-                    return result[0] if result else None
+            # Используем закэшированную запись темы (id, name, parent_id, image_path)
+            topic = await self.get_topic_by_id(topic_id)
+            return topic[2] if topic else None
         except Exception as e:
             logging.error(f"Ошибка при получении parent_id темы: {e}")
             return None
@@ -234,11 +333,10 @@ class Database:
     async def add_topic(self, name: str, image_path: str = None) -> bool:
         """Добавление новой темы"""
         try:
-            async with aiosqlite.connect(self.db_path) as db:
-                await db.execute("INSERT INTO course_topics (name, image_path) VALUES (?, ?)", (name, image_path))
-                await db.commit()
-                logging.info(f"Тема '{name}' добавлена в базу данных")
-                return True
+            topic_id = await self._execute_write("INSERT INTO course_topics (name, image_path) VALUES (?, ?)", (name, image_path))
+            self._publish(TOPIC, "add", topic_id)
+            logging.info(f"Тема '{name}' добавлена в базу данных")
+            return True
         except Exception as e:
             logging.error(f"Ошибка при добавлении темы: {e}")
             return False
@@ -246,11 +344,10 @@ class Database:
     async def update_topic(self, topic_id: int, name: str, image_path: str = None) -> bool:
         """Обновление темы"""
         try:
-            async with aiosqlite.connect(self.db_path) as db:
-                await db.execute("UPDATE course_topics SET name = ?, image_path = ? WHERE id = ?", (name, image_path, topic_id))
-                await db.commit()
-                logging.info(f"Тема с ID {topic_id} обновлена в базе данных")
-                return True
+            await self._execute_write("UPDATE course_topics SET name = ?, image_path = ? WHERE id = ?", (name, image_path, topic_id))
+            self._publish(TOPIC, "update", topic_id)
+            logging.info(f"Тема с ID {topic_id} обновлена в базе данных")
+            return True
         except Exception as e:
             logging.error(f"Ошибка при обновлении темы: {e}")
             return False
@@ -258,101 +355,140 @@ class Database:
     async def delete_topic(self, topic_id: int) -> bool:
         """Удаление темы"""
         try:
-            async with aiosqlite.connect(self.db_path) as db:
-                await db.execute("DELETE FROM course_topics WHERE id = ?", (topic_id,))
-                await db.commit()
-                logging.info(f"Тема с ID {topic_id} удалена из базы данных")
-                return True
+            await self._execute_write("DELETE FROM course_topics WHERE id = ?", (topic_id,))
+            self._publish(TOPIC, "delete", topic_id)
+            logging.info(f"Тема с ID {topic_id} удалена из базы данных")
+            return True
         except Exception as e:
             logging.error(f"Ошибка при удалении темы: {e}")
             return False
 
     async def get_courses_by_topic(self, topic_id: int) -> List[Tuple]:
         """Получение всех курсов для темы (адаптируем под существующую структуру)"""
+        topic_id = entity_id(topic_id)
         try:
-            async with aiosqlite.connect(self.db_path) as db:
-                async with db.execute("""
+            return await self.cache.get_or_load(
+                ("courses_by_topic", topic_id),
+                lambda: self._fetchall("""
                     SELECT id, name, description, price
                     FROM courses
                     WHERE topic_id = ?
-                """, (topic_id,)) as cursor:
-                    return await cursor.fetchall()
+                """, (topic_id,))
+            )
         except Exception as e:
             logging.error(f"Ошибка при получении курсов: {e}")
             return []
 
     async def get_course_by_id(self, course_id: int) -> Optional[Tuple]:
         """Получение курса по ID (адаптируем под существующую структуру)"""
+        course_id = entity_id(course_id)
         try:
-            async with aiosqlite.connect(self.db_path) as db:
-                # Возвращаем все поля, но обрабатываем только нужные в обработчике
-                async with db.execute("""
+            # Возвращаем все поля, но обрабатываем только нужные в обработчике
+            return await self.cache.get_or_load(
+                ("course", course_id),
+                lambda: self._fetchone("""
                     SELECT id, name, description, price, topic_id, payment_link, image_path
                     FROM courses
                     WHERE id = ?
-                """, (course_id,)) as cursor:
-                    return await cursor.fetchone()
+                """, (course_id,))
+            )
         except Exception as e:
             logging.error(f"Ошибка при получении курса: {e}")
             return None
 
+    async def get_courses_by_ids(self, course_ids: List[int]) -> Dict[int, Optional[Tuple]]:
+        """Получение нескольких курсов по ID одним запросом (уже закэшированные курсы берутся из кэша)"""
+        try:
+            keys = [("course", course_id) for course_id in dict.fromkeys(map(entity_id, course_ids))]
+            found, version = self.cache.get_many(keys)
+            result = {key[1]: value for key, value in found.items()}
+            missing = [key[1] for key in keys if key not in found]
+            if missing:
+                placeholders = ", ".join("?" for _ in missing)
+                rows = await self._fetchall(f"""
+                    SELECT id, name, description, price, topic_id, payment_link, image_path
+                    FROM courses
+                    WHERE id IN ({placeholders})
+                """, tuple(missing))
+                loaded = {course_id: None for course_id in missing}
+                loaded.update({row[0]: row for row in rows})
+                self.cache.store_many({("course", course_id): row for course_id, row in loaded.items()}, version)
+                result.update(loaded)
+            return result
+        except Exception as e:
+            logging.error(f"Ошибка при получении курсов по списку ID: {e}")
+            return {}
+
     async def add_course(self, topic_id: int, name: str, description: str, price: float, payment_link: str = "", image_path: str = "") -> bool:
         """Добавление нового курса"""
         logging.info(f"Вызов функции add_course базы данных с параметрами: topic_id={topic_id}, name={name}, description={description}, price={price}, payment_link={payment_link}, image_path={image_path}")
         
         try:
-            async with aiosqlite.connect(self.db_path) as db:
-                query = """
-                    INSERT INTO courses (topic_id, name, description, price, payment_link, image_path)
-                    VALUES (?, ?, ?, ?, ?, ?)
-                """
-                params = (topic_id, name, description, price, payment_link, image_path)
+            query = """
+                INSERT INTO courses (topic_id, name, description, price, payment_link, image_path)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """
+            params = (topic_id, name, description, price, payment_link, image_path)
                 
-                logging.info(f"Выполнение SQL-запроса: {query} с параметрами: {params}")
+            logging.info(f"Выполнение SQL-запроса: {query} с параметрами: {params}")
                 
-                await db.execute(query, params)
-                logging.info("SQL-запрос успешно выполнен")
+            course_id = await self._execute_write(query, params)
+            self._publish(COURSE, "add", course_id, topic_id)
+            logging.info(f"Курс добавлен в базу данных (ID: {course_id})")
                 
-                await db.commit()
-                logging.info("Транзакция успешно зафиксирована в базе данных")
-                
-                return True
+            return True
         except Exception as e:
             logging.error(f"Ошибка при добавлении курса: {e}")
             return False
 
     async def update_course(self, course_id: int, name: str, description: str, price: float, payment_link: str = "", image_path: str = "") -> bool:
         """Обновление курса"""
+        async def operation(db):
+            # Тема курса нужна для точной инвалидации списка курсов
+            topic_id = await self._course_topic_id(db, course_id)
+            await db.execute("""
+                UPDATE courses
+                SET name = ?, description = ?, price = ?, payment_link = ?, image_path = ?
+                WHERE id = ?
+            """, (name, description, price, payment_link, image_path, course_id))
+            return topic_id
+
         try:
-            async with aiosqlite.connect(self.db_path) as db:
-                await db.execute("""
-                    UPDATE courses
-                    SET name = ?, description = ?, price = ?, payment_link = ?, image_path = ?
-                    WHERE id = ?
-                """, (name, description, price, payment_link, image_path, course_id))
-                await db.commit()
-                logging.info(f"Курс с ID {course_id} обновлен в базе данных")
-                return True
+            topic_id = await self._write(operation)
+            self._publish(COURSE, "update", course_id, topic_id)
+            logging.info(f"Курс с ID {course_id} обновлен в базе данных")
+            return True
         except Exception as e:
             logging.error(f"Ошибка при обновлении курса: {e}")
             return False
 
     async def delete_course(self, course_id: int) -> bool:
         """Удаление курса"""
+        async def operation(db):
+            topic_id = await self._course_topic_id(db, course_id)
+            await db.execute("DELETE FROM courses WHERE id = ?", (course_id,))
+            return topic_id
+
         try:
-            async with aiosqlite.connect(self.db_path) as db:
-                await db.execute("DELETE FROM courses WHERE id = ?", (course_id,))
-                await db.commit()
-                logging.info(f"Курс с ID {course_id} удален из базы данных")
-                return True
+            topic_id = await self._write(operation)
+            self._publish(COURSE, "delete", course_id, topic_id)
+            logging.info(f"Курс с ID {course_id} удален из базы данных")
+            return True
         except Exception as e:
             logging.error(f"Ошибка при удалении курса: {e}")
             return False
 
+    @staticmethod
+    async def _course_topic_id(db, course_id: int) -> Optional[int]:
+        """Получение темы курса внутри операции записи"""
+        async with db.execute("SELECT topic_id FROM courses WHERE id = ?", (course_id,)) as cursor:
+            row = await cursor.fetchone()
+            return row[0] if row else None
+
     async def get_courses_by_topic_id(self, topic_id: int) -> List[Tuple]:
         """Получение всех курсов для темы по ID темы"""
         try:
-            async with aiosqlite.connect(self.db_path) as db:
+            async with self._pool.reader() as db:
                 async with db.execute("""
                     SELECT id, name, description, price, image_path
                     FROM courses
@@ -366,22 +502,20 @@ class Database:
     async def add_purchase(self, user_id: int, course_id: int, amount: float):
         """Добавление информации о покупке в базу данных"""
         try:
-            async with aiosqlite.connect(self.db_path) as db:
-                purchase_date = datetime.now().isoformat()
+            purchase_date = datetime.now().isoformat()
                 
-                await db.execute("""
-                INSERT INTO purchases (user_id, course_id, purchase_date, amount)
-                VALUES (?, ?, ?, ?)
-                """, (user_id, course_id, purchase_date, amount))
-                await db.commit()
-                logging.info(f"Покупка добавлена в базу данных: user_id={user_id}, course_id={course_id}, amount={amount}")
+            await self._execute_write("""
+            INSERT INTO purchases (user_id, course_id, purchase_date, amount)
+            VALUES (?, ?, ?, ?)
+            """, (user_id, course_id, purchase_date, amount))
+            logging.info(f"Покупка добавлена в базу данных: user_id={user_id}, course_id={course_id}, amount={amount}")
         except Exception as e:
             logging.error(f"Ошибка при добавлении покупки: {e}")
 
     async def get_purchase(self, user_id: int, course_id: int) -> Optional[Tuple]:
         """Получение информации о покупке курса пользователем"""
         try:
-            async with aiosqlite.connect(self.db_path) as db:
+            async with self._pool.reader() as db:
                 async with db.execute("""
                     SELECT id, user_id, course_id, purchase_date, amount
                     FROM purchases
@@ -395,14 +529,13 @@ class Database:
     async def add_menu_item(self, key: str, title: str, content: str, image_path: str = None, url_link: str = None) -> bool:
         """Добавление нового пункта меню"""
         try:
-            async with aiosqlite.connect(self.db_path) as db:
-                await db.execute("""
-                    INSERT INTO menu_items (key, title, content, image_path, url_link)
-                    VALUES (?, ?, ?, ?, ?)
-                """, (key, title, content, image_path, url_link))
-                await db.commit()
-                logging.info(f"Пункт меню с ключом '{key}' добавлен в базу данных")
-                return True
+            await self._execute_write("""
+                INSERT INTO menu_items (key, title, content, image_path, url_link)
+                VALUES (?, ?, ?, ?, ?)
+            """, (key, title, content, image_path, url_link))
+            self._publish(MENU_ITEM, "add", key)
+            logging.info(f"Пункт меню с ключом '{key}' добавлен в базу данных")
+            return True
         except Exception as e:
             logging.error(f"Ошибка при добавлении пункта меню: {e}")
             return False
@@ -410,13 +543,14 @@ class Database:
     async def get_menu_item(self, key: str) -> Optional[Tuple]:
         """Получение пункта меню по ключу"""
         try:
-            async with aiosqlite.connect(self.db_path) as db:
-                async with db.execute("""
+            return await self.cache.get_or_load(
+                ("menu_item", key),
+                lambda: self._fetchone("""
                     SELECT id, key, title, content, image_path, url_link
                     FROM menu_items
                     WHERE key = ?
-                """, (key,)) as cursor:
-                    return await cursor.fetchone()
+                """, (key,))
+            )
         except Exception as e:
             logging.error(f"Ошибка при получении пункта меню: {e}")
             return None
@@ -424,7 +558,7 @@ class Database:
     async def get_all_menu_items(self) -> List[Tuple]:
         """Получение всех пунктов меню"""
         try:
-            async with aiosqlite.connect(self.db_path) as db:
+            async with self._pool.reader() as db:
                 async with db.execute("""
                     SELECT id, key, title, content, image_path, url_link
                     FROM menu_items
@@ -437,22 +571,21 @@ class Database:
     async def update_menu_item_content(self, key: str, content: str, url_link: str = None) -> bool:
         """Обновление содержимого пункта меню и, опционально, ссылки"""
         try:
-            async with aiosqlite.connect(self.db_path) as db:
-                if url_link is not None:
-                    await db.execute("""
-                        UPDATE menu_items
-                        SET content = ?, url_link = ?
-                        WHERE key = ?
-                    """, (content, url_link, key))
-                else:
-                    await db.execute("""
-                        UPDATE menu_items
-                        SET content = ?
-                        WHERE key = ?
-                    """, (content, key))
-                await db.commit()
-                logging.info(f"Содержимое пункта меню с ключом '{key}' обновлено в базе данных")
-                return True
+            if url_link is not None:
+                await self._execute_write("""
+                    UPDATE menu_items
+                    SET content = ?, url_link = ?
+                    WHERE key = ?
+                """, (content, url_link, key))
+            else:
+                await self._execute_write("""
+                    UPDATE menu_items
+                    SET content = ?
+                    WHERE key = ?
+                """, (content, key))
+            self._publish(MENU_ITEM, "update", key)
+            logging.info(f"Содержимое пункта меню с ключом '{key}' обновлено в базе данных")
+            return True
         except Exception as e:
             logging.error(f"Ошибка при обновлении содержимого пункта меню: {e}")
             return False
@@ -460,24 +593,22 @@ class Database:
     async def update_menu_item(self, key: str, title: str, content: str, image_path: str = None, url_link: str = None) -> bool:
         """Обновление пункта меню (название, содержимое, изображение и ссылка)"""
         try:
-            async with aiosqlite.connect(self.db_path) as db:
-                print(f"DEBUG: Executing UPDATE query for key='{key}', title='{title}', content='{content[:50]}...', image_path='{image_path}', url_link='{url_link}'")
-                if url_link is not None:
-                    await db.execute("""
-                        UPDATE menu_items
-                        SET title = ?, content = ?, image_path = ?, url_link = ?
-                        WHERE key = ?
-                    """, (title, content, image_path, url_link, key))
-                else:
-                    await db.execute("""
-                        UPDATE menu_items
-                        SET title = ?, content = ?, image_path = ?
-                        WHERE key = ?
-                    """, (title, content, image_path, key))
-                await db.commit()
-                print(f"DEBUG: Transaction committed for key='{key}'")
-                logging.info(f"Пункт меню с ключом '{key}' обновлен в базе данных")
-                return True
+            logging.debug(f"Обновление пункта меню key='{key}', title='{title}', image_path='{image_path}', url_link='{url_link}'")
+            if url_link is not None:
+                await self._execute_write("""
+                    UPDATE menu_items
+                    SET title = ?, content = ?, image_path = ?, url_link = ?
+                    WHERE key = ?
+                """, (title, content, image_path, url_link, key))
+            else:
+                await self._execute_write("""
+                    UPDATE menu_items
+                    SET title = ?, content = ?, image_path = ?
+                    WHERE key = ?
+                """, (title, content, image_path, key))
+            self._publish(MENU_ITEM, "update", key)
+            logging.info(f"Пункт меню с ключом '{key}' обновлен в базе данных")
+            return True
         except Exception as e:
             logging.error(f"Ошибка при обновлении пункта меню: {e}")
             return False
@@ -485,11 +616,10 @@ class Database:
     async def delete_menu_item(self, key: str) -> bool:
         """Удаление пункта меню"""
         try:
-            async with aiosqlite.connect(self.db_path) as db:
-                await db.execute("DELETE FROM menu_items WHERE key = ?", (key,))
-                await db.commit()
-                logging.info(f"Пункт меню с ключом '{key}' удален из базы данных")
-                return True
+            await self._execute_write("DELETE FROM menu_items WHERE key = ?", (key,))
+            self._publish(MENU_ITEM, "delete", key)
+            logging.info(f"Пункт меню с ключом '{key}' удален из базы данных")
+            return True
         except Exception as e:
             logging.error(f"Ошибка при удалении пункта меню: {e}")
             return False
@@ -499,28 +629,27 @@ class Database:
     async def add_promotion(self, name: str, description: str, course_link: str, discounted_price: Optional[float], start_date: Optional[str], end_date: Optional[str], image_path: str = None, is_period_enabled: bool = True, is_price_enabled: bool = True) -> bool:
         """Добавление новой акции"""
         try:
-            async with aiosqlite.connect(self.db_path) as db:
-                # Преобразуем булевы значения в int, проверяя на None
-                period_enabled_int = 1 if is_period_enabled else 0
-                price_enabled_int = 1 if is_price_enabled else 0
+            # Преобразуем булевы значения в int, проверяя на None
+            period_enabled_int = 1 if is_period_enabled else 0
+            price_enabled_int = 1 if is_price_enabled else 0
                 
-                await db.execute("""
-                    INSERT INTO promotions (name, description, course_link, discounted_price, start_date, end_date, image_path, is_period_enabled, is_price_enabled)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """, (
-                    name,
-                    description,
-                    course_link,
-                    discounted_price,
-                    start_date,
-                    end_date,
-                    image_path,
-                    period_enabled_int,
-                    price_enabled_int
-                ))
-                await db.commit()
-                logging.info(f"Акция '{name}' добавлена в базу данных")
-                return True
+            promotion_id = await self._execute_write("""
+                INSERT INTO promotions (name, description, course_link, discounted_price, start_date, end_date, image_path, is_period_enabled, is_price_enabled)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, (
+                name,
+                description,
+                course_link,
+                discounted_price,
+                start_date,
+                end_date,
+                image_path,
+                period_enabled_int,
+                price_enabled_int
+            ))
+            self._publish(PROMOTION, "add", promotion_id)
+            logging.info(f"Акция '{name}' добавлена в базу данных")
+            return True
         except Exception as e:
             logging.error(f"Ошибка при добавлении акции: {e}")
             return False
@@ -528,7 +657,7 @@ class Database:
     async def get_promotion_by_id(self, promotion_id: int) -> Optional[Tuple]:
         """Получение акции по ID"""
         try:
-            async with aiosqlite.connect(self.db_path) as db:
+            async with self._pool.reader() as db:
                 async with db.execute("""
                     SELECT id, name, description, course_link, discounted_price, start_date, end_date, image_path, is_period_enabled, is_price_enabled
                     FROM promotions
@@ -542,7 +671,7 @@ class Database:
     async def get_all_promotions(self) -> List[Tuple]:
         """Получение всех акций"""
         try:
-            async with aiosqlite.connect(self.db_path) as db:
+            async with self._pool.reader() as db:
                 async with db.execute("""
                     SELECT id, name, description, course_link, discounted_price, start_date, end_date, image_path, is_period_enabled, is_price_enabled
                     FROM promotions
@@ -555,30 +684,29 @@ class Database:
     async def update_promotion(self, promotion_id: int, name: str, description: str, course_link: str, discounted_price: Optional[float], start_date: Optional[str], end_date: Optional[str], is_period_enabled: bool = True, is_price_enabled: bool = True, image_path: str = None) -> bool:
         """Обновление акции"""
         try:
-            async with aiosqlite.connect(self.db_path) as db:
-                # Преобразуем булевы значения в int, проверяя на None
-                period_enabled_int = 1 if is_period_enabled else 0
-                price_enabled_int = 1 if is_price_enabled else 0
+            # Преобразуем булевы значения в int, проверяя на None
+            period_enabled_int = 1 if is_period_enabled else 0
+            price_enabled_int = 1 if is_price_enabled else 0
                 
-                await db.execute("""
-                    UPDATE promotions
-                    SET name = ?, description = ?, course_link = ?, discounted_price = ?, start_date = ?, end_date = ?, is_period_enabled = ?, is_price_enabled = ?, image_path = ?
-                    WHERE id = ?
-                """, (
-                    name,
-                    description,
-                    course_link,
-                    discounted_price,
-                    start_date,
-                    end_date,
-                    period_enabled_int,
-                    price_enabled_int,
-                    image_path,
-                    promotion_id
-                ))
-                await db.commit()
-                logging.info(f"Акция с ID {promotion_id} обновлена в базе данных")
-                return True
+            await self._execute_write("""
+                UPDATE promotions
+                SET name = ?, description = ?, course_link = ?, discounted_price = ?, start_date = ?, end_date = ?, is_period_enabled = ?, is_price_enabled = ?, image_path = ?
+                WHERE id = ?
+            """, (
+                name,
+                description,
+                course_link,
+                discounted_price,
+                start_date,
+                end_date,
+                period_enabled_int,
+                price_enabled_int,
+                image_path,
+                promotion_id
+            ))
+            self._publish(PROMOTION, "update", promotion_id)
+            logging.info(f"Акция с ID {promotion_id} обновлена в базе данных")
+            return True
         except Exception as e:
             logging.error(f"Ошибка при обновлении акции: {e}")
             return False
@@ -586,16 +714,15 @@ class Database:
     async def delete_promotion(self, promotion_id: int) -> bool:
         """Удаление акции"""
         try:
-            async with aiosqlite.connect(self.db_path) as db:
-                await db.execute("DELETE FROM promotions WHERE id = ?", (promotion_id,))
-                await db.commit()
-                logging.info(f"Акция с ID {promotion_id} удалена из базы данных")
-                return True
+            await self._execute_write("DELETE FROM promotions WHERE id = ?", (promotion_id,))
+            self._publish(PROMOTION, "delete", promotion_id)
+            logging.info(f"Акция с ID {promotion_id} удалена из базы данных")
+            return True
         except Exception as e:
             logging.error(f"Ошибка при удалении акции: {e}")
             return False
 
-    async def get_all_active_promotions(self):
+    async def get_all_active_promotions(self) -> List[Tuple]:
         """
         Извлекает все акции из базы данных без фильтрации.
         """
@@ -603,15 +730,16 @@ class Database:
             SELECT id, name, description, course_link, discounted_price, start_date, end_date, image_path, is_period_enabled, is_price_enabled
             FROM promotions
         """
-        async with aiosqlite.connect(self.db_path) as db:
-            cursor = await db.execute(query)
-            promotions = await cursor.fetchall()
-            return promotions
+        try:
+            return await self.cache.get_or_load(("active_promotions",), lambda: self._fetchall(query))
+        except Exception as e:
+            logging.error(f"Ошибка при получении активных акций: {e}")
+            return []
 
     async def get_all_courses(self) -> List[Tuple]:
         """Получение всех курсов"""
         try:
-            async with aiosqlite.connect(self.db_path) as db:
+            async with self._pool.reader() as db:
                 async with db.execute("""
                     SELECT id, name, description, price, topic_id, payment_link, image_path
                     FROM courses
@@ -620,3 +748,223 @@ class Database:
         except Exception as e:
             logging.error(f"Ошибка при получении всех курсов: {e}")
             return []
+
+    async def get_all_image_paths(self) -> List[str]:
+        """Получение всех путей к изображениям, на которые ссылаются курсы, темы, пункты меню и акции"""
+        try:
+            rows = await self._fetchall("""
+                SELECT image_path FROM courses WHERE image_path IS NOT NULL AND image_path != ''
+                UNION
+                SELECT image_path FROM course_topics WHERE image_path IS NOT NULL AND image_path != ''
+                UNION
+                SELECT image_path FROM menu_items WHERE image_path IS NOT NULL AND image_path != ''
+                UNION
+                SELECT image_path FROM promotions WHERE image_path IS NOT NULL AND image_path != ''
+            """)
+            return [row[0] for row in rows]
+        except Exception as e:
+            logging.error(f"Ошибка при получении путей к изображениям: {e}")
+            return []
+
+    async def get_image_reference_counts(self) -> Optional[Dict[str, int]]:
+        """
+        Количество записей курсов, тем, пунктов меню и акций, ссылающихся на каждый путь к изображению.
+        При ошибке возвращает None (а не пустой словарь), чтобы файлы не сочли неиспользуемыми.
+        """
+        try:
+            rows = await self._fetchall("""
+                SELECT image_path, COUNT(*) FROM (
+                    SELECT image_path FROM courses
+                    UNION ALL
+                    SELECT image_path FROM course_topics
+                    UNION ALL
+                    SELECT image_path FROM menu_items
+                    UNION ALL
+                    SELECT image_path FROM promotions
+                )
+                WHERE image_path IS NOT NULL AND image_path != ''
+                GROUP BY image_path
+            """)
+            return {row[0]: row[1] for row in rows}
+        except Exception as e:
+            logging.error(f"Ошибка при подсчёте ссылок на изображения: {e}")
+            return None
+
+    async def replace_image_path(self, old_path: str, new_path: str) -> bool:
+        """Замена пути к изображению во всех таблицах каталога (перенос файла в другое место)"""
+        async def operation(db):
+            changed = []
+            async with db.execute("SELECT id, topic_id FROM courses WHERE image_path = ?", (old_path,)) as cursor:
+                changed += [(COURSE, row[0], row[1]) for row in await cursor.fetchall()]
+            async with db.execute("SELECT id FROM course_topics WHERE image_path = ?", (old_path,)) as cursor:
+                changed += [(TOPIC, row[0], None) for row in await cursor.fetchall()]
+            async with db.execute("SELECT key FROM menu_items WHERE image_path = ?", (old_path,)) as cursor:
+                changed += [(MENU_ITEM, row[0], None) for row in await cursor.fetchall()]
+            async with db.execute("SELECT id FROM promotions WHERE image_path = ?", (old_path,)) as cursor:
+                changed += [(PROMOTION, row[0], None) for row in await cursor.fetchall()]
+            for table in ("courses", "course_topics", "menu_items", "promotions"):
+                await db.execute(f"UPDATE {table} SET image_path = ? WHERE image_path = ?", (new_path, old_path))
+            return changed
+
+        try:
+            for entity, entity_id, topic_id in await self._write(operation):
+                self._publish(entity, "update", entity_id, topic_id)
+            return True
+        except Exception as e:
+            logging.error(f"Ошибка при замене пути к изображению {old_path}: {e}")
+            return False
+
+    async def get_media_file(self, path: str) -> Optional[Tuple]:
+        """Получение сохранённого file_id для файла (path, size, mtime_ns, file_id)"""
+        try:
+            return await self._fetchone("""
+                SELECT path, size, mtime_ns, file_id
+                FROM media_files
+                WHERE path = ?
+            """, (path,))
+        except Exception as e:
+            logging.error(f"Ошибка при получении file_id для {path}: {e}")
+            return None
+
+    async def save_media_file(self, path: str, size: int, mtime_ns: int, file_id: str) -> bool:
+        """Сохранение file_id, полученного от Telegram после загрузки файла"""
+        try:
+            await self._execute_write("""
+                INSERT OR REPLACE INTO media_files (path, size, mtime_ns, file_id, updated_at)
+                VALUES (?, ?, ?, ?, ?)
+            """, (path, size, mtime_ns, file_id, datetime.now().isoformat()))
+            return True
+        except Exception as e:
+            logging.error(f"Ошибка при сохранении file_id для {path}: {e}")
+            return False
+
+    async def delete_media_file(self, path: str) -> bool:
+        """Удаление сохранённого file_id"""
+        try:
+            await self._execute_write("DELETE FROM media_files WHERE path = ?", (path,))
+            return True
+        except Exception as e:
+            logging.error(f"Ошибка при удалении file_id для {path}: {e}")
+            return False
+
+    async def create_broadcast(self, promotion_id: int, audience: str = "all") -> Optional[int]:
+        """Создание рассылки акции; рассылка сразу получает статус running"""
+        if audience not in BROADCAST_AUDIENCES:
+            logging.error(f"Неизвестная аудитория рассылки: {audience}")
+            return None
+        condition = BROADCAST_AUDIENCES[audience][1]
+
+        async def operation(db):
+            async with db.execute(f"SELECT COUNT(*) FROM users u WHERE {condition}") as cursor:
+                total = (await cursor.fetchone())[0]
+            async with db.execute("""
+                INSERT INTO broadcasts (promotion_id, audience, status, total, created_at)
+                VALUES (?, ?, 'running', ?, ?)
+            """, (promotion_id, audience, total, datetime.now().isoformat())) as cursor:
+                return cursor.lastrowid
+
+        try:
+            broadcast_id = await self._write(operation)
+            logging.info(f"Рассылка {broadcast_id} акции {promotion_id} создана (аудитория {audience})")
+            return broadcast_id
+        except Exception as e:
+            logging.error(f"Ошибка при создании рассылки: {e}")
+            return None
+
+    async def get_broadcast(self, broadcast_id: int) -> Optional[Tuple]:
+        """Получение рассылки по ID"""
+        try:
+            return await self._fetchone(f"SELECT {BROADCAST_COLUMNS} FROM broadcasts WHERE id = ?", (broadcast_id,))
+        except Exception as e:
+            logging.error(f"Ошибка при получении рассылки: {e}")
+            return None
+
+    async def get_all_broadcasts(self) -> List[Tuple]:
+        """Получение всех рассылок, начиная с последней"""
+        try:
+            return await self._fetchall(f"SELECT {BROADCAST_COLUMNS} FROM broadcasts ORDER BY id DESC")
+        except Exception as e:
+            logging.error(f"Ошибка при получении рассылок: {e}")
+            return []
+
+    async def get_broadcast_ids_by_status(self, status: str) -> List[int]:
+        """ID рассылок с указанным статусом"""
+        try:
+            rows = await self._fetchall("SELECT id FROM broadcasts WHERE status = ? ORDER BY id", (status,))
+            return [row[0] for row in rows]
+        except Exception as e:
+            logging.error(f"Ошибка при получении рассылок со статусом {status}: {e}")
+            return []
+
+    async def set_broadcast_status(self, broadcast_id: int, status: str, expected: Optional[Tuple[str, ...]] = None) -> bool:
+        """
+        Смена статуса рассылки.
+        Если передан expected, статус меняется только из перечисленных состояний
+        (например, нельзя возобновить уже завершённую рассылку).
+        """
+        finished_at = datetime.now().isoformat() if status in ("completed", "cancelled") else None
+        query = "UPDATE broadcasts SET status = ?, finished_at = ? WHERE id = ?"
+        params = (status, finished_at, broadcast_id)
+        if expected:
+            query += f" AND status IN ({', '.join('?' for _ in expected)})"
+            params += tuple(expected)
+
+        async def operation(db):
+            async with db.execute(query, params) as cursor:
+                return cursor.rowcount
+
+        try:
+            return await self._write(operation) > 0
+        except Exception as e:
+            logging.error(f"Ошибка при смене статуса рассылки {broadcast_id}: {e}")
+            return False
+
+    async def get_broadcast_recipients(self, broadcast_id: int, audience: str, after_user_id: int, limit: int) -> List[Tuple]:
+        """
+        Следующая порция получателей рассылки (id, telegram_id) по возрастанию users.id.
+        Пагинация по ключу (id > последнего обработанного), поэтому каждая порция читается
+        по индексу первичного ключа независимо от размера таблицы. Пользователи, которым
+        рассылка уже была отправлена до перезапуска, пропускаются.
+        """
+        condition = BROADCAST_AUDIENCES[audience][1]
+        try:
+            return await self._fetchall(f"""
+                SELECT u.id, u.telegram_id
+                FROM users u
+                WHERE u.id > ? AND {condition}
+                  AND NOT EXISTS (SELECT 1 FROM broadcast_recipients r WHERE r.broadcast_id = ? AND r.user_id = u.id)
+                ORDER BY u.id
+                LIMIT ?
+            """, (after_user_id, broadcast_id, limit))
+        except Exception as e:
+            logging.error(f"Ошибка при получении получателей рассылки {broadcast_id}: {e}")
+            return []
+
+    async def record_broadcast_delivery(self, broadcast_id: int, user_id: int, status: str, error: Optional[str] = None) -> bool:
+        """Сохранение результата отправки одному получателю вместе со счётчиками рассылки"""
+        counter = "sent" if status == "sent" else "failed"
+
+        async def operation(db):
+            async with db.execute("""
+                INSERT OR IGNORE INTO broadcast_recipients (broadcast_id, user_id, status, error, processed_at)
+                VALUES (?, ?, ?, ?, ?)
+            """, (broadcast_id, user_id, status, error, datetime.now().isoformat())) as cursor:
+                inserted = cursor.rowcount
+            if inserted:
+                await db.execute(f"UPDATE broadcasts SET {counter} = {counter} + 1 WHERE id = ?", (broadcast_id,))
+
+        try:
+            await self._write(operation)
+            return True
+        except Exception as e:
+            logging.error(f"Ошибка при сохранении результата рассылки {broadcast_id} для пользователя {user_id}: {e}")
+            return False
+
+    async def save_broadcast_cursor(self, broadcast_id: int, last_user_id: int) -> bool:
+        """Сохранение последнего обработанного users.id, с которого рассылка продолжится после перезапуска"""
+        try:
+            await self._execute_write("UPDATE broadcasts SET last_user_id = ? WHERE id = ?", (last_user_id, broadcast_id))
+            return True
+        except Exception as e:
+            logging.error(f"Ошибка при сохранении позиции рассылки {broadcast_id}: {e}")
+            return False
@@ -0,0 +1,67 @@
+import asyncio
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Any, Callable, List, Optional, Tuple
+
+# Виды сущностей каталога, об изменении которых сообщает шина
+TOPIC = "topic"
+COURSE = "course"
+MENU_ITEM = "menu_item"
+PROMOTION = "promotion"
+
+
+@dataclass(frozen=True)
+class ChangeEvent:
+    """
+    Событие изменения сущности каталога.
+
+    :param entity: Вид сущности (topic, course, menu_item, promotion)
+    :param action: Действие: add, update или delete
+    :param entity_id: ID сущности (для пунктов меню - ключ)
+    :param topic_id: Тема, к которой относится курс (только для курсов)
+    """
+    entity: str
+    action: str
+    entity_id: Any = None
+    topic_id: Optional[int] = None
+
+
+class InvalidationBus:
+    """
+    Шина событий об изменениях каталога, общая для бота и веб-сервера.
+    Веб-сервер работает в отдельном потоке со своим циклом событий, поэтому подписчик
+    может указать свой цикл, и событие будет доставлено в него через call_soon_threadsafe.
+    Подписчики без цикла вызываются сразу в потоке публикации и должны быть потокобезопасными.
+    """
+
+    def __init__(self):
+        self._subscribers: List[Tuple[Callable[[ChangeEvent], None], Optional[asyncio.AbstractEventLoop]]] = []
+        self._lock = threading.Lock()
+
+    def subscribe(self, callback: Callable[[ChangeEvent], None], loop: Optional[asyncio.AbstractEventLoop] = None):
+        """Подписка на события изменения каталога"""
+        with self._lock:
+            self._subscribers.append((callback, loop))
+
+    def unsubscribe(self, callback: Callable[[ChangeEvent], None]):
+        """Отписка от событий"""
+        with self._lock:
+            self._subscribers = [(cb, loop) for cb, loop in self._subscribers if cb != callback]
+
+    def publish(self, event: ChangeEvent):
+        """Рассылка события всем подписчикам"""
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for callback, loop in subscribers:
+            try:
+                if loop is None:
+                    callback(event)
+                elif not loop.is_closed():
+                    loop.call_soon_threadsafe(callback, event)
+            except Exception as e:
+                logging.error(f"Ошибка при доставке события {event}: {e}")
+
+
+# Шина одна на процесс
+invalidation_bus = InvalidationBus()
@@ -0,0 +1,96 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
+
+from .cache import entity_id
+from .database import Database
+
+
+class DataLoader:
+    """
+    Загрузчик данных на время обработки одного обновления (identity map).
+    Повторяет методы чтения Database, но запоминает результат каждого запроса,
+    поэтому повторное обращение к той же сущности внутри обработчика не идёт в базу.
+    Курсы, запрошенные одновременно (например, через asyncio.gather), загружаются одним запросом.
+    Остальные методы (в том числе записи) передаются в Database без изменений.
+    """
+
+    def __init__(self, db: Database):
+        self.db = db
+        self._memo: Dict[Tuple[str, Hashable], asyncio.Future] = {}
+        # Курсы, ожидающие пакетной загрузки в ближайшей итерации цикла событий
+        self._pending_courses: Dict[int, asyncio.Future] = {}
+        self.round_trips = 0
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.db, name)
+
+    async def _load(self, key: Tuple[str, Hashable], fetch: Callable[[], Awaitable[Any]]) -> Any:
+        """Однократная загрузка значения по ключу; параллельные запросы ждут один и тот же результат"""
+        future = self._memo.get(key)
+        if future is None:
+            future = asyncio.ensure_future(fetch())
+            self._memo[key] = future
+            self.round_trips += 1
+        return await asyncio.shield(future)
+
+    async def get_topics(self) -> List[Tuple]:
+        return await self._load(("topics", None), self.db.get_topics)
+
+    async def get_topic_by_id(self, topic_id: int) -> Optional[Tuple]:
+        topic_id = entity_id(topic_id)
+        return await self._load(("topic", topic_id), lambda: self.db.get_topic_by_id(topic_id))
+
+    async def get_courses_by_topic(self, topic_id: int) -> List[Tuple]:
+        topic_id = entity_id(topic_id)
+        return await self._load(("courses_by_topic", topic_id), lambda: self.db.get_courses_by_topic(topic_id))
+
+    async def get_menu_item(self, key: str) -> Optional[Tuple]:
+        return await self._load(("menu_item", key), lambda: self.db.get_menu_item(key))
+
+    async def get_promotion_by_id(self, promotion_id: int) -> Optional[Tuple]:
+        return await self._load(("promotion", promotion_id), lambda: self.db.get_promotion_by_id(promotion_id))
+
+    async def get_all_active_promotions(self) -> List[Tuple]:
+        return await self._load(("active_promotions", None), self.db.get_all_active_promotions)
+
+    async def get_course_by_id(self, course_id: int) -> Optional[Tuple]:
+        """Получение курса; запросы, сделанные в одной итерации цикла, объединяются в один"""
+        course_id = entity_id(course_id)
+        key = ("course", course_id)
+        future = self._memo.get(key)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = loop.create_future()
+            self._memo[key] = future
+            if not self._pending_courses:
+                loop.call_soon(self._dispatch_courses)
+            self._pending_courses[course_id] = future
+        return await asyncio.shield(future)
+
+    async def get_courses_by_ids(self, course_ids: List[int]) -> Dict[int, Optional[Tuple]]:
+        course_ids = [entity_id(course_id) for course_id in course_ids]
+        courses = await asyncio.gather(*(self.get_course_by_id(course_id) for course_id in course_ids))
+        return dict(zip(course_ids, courses))
+
+    def _dispatch_courses(self):
+        """Запуск пакетной загрузки накопленных курсов"""
+        pending, self._pending_courses = self._pending_courses, {}
+        asyncio.ensure_future(self._load_courses(pending))
+
+    async def _load_courses(self, pending: Dict[int, asyncio.Future]):
+        self.round_trips += 1
+        try:
+            if len(pending) == 1:
+                # Одиночный курс читаем через кэшируемый метод
+                course_id = next(iter(pending))
+                courses = {course_id: await self.db.get_course_by_id(course_id)}
+            else:
+                courses = await self.db.get_courses_by_ids(list(pending))
+        except Exception as e:
+            for future in pending.values():
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for course_id, future in pending.items():
+            if not future.done():
+                future.set_result(courses.get(course_id))
@@ -0,0 +1,97 @@
+import asyncio
+import logging
+import os
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional, Tuple
+
+import aiosqlite
+
+from ..config import DB_POOL_READERS
+from .pragmas import apply_pragmas, log_pragmas
+
+
+class ConnectionPool:
+    """
+    Пул долгоживущих соединений с SQLite для чтения,
+    чтобы не открывать новое соединение (и новый поток aiosqlite) на каждый запрос.
+    Запись выполняется отдельным потоком записи (см. writer.py).
+    """
+
+    def __init__(self, db_path: str, readers: int = DB_POOL_READERS):
+        self.db_path = db_path
+        self.readers_count = max(1, readers)
+        self._readers: List[aiosqlite.Connection] = []
+        self._idle: Optional[asyncio.Queue] = None
+        self._open_lock = asyncio.Lock()
+        self.is_open = False
+
+    async def _connect(self) -> aiosqlite.Connection:
+        """Открытие одного соединения с базой данных с применением профиля настроек"""
+        connection = await aiosqlite.connect(self.db_path)
+        effective = await apply_pragmas(connection)
+        if not self._readers:
+            # Настройки у всех соединений пула одинаковые, поэтому журналируем их один раз
+            log_pragmas("чтение", effective)
+        return connection
+
+    async def open(self):
+        """Открытие соединений пула (повторный вызов ничего не делает)"""
+        async with self._open_lock:
+            if self.is_open:
+                return
+            directory = os.path.dirname(self.db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._idle = asyncio.Queue()
+            for _ in range(self.readers_count):
+                connection = await self._connect()
+                self._readers.append(connection)
+                self._idle.put_nowait(connection)
+            self.is_open = True
+            logging.info(f"Пул соединений с {self.db_path} открыт: {self.readers_count} на чтение")
+
+    async def close(self):
+        """Закрытие всех соединений пула"""
+        async with self._open_lock:
+            if not self.is_open:
+                return
+            self.is_open = False
+            for connection in self._readers:
+                await connection.close()
+            self._readers.clear()
+            logging.info(f"Пул соединений с {self.db_path} закрыт")
+
+    @asynccontextmanager
+    async def reader(self):
+        """Выдача соединения для чтения из пула на время блока"""
+        if not self.is_open:
+            await self.open()
+        connection = await self._idle.get()
+        try:
+            yield connection
+        finally:
+            self._idle.put_nowait(connection)
+
+
+# Пулы создаются отдельно для каждого event loop: веб-сервер работает в своём потоке
+# со своим циклом событий, а примитивы asyncio нельзя разделять между циклами.
+_pools: Dict[Tuple[str, asyncio.AbstractEventLoop], ConnectionPool] = {}
+
+
+def get_pool(db_path: str) -> ConnectionPool:
+    """Получение пула соединений для базы данных в текущем event loop"""
+    loop = asyncio.get_running_loop()
+    key = (os.path.abspath(db_path), loop)
+    pool = _pools.get(key)
+    if pool is None:
+        pool = ConnectionPool(db_path)
+        _pools[key] = pool
+    return pool
+
+
+async def close_pool(db_path: str):
+    """Закрытие пула соединений для базы данных в текущем event loop"""
+    loop = asyncio.get_running_loop()
+    pool = _pools.pop((os.path.abspath(db_path), loop), None)
+    if pool is not None:
+        await pool.close()
@@ -0,0 +1,70 @@
+import logging
+from typing import Any, Dict
+
+import aiosqlite
+
+from ..config import DB_PRAGMA_PROFILE
+
+# Именованные профили настроек SQLite.
+# cache_size в отрицательных значениях задаётся в килобайтах, mmap_size - в байтах, busy_timeout - в миллисекундах.
+PRAGMA_PROFILES: Dict[str, Dict[str, Any]] = {
+    # Максимальная надёжность: fsync на каждой фиксации, без отображения файла в память
+    "durable": {
+        "journal_mode": "WAL",
+        "synchronous": "FULL",
+        "mmap_size": 0,
+        "cache_size": -8000,
+        "temp_store": "DEFAULT",
+        "busy_timeout": 5000,
+    },
+    # Рекомендуемый профиль: WAL не блокирует читателей при записи, NORMAL безопасен в режиме WAL
+    "balanced": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "mmap_size": 64 * 1024 * 1024,
+        "cache_size": -16000,
+        "temp_store": "MEMORY",
+        "busy_timeout": 5000,
+    },
+    # Максимальная пропускная способность ценой возможной потери последних транзакций при сбое питания
+    "throughput": {
+        "journal_mode": "WAL",
+        "synchronous": "OFF",
+        "mmap_size": 256 * 1024 * 1024,
+        "cache_size": -64000,
+        "temp_store": "MEMORY",
+        "busy_timeout": 10000,
+    },
+}
+
+DEFAULT_PROFILE = "balanced"
+
+
+def get_profile(name: str = DB_PRAGMA_PROFILE) -> Dict[str, Any]:
+    """Получение профиля настроек по имени (неизвестное имя заменяется профилем по умолчанию)"""
+    profile = PRAGMA_PROFILES.get((name or "").lower())
+    if profile is None:
+        logging.warning(f"Неизвестный профиль настроек SQLite '{name}', используется '{DEFAULT_PROFILE}'")
+        profile = PRAGMA_PROFILES[DEFAULT_PROFILE]
+    return profile
+
+
+async def apply_pragmas(connection: aiosqlite.Connection, name: str = DB_PRAGMA_PROFILE) -> Dict[str, Any]:
+    """
+    Применение профиля настроек к соединению.
+    Возвращает действующие значения, прочитанные из SQLite после применения.
+    """
+    profile = get_profile(name)
+    effective = {}
+    for pragma, value in profile.items():
+        await connection.execute(f"PRAGMA {pragma} = {value}")
+        async with connection.execute(f"PRAGMA {pragma}") as cursor:
+            row = await cursor.fetchone()
+            effective[pragma] = row[0] if row else None
+    return effective
+
+
+def log_pragmas(role: str, effective: Dict[str, Any], name: str = DB_PRAGMA_PROFILE):
+    """Запись в журнал действующих настроек SQLite, чтобы их можно было проверить при эксплуатации"""
+    values = ", ".join(f"{pragma}={value}" for pragma, value in effective.items())
+    logging.info(f"Настройки SQLite ({role}, профиль '{name}'): {values}")
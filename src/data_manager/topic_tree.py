@@ -0,0 +1,133 @@
+import asyncio
+import logging
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from .events import ChangeEvent, TOPIC, invalidation_bus
+
+
+class TopicTree:
+    """
+    Дерево тем курсов в памяти: родители, дочерние темы, глубина и цепочка предков.
+    Загружается один раз из course_topics и обновляется точечно по событиям шины изменений,
+    поэтому клавиатуры и хлебные крошки строятся без запросов к базе.
+    Изменяется и читается только в цикле событий бота.
+    """
+
+    def __init__(self):
+        self._names: Dict[int, str] = {}
+        self._parents: Dict[int, Optional[int]] = {}
+        self._children: Dict[Optional[int], Set[int]] = {}
+        self._db = None
+        # Ссылки на задачи перечитывания тем, чтобы их не удалил сборщик мусора
+        self._tasks: Set[asyncio.Task] = set()
+        # Вызываются после того, как дерево обновлено по событию (кэши, построенные по дереву)
+        self._listeners: List[Callable[[], None]] = []
+
+    def load(self, topics: Iterable[Tuple]):
+        """Построение дерева по записям тем (id, name, parent_id, image_path)"""
+        self._names.clear()
+        self._parents.clear()
+        self._children.clear()
+        for topic in topics:
+            self._set(topic[0], topic[1], topic[2])
+
+    async def load_from(self, db):
+        """Загрузка дерева из базы данных и подписка на изменения тем в текущем цикле событий"""
+        self._db = db
+        self.load(await db.get_topics())
+        invalidation_bus.subscribe(self.handle_event, asyncio.get_running_loop())
+        logging.info(f"Дерево тем загружено: {len(self._names)} тем")
+
+    @staticmethod
+    def _normalize_parent(parent_id) -> Optional[int]:
+        """В базе корневые темы встречаются и с NULL, и с 0"""
+        return parent_id if parent_id else None
+
+    def _set(self, topic_id: int, name: str, parent_id):
+        """Добавление или перемещение темы"""
+        parent_id = self._normalize_parent(parent_id)
+        if topic_id in self._parents:
+            self._children.get(self._parents[topic_id], set()).discard(topic_id)
+        self._names[topic_id] = name
+        self._parents[topic_id] = parent_id
+        self._children.setdefault(parent_id, set()).add(topic_id)
+
+    def _remove(self, topic_id: int):
+        """Удаление темы вместе с поддеревом (в базе дочерние темы удаляются каскадно)"""
+        for child_id in list(self._children.get(topic_id, ())):
+            self._remove(child_id)
+        self._children.pop(topic_id, None)
+        if topic_id in self._parents:
+            self._children.get(self._parents.pop(topic_id), set()).discard(topic_id)
+        self._names.pop(topic_id, None)
+
+    def add_listener(self, listener: Callable[[], None]):
+        """
+        Подписка на изменение дерева. Темы перечитываются асинхронно, уже после того как шина
+        разослала событие, поэтому кэши экранов нужно сбрасывать ещё раз, когда дерево обновлено.
+        """
+        self._listeners.append(listener)
+
+    def _notify(self):
+        for listener in self._listeners:
+            try:
+                listener()
+            except Exception as e:
+                logging.error(f"Ошибка в подписчике на изменения дерева тем: {e}")
+
+    def handle_event(self, event: ChangeEvent):
+        """Точечное обновление дерева при изменении темы"""
+        if event.entity != TOPIC:
+            return
+        if event.action == "delete":
+            self._remove(event.entity_id)
+        elif self._db is not None:
+            task = asyncio.get_running_loop().create_task(self._reload_topic(event.entity_id))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _reload_topic(self, topic_id: int):
+        """Перечитывание одной темы после добавления или изменения"""
+        try:
+            topic = await self._db.get_topic_by_id(topic_id)
+            if topic is None:
+                self._remove(topic_id)
+            else:
+                self._set(topic[0], topic[1], topic[2])
+            self._notify()
+        except Exception as e:
+            logging.error(f"Ошибка при обновлении дерева тем для темы {topic_id}: {e}")
+
+    def __contains__(self, topic_id) -> bool:
+        return topic_id in self._parents
+
+    def parent_id(self, topic_id: int) -> Optional[int]:
+        """ID родительской темы (None для корневой или неизвестной темы)"""
+        return self._parents.get(topic_id)
+
+    def children(self, topic_id: Optional[int] = None) -> List[int]:
+        """ID дочерних тем (для None - корневые темы)"""
+        return sorted(self._children.get(topic_id, ()))
+
+    def ancestors(self, topic_id: int) -> List[int]:
+        """Цепочка предков темы от корня до непосредственного родителя"""
+        chain = []
+        seen = {topic_id}
+        parent_id = self._parents.get(topic_id)
+        while parent_id is not None and parent_id not in seen:
+            # Защита от циклов, если в базе оказались некорректные parent_id
+            seen.add(parent_id)
+            chain.append(parent_id)
+            parent_id = self._parents.get(parent_id)
+        chain.reverse()
+        return chain
+
+    def depth(self, topic_id: int) -> int:
+        """Глубина темы (0 для корневой)"""
+        return len(self.ancestors(topic_id))
+
+    def breadcrumbs(self, topic_id: int) -> List[str]:
+        """Названия тем от корня до указанной темы включительно"""
+        return [self._names[ancestor_id] for ancestor_id in self.ancestors(topic_id)] + (
+            [self._names[topic_id]] if topic_id in self._names else []
+        )
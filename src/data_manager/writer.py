@@ -0,0 +1,187 @@
+import asyncio
+import logging
+import os
+import threading
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import aiosqlite
+
+from ..config import DB_WRITE_BATCH_SIZE, DB_WRITE_WINDOW_MS
+from .pragmas import apply_pragmas, log_pragmas
+
+# Операция записи: корутина, получающая соединение и выполняющая свои запросы без commit
+WriteOperation = Callable[[aiosqlite.Connection], Awaitable[Any]]
+
+
+class GroupCommitWriter:
+    """
+    Единственная корутина записи в базу данных.
+    Принимает операции из очереди и объединяет их в общие транзакции (group commit),
+    ограниченные временным окном и размером пачки. Каждая операция выполняется
+    в своей точке сохранения, поэтому вызывающий получает собственный результат или ошибку.
+    """
+
+    def __init__(self, db_path: str, loop: asyncio.AbstractEventLoop,
+                 batch_size: int = DB_WRITE_BATCH_SIZE, window_ms: float = DB_WRITE_WINDOW_MS):
+        self.db_path = db_path
+        self.batch_size = max(1, batch_size)
+        self.window = max(0.0, window_ms) / 1000
+        # Цикл событий, в котором живёт корутина записи
+        self.loop = loop
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._connection: Optional[aiosqlite.Connection] = None
+        self._start_lock: Optional[asyncio.Lock] = None
+        # Статистика для оценки эффективности группировки
+        self.batches = 0
+        self.operations = 0
+
+    async def _ensure_started(self):
+        """Запуск корутины записи (выполняется только в цикле-владельце)"""
+        if self._task is not None:
+            return
+        if self._start_lock is None:
+            self._start_lock = asyncio.Lock()
+        async with self._start_lock:
+            if self._task is not None:
+                return
+            directory = os.path.dirname(self.db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            # Транзакциями управляем явно, поэтому отключаем неявный BEGIN модуля sqlite3
+            self._connection = await aiosqlite.connect(self.db_path, isolation_level=None)
+            log_pragmas("запись", await apply_pragmas(self._connection))
+            self._queue = asyncio.Queue()
+            self._task = asyncio.create_task(self._run())
+            logging.info(f"Поток записи в {self.db_path} запущен (пачка до {self.batch_size}, окно {self.window * 1000:.0f} мс)")
+
+    async def submit(self, operation: WriteOperation) -> Any:
+        """
+        Постановка операции в очередь записи и ожидание её результата.
+        Можно вызывать из любого потока и цикла событий.
+        """
+        if asyncio.get_running_loop() is not self.loop:
+            future = asyncio.run_coroutine_threadsafe(self.submit(operation), self.loop)
+            return await asyncio.wrap_future(future)
+
+        await self._ensure_started()
+        future = self.loop.create_future()
+        self._queue.put_nowait((operation, future))
+        return await future
+
+    async def _run(self):
+        """Основной цикл: сбор пачки операций и их фиксация одной транзакцией"""
+        while True:
+            item = await self._queue.get()
+            if item is None:
+                break
+            batch = [item]
+            stopping = False
+            deadline = self.loop.time() + self.window
+            while len(batch) < self.batch_size:
+                if self._queue.empty():
+                    timeout = deadline - self.loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        item = await asyncio.wait_for(self._queue.get(), timeout)
+                    except asyncio.TimeoutError:
+                        break
+                else:
+                    item = self._queue.get_nowait()
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+            await self._commit_batch(batch)
+            if stopping:
+                break
+
+    async def _commit_batch(self, batch: List[Tuple[WriteOperation, asyncio.Future]]):
+        """Выполнение пачки операций в одной транзакции"""
+        db = self._connection
+        outcomes = []
+        try:
+            await db.execute("BEGIN IMMEDIATE")
+            for operation, future in batch:
+                await db.execute("SAVEPOINT operation")
+                try:
+                    result = await operation(db)
+                except Exception as e:
+                    # Откатываем только эту операцию, остальные в пачке продолжают выполняться
+                    await db.execute("ROLLBACK TO operation")
+                    await db.execute("RELEASE operation")
+                    outcomes.append((future, None, e))
+                else:
+                    await db.execute("RELEASE operation")
+                    outcomes.append((future, result, None))
+            await db.execute("COMMIT")
+        except Exception as e:
+            logging.error(f"Ошибка при фиксации пачки из {len(batch)} операций записи: {e}")
+            try:
+                await db.execute("ROLLBACK")
+            except Exception:
+                pass
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        self.batches += 1
+        self.operations += len(batch)
+        for future, result, error in outcomes:
+            if future.done():
+                # Вызывающий уже отменил ожидание
+                continue
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+    async def close(self):
+        """Остановка корутины записи после обработки уже поставленных операций"""
+        if asyncio.get_running_loop() is not self.loop:
+            future = asyncio.run_coroutine_threadsafe(self.close(), self.loop)
+            await asyncio.wrap_future(future)
+            return
+        if self._task is None:
+            return
+        self._queue.put_nowait(None)
+        await self._task
+        self._task = None
+        await self._connection.close()
+        self._connection = None
+        logging.info(f"Поток записи в {self.db_path} остановлен: {self.operations} операций в {self.batches} транзакциях")
+
+    def stats(self) -> Dict[str, Any]:
+        """Статистика группировки операций записи"""
+        return {
+            "batches": self.batches,
+            "operations": self.operations,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+        }
+
+
+# Поток записи один на файл базы данных во всём процессе: и бот, и веб-сервер
+# передают изменения в цикл событий, который первым обратился к базе.
+_writers: Dict[str, GroupCommitWriter] = {}
+_writers_lock = threading.Lock()
+
+
+def get_writer(db_path: str) -> GroupCommitWriter:
+    """Получение общего для процесса потока записи в базу данных"""
+    key = os.path.abspath(db_path)
+    with _writers_lock:
+        writer = _writers.get(key)
+        if writer is None or writer.loop.is_closed():
+            writer = GroupCommitWriter(db_path, asyncio.get_running_loop())
+            _writers[key] = writer
+        return writer
+
+
+async def close_writer(db_path: str):
+    """Остановка потока записи в базу данных"""
+    with _writers_lock:
+        writer = _writers.pop(os.path.abspath(db_path), None)
+    if writer is not None:
+        await writer.close()
@@ -5,11 +5,30 @@ import uvicorn
 
 from aiogram import Bot, Dispatcher
 from aiogram.client.default import DefaultBotProperties
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
 from aiogram.enums import ParseMode
 
-from .config import BOT_TOKEN
+from .config import BOT_API_BASE, BOT_RUN_MODE, BOT_TOKEN, MEDIA_WARMUP_CHAT_ID, MEDIA_WARMUP_ON_START
 from .data_manager.database import Database
+from .data_manager.topic_tree import TopicTree
+from .data_manager.writer import get_writer
 from .bot.handlers import router
+from .bot.middlewares.ordered_executor import ChatOrderedExecutor
+from .bot.middlewares.coalescing import CallbackCoalescer
+from .bot.middlewares.data_loader import DataLoaderMiddleware
+from .bot.middlewares.callback_answer import EarlyCallbackAnswerMiddleware
+from .bot.middlewares.outbound import OutboundScheduler
+from .bot.middlewares.metrics import ApiMetricsMiddleware, HandlerMetricsMiddleware
+from .bot.screens import screen_cache
+from .bot.media_cache import MediaCache
+from .bot.media_warmup import warm_up_media
+from .bot.broadcast import BroadcastEngine
+from .bot.webhook import run_webhook
+from .assets.derivatives import PIL_AVAILABLE, shutdown_executor
+from .assets.orphans import OrphanImageCollector
+from .assets.registry import asset_registry
+from .metrics import registry
 
 
 # Настройка логирования
@@ -31,26 +50,114 @@ async def main():
     web_thread.start()
     
     # Инициализация бота
-    bot = Bot(token=BOT_TOKEN, default=DefaultBotProperties(parse_mode=ParseMode.HTML))
+    # Другой адрес Bot API (локальный сервер или тестовая заглушка) задаётся через BOT_API_BASE
+    session = AiohttpSession(api=TelegramAPIServer.from_base(BOT_API_BASE)) if BOT_API_BASE else None
+    bot = Bot(token=BOT_TOKEN, session=session, default=DefaultBotProperties(parse_mode=ParseMode.HTML))
+    
+    # Все исходящие запросы проходят через планировщик с ограничением частоты
+    bot.outbound = OutboundScheduler()
+    bot.session.middleware(bot.outbound)
+    # Время самих запросов к Bot API, без ожидания в очереди планировщика
+    bot.session.middleware(ApiMetricsMiddleware())
     
     # Инициализация диспетчера
     dp = Dispatcher()
     
+    if not PIL_AVAILABLE:
+        logging.warning("Pillow не установлен: бот будет отправлять оригинальные изображения без уменьшения")
+    
     # Инициализация базы данных
     db = Database()
     await db.init_db()
     
     # Добавление базы данных к объекту бота для передачи в обработчики
     bot.db = db
+    # Реестр file_id, чтобы не загружать одни и те же фото в Telegram повторно
+    bot.media = MediaCache(db)
+    # Дерево тем для навигации без запросов к базе
+    bot.topic_tree = TopicTree()
+    await bot.topic_tree.load_from(db)
+    # Экраны, собранные пока тема перечитывалась, могли попасть в кэш со старым родителем
+    bot.topic_tree.add_listener(screen_cache.invalidate)
+    
+    # Учёт нажатий кнопок в момент получения, чтобы пропускать вытесненные более новыми
+    bot.callback_coalescer = CallbackCoalescer()
+    dp.update.outer_middleware(bot.callback_coalescer.track)
+    
+    # Обновления одного чата - по порядку, разных чатов - параллельно (регистрируется до остальных
+    # middleware, чтобы они выполнялись уже в обработчике своего чата)
+    bot.update_executor = ChatOrderedExecutor()
+    dp.update.outer_middleware(bot.update_executor)
+    
+    # Загрузчик данных на время обработки каждого обновления
+    dp.update.outer_middleware(DataLoaderMiddleware())
+    
+    # Вытесненные и устаревшие нажатия не доходят до обработчиков
+    dp.callback_query.outer_middleware(bot.callback_coalescer)
+    
+    # Время работы обработчиков по действиям кнопок и командам
+    handler_metrics = HandlerMetricsMiddleware()
+    dp.callback_query.outer_middleware(handler_metrics)
+    dp.message.outer_middleware(handler_metrics)
+    
+    # Ответ на нажатия кнопок сразу, не дожидаясь завершения обработчиков
+    bot.callback_answers = EarlyCallbackAnswerMiddleware()
+    dp.callback_query.outer_middleware(bot.callback_answers)
     
     # Регистрация роутера
     dp.include_router(router)
     
-    # Удаление вебхука перед запуском поллинга
-    await bot.delete_webhook()
+    # Прогрев медиа выполняется в фоне, чтобы не задерживать запуск поллинга
+    warmup_task = None
+    if MEDIA_WARMUP_ON_START:
+        if MEDIA_WARMUP_CHAT_ID is None:
+            logging.warning("MEDIA_WARMUP_ON_START включён, но MEDIA_WARMUP_CHAT_ID не задан - прогрев медиа пропущен")
+        else:
+            warmup_task = asyncio.create_task(warm_up_media(bot, bot.media))
+    
+    # Рассылки акций, запущенные из админ-панели (в том числе прерванные перезапуском)
+    bot.broadcasts = BroadcastEngine(bot, db)
+    bot.broadcasts.start()
+    
+    # Периодическая уборка файлов изображений, на которые больше не ссылается каталог
+    image_collector = OrphanImageCollector(db)
+    image_collector.start()
+    
+    # Статистика компонентов в /metrics
+    registry.register_collector("catalog_cache", db.cache.stats)
+    registry.register_collector("db_writer", get_writer(db.db_path).stats)
+    registry.register_collector("media_cache", bot.media.stats)
+    registry.register_collector("screen_cache", screen_cache.stats)
+    registry.register_collector("callback_answers", bot.callback_answers.stats)
+    registry.register_collector("callback_coalescer", bot.callback_coalescer.stats)
+    registry.register_collector("update_executor", bot.update_executor.stats)
+    registry.register_collector("outbound", bot.outbound.stats)
+    registry.register_collector("broadcasts", bot.broadcasts.stats)
+    registry.register_collector("image_gc", image_collector.stats)
+    registry.register_collector("asset_registry", asset_registry.stats)
+    
+    # Нажатия, накопившиеся до запуска, проверяются на устаревание
+    webhook_info = await bot.get_webhook_info()
+    bot.callback_coalescer.mark_backlog(webhook_info.pending_update_count)
     
-    # Запуск бота в режиме long polling
-    await dp.start_polling(bot)
+    try:
+        if BOT_RUN_MODE == "webhook":
+            # Обновления приходят на HTTP-эндпоинт и передаются в тот же диспетчер
+            await run_webhook(bot, dp)
+        else:
+            # Удаление вебхука перед запуском поллинга
+            await bot.delete_webhook()
+            # Запуск бота в режиме long polling; параллельность обеспечивает исполнитель обновлений
+            await dp.start_polling(bot, handle_as_tasks=False)
+    finally:
+        if warmup_task is not None and not warmup_task.done():
+            warmup_task.cancel()
+        await bot.broadcasts.stop()
+        await image_collector.stop()
+        await bot.update_executor.stop()
+        # Закрытие пула соединений с базой данных
+        await db.close()
+        shutdown_executor()
 
 
 if __name__ == "__main__":
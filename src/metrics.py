@@ -0,0 +1,186 @@
+import functools
+import inspect
+import logging
+import math
+import threading
+import time
+from typing import Any, Callable, Dict, List, Sequence, Tuple
+
+# Границы корзин гистограмм времени выполнения (секунды)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Префикс имён всех метрик приложения
+NAMESPACE = "coursebot"
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[Any], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class Counter:
+    """Счётчик с метками (только растёт)"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = dict(self._values)
+        return [f"{self.name}{_format_labels(self.labelnames, labels)} {value}" for labels, value in sorted(values.items())]
+
+
+class Gauge(Counter):
+    """Текущее значение с метками (например, количество выполняющихся обработчиков)"""
+
+    kind = "gauge"
+
+    def dec(self, *labels, amount: float = 1):
+        self.inc(*labels, amount=-amount)
+
+
+class Histogram:
+    """Гистограмма с накопительными корзинами в формате Prometheus"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Метки -> (счётчики по корзинам, сумма, количество)
+        self._values: Dict[Tuple, Tuple[List[int], float, int]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels):
+        with self._lock:
+            counts, total, count = self._values.get(labels) or ([0] * len(self.buckets), 0.0, 0)
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[index] += 1
+                    break
+            self._values[labels] = (counts, total + value, count + 1)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = {labels: (list(counts), total, count) for labels, (counts, total, count) in self._values.items()}
+        lines = []
+        for labels, (counts, total, count) in sorted(values.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                bucket_labels = _format_labels(self.labelnames, labels, 'le="%s"' % bound)
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            bucket_labels = _format_labels(self.labelnames, labels, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{bucket_labels} {count}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {total}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    Реестр метрик процесса, общий для бота и веб-сервера.
+    Кроме собственных метрик умеет выгружать статистику компонентов, у которых есть метод stats()
+    (кэши, поток записи, планировщик запросов): каждое числовое значение становится gauge.
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, Any] = {}
+        self._collectors: Dict[str, Callable[[], Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(f"{NAMESPACE}_{name}", documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(f"{NAMESPACE}_{name}", documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram(f"{NAMESPACE}_{name}", documentation, labelnames, buckets))
+
+    def register_collector(self, component: str, stats: Callable[[], Dict[str, Any]]):
+        """Выгрузка статистики компонента: coursebot_<component>_<ключ>"""
+        with self._lock:
+            self._collectors[component] = stats
+
+    def render(self) -> str:
+        """Все метрики в текстовом формате Prometheus"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+            collectors = list(self._collectors.items())
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        for component, stats in collectors:
+            try:
+                values = stats()
+            except Exception as e:
+                logging.error(f"Ошибка при получении статистики {component}: {e}")
+                continue
+            for key, value in values.items():
+                if isinstance(value, bool) or not isinstance(value, (int, float)) or math.isnan(value):
+                    continue
+                name = f"{NAMESPACE}_{component}_{key}"
+                lines.append(f"# TYPE {name} gauge")
+                lines.append(f"{name} {value}")
+        return "\n".join(lines) + "\n"
+
+
+# Реестр один на процесс
+registry = MetricsRegistry()
+
+DB_METHOD_SECONDS = registry.histogram("db_method_seconds", "Время выполнения методов Database", ["method"])
+DB_METHOD_ERRORS = registry.counter("db_method_errors_total", "Исключения в методах Database", ["method"])
+
+
+def timed_methods(histogram: Histogram, errors: Counter):
+    """
+    Декоратор класса: измерение времени всех публичных асинхронных методов.
+    Метка - имя метода; исключения учитываются отдельно и пробрасываются дальше.
+    """
+    def decorate(cls):
+        for name, method in list(vars(cls).items()):
+            if name.startswith("_") or not inspect.iscoroutinefunction(method):
+                continue
+
+            def wrap(method, name=name):
+                @functools.wraps(method)
+                async def timed(*args, **kwargs):
+                    started = time.perf_counter()
+                    try:
+                        return await method(*args, **kwargs)
+                    except Exception:
+                        errors.inc(name)
+                        raise
+                    finally:
+                        histogram.observe(time.perf_counter() - started, name)
+                return timed
+
+            setattr(cls, name, wrap(method))
+        return cls
+    return decorate
@@ -5,9 +5,11 @@ from fastapi.responses import HTMLResponse
 from fastapi.exceptions import RequestValidationError
 from starlette.exceptions import HTTPException as StarletteHTTPException
 
+import logging
 import os
 
-from .routers import topics, courses, menu_items, promotions
+from .routers import topics, courses, menu_items, promotions, thumbnails, broadcasts, webhook, metrics
+from ..assets.derivatives import PIL_AVAILABLE
 from ..config import DB_PATH
 from ..data_manager.database import Database
 
@@ -24,19 +26,31 @@ template_dirs = [
 ]
 loader = FileSystemLoader(template_dirs)
 templates = Jinja2Templates(directory="src/web_app/templates", loader=loader)
+thumbnails.register_template_helpers(templates)
+
+if not PIL_AVAILABLE:
+    logging.warning("Pillow не установлен: миниатюры недоступны, страницы админ-панели загружают оригиналы изображений")
 
 # Монтирование статических файлов с кэшированием
 from .static_files import CachedStaticFiles
 
-app.mount("/static", CachedStaticFiles(directory="src/web_app/static", cache_time=3600), name="static")
-app.mount("/courses_img", CachedStaticFiles(directory="src/web_app/static/img/courses", cache_time=3600), name="courses_img")
-app.mount("/topics_img", CachedStaticFiles(directory="src/web_app/static/img/topics", cache_time=3600), name="topics_img")
+# Загруженные изображения называются по UUID или хэшу содержимого и не меняются - кэшируются бессрочно.
+# Монтирование /static/img должно идти раньше /static, чтобы перехватывать изображения
+app.mount("/static/img", CachedStaticFiles(directory="src/web_app/static/img", immutable=True), name="static_img")
+# CSS и JS перепроверяются по ETag (ответ 304), а адреса с версией из static_url кэшируются бессрочно
+app.mount("/static", CachedStaticFiles(directory="src/web_app/static", cache_time=0, strong_etag=True), name="static")
+app.mount("/courses_img", CachedStaticFiles(directory="src/web_app/static/img/courses", immutable=True), name="courses_img")
+app.mount("/topics_img", CachedStaticFiles(directory="src/web_app/static/img/topics", immutable=True), name="topics_img")
 
 # Подключение роутеров
 app.include_router(topics.router, prefix="/topics", tags=["topics"])
 app.include_router(courses.router, prefix="/topics", tags=["courses"])
 app.include_router(menu_items.router, prefix="/admin", tags=["admin"])
 app.include_router(promotions.router, prefix="", tags=["promotions"])
+app.include_router(thumbnails.router, prefix="", tags=["thumbnails"])
+app.include_router(broadcasts.router, prefix="", tags=["broadcasts"])
+app.include_router(webhook.router, prefix="", tags=["webhook"])
+app.include_router(metrics.router, prefix="", tags=["metrics"])
 # Роутер catalog больше не используется, так как функциональность интегрирована в menu_items
 
 # Зависимость для получения базы данных
@@ -0,0 +1,112 @@
+# Маршруты для рассылок акций
+from fastapi import APIRouter, Depends, Request, HTTPException, Form
+from fastapi.responses import HTMLResponse, RedirectResponse
+from fastapi.templating import Jinja2Templates
+from typing import Optional
+from typing_extensions import Annotated
+
+from ...data_manager.database import BROADCAST_AUDIENCES, Database
+from ...config import DB_PATH
+from .thumbnails import register_template_helpers
+
+# Инициализация роутера
+router = APIRouter()
+
+# Шаблоны
+templates = Jinja2Templates(directory="src/web_app/templates")
+register_template_helpers(templates)
+
+# Названия статусов рассылки для админ-панели
+STATUS_TITLES = {
+    "running": "Отправляется",
+    "paused": "На паузе",
+    "completed": "Завершена",
+    "cancelled": "Отменена",
+}
+
+
+# Зависимость для получения базы данных
+async def get_db():
+    db = Database(DB_PATH)
+    return db
+
+
+def broadcast_to_dict(broadcast, promotion_names: Optional[dict] = None) -> dict:
+    """Преобразование записи рассылки в словарь для шаблона и API"""
+    broadcast_id, promotion_id, audience, status, total, sent, failed, last_user_id, created_at, finished_at = broadcast
+    processed = sent + failed
+    return {
+        'id': broadcast_id,
+        'promotion_id': promotion_id,
+        'promotion_name': (promotion_names or {}).get(promotion_id, f"Акция #{promotion_id}"),
+        'audience': audience,
+        'audience_title': BROADCAST_AUDIENCES.get(audience, (audience,))[0],
+        'status': status,
+        'status_title': STATUS_TITLES.get(status, status),
+        'total': total,
+        'sent': sent,
+        'failed': failed,
+        'progress': min(100, round(processed * 100 / total)) if total else 100,
+        'created_at': created_at,
+        'finished_at': finished_at
+    }
+
+
+@router.get("/broadcasts", response_class=HTMLResponse)
+async def get_broadcasts_page(request: Request, db: Database = Depends(get_db)):
+    promotions_list = await db.get_all_promotions()
+    promotion_names = {promotion[0]: promotion[1] for promotion in promotions_list}
+    broadcasts_list = [broadcast_to_dict(broadcast, promotion_names) for broadcast in await db.get_all_broadcasts()]
+    return templates.TemplateResponse("broadcasts.html", {
+        "request": request,
+        "broadcasts": broadcasts_list,
+        "promotions": promotions_list,
+        "audiences": {key: value[0] for key, value in BROADCAST_AUDIENCES.items()}
+    })
+
+
+@router.post("/broadcasts/add", response_class=HTMLResponse)
+async def add_broadcast(
+    promotion_id: Annotated[int, Form()],
+    audience: Annotated[str, Form()] = "all",
+    db: Database = Depends(get_db)
+):
+    if audience not in BROADCAST_AUDIENCES:
+        raise HTTPException(status_code=400, detail="Неизвестная аудитория рассылки")
+    if not await db.get_promotion_by_id(promotion_id):
+        raise HTTPException(status_code=404, detail="Акция не найдена")
+    if await db.create_broadcast(promotion_id, audience) is None:
+        raise HTTPException(status_code=500, detail="Ошибка при создании рассылки")
+    return RedirectResponse(url="/broadcasts", status_code=303)
+
+
+# Допустимые переходы статуса: действие -> (новый статус, из каких статусов)
+BROADCAST_ACTIONS = {
+    "pause": ("paused", ("running",)),
+    "resume": ("running", ("paused",)),
+    "cancel": ("cancelled", ("running", "paused")),
+}
+
+
+@router.post("/broadcasts/{broadcast_id}/{action}", response_class=HTMLResponse)
+async def change_broadcast_status(broadcast_id: int, action: str, db: Database = Depends(get_db)):
+    if action not in BROADCAST_ACTIONS:
+        raise HTTPException(status_code=404, detail="Неизвестное действие")
+    status, expected = BROADCAST_ACTIONS[action]
+    # Бот замечает новый статус перед следующей порцией получателей
+    await db.set_broadcast_status(broadcast_id, status, expected=expected)
+    return RedirectResponse(url="/broadcasts", status_code=303)
+
+
+@router.get("/api/broadcasts", response_model=list[dict])
+async def get_broadcasts_api(db: Database = Depends(get_db)):
+    """Состояние всех рассылок для обновления прогресса на странице"""
+    return [broadcast_to_dict(broadcast) for broadcast in await db.get_all_broadcasts()]
+
+
+@router.get("/api/broadcasts/{broadcast_id}", response_model=dict)
+async def get_broadcast_api(broadcast_id: int, db: Database = Depends(get_db)):
+    broadcast = await db.get_broadcast(broadcast_id)
+    if not broadcast:
+        raise HTTPException(status_code=404, detail="Рассылка не найдена")
+    return broadcast_to_dict(broadcast)
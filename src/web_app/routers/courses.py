@@ -1,18 +1,19 @@
 from fastapi import APIRouter, Depends, Request, File, UploadFile
 from fastapi.responses import HTMLResponse, RedirectResponse
 from fastapi.templating import Jinja2Templates
-import uuid
-import os
 import logging
 
 from ...data_manager.database import Database
 from ...config import DB_PATH
+from ..uploads import UploadTooLarge, save_image_upload
+from .thumbnails import register_template_helpers
 
 # Инициализация роутера
 router = APIRouter()
 
 # Шаблоны
 templates = Jinja2Templates(directory="src/web_app/templates")
+register_template_helpers(templates)
 
 # Зависимость для получения базы данных
 async def get_db():
@@ -66,20 +67,19 @@ async def add_course(request: Request, topic_id: int, image: UploadFile = File(N
                 "error": "Файл должен быть изображением"
             })
         
-        # Создаем директорию для изображений курсов, если она не существует
-        os.makedirs("src/web_app/static/img/courses", exist_ok=True)
-        
-        # Генерируем уникальное имя файла
-        file_extension = os.path.splitext(image.filename)[1]
-        unique_filename = f"{uuid.uuid4()}{file_extension}"
-        file_path = os.path.join("src/web_app/static/img/courses", unique_filename)
-        
-        # Сохраняем файл
-        with open(file_path, "wb") as f:
-            f.write(await image.read())
-        
-        # Формируем относительный путь для сохранения в базе данных
-        image_path = f"src/web_app/static/img/courses/{unique_filename}"
+        # Сохраняем файл в хранилище изображений (путь относительно корня проекта)
+        try:
+            file_path = await save_image_upload(image)
+        except UploadTooLarge as e:
+            topic = await db.get_topic_by_id(topic_id)
+            return templates.TemplateResponse("add_edit_course.html", {
+                "request": request,
+                "course": None,
+                "topic": topic,
+                "error": str(e)
+            })
+        if file_path:
+            image_path = file_path
     
     # Проверка длины описания
     if len(description) > 1024:
@@ -175,20 +175,19 @@ async def edit_course(request: Request, topic_id: int, course_id: int, image: Up
                 "error": "Файл должен быть изображением"
             })
         
-        # Создаем директорию для изображений курсов, если она не существует
-        os.makedirs("src/web_app/static/img/courses", exist_ok=True)
-        
-        # Генерируем уникальное имя файла
-        file_extension = os.path.splitext(image.filename)[1]
-        unique_filename = f"{uuid.uuid4()}{file_extension}"
-        file_path = os.path.join("src/web_app/static/img/courses", unique_filename)
-        
-        # Сохраняем файл
-        with open(file_path, "wb") as f:
-            f.write(await image.read())
-        
-        # Формируем относительный путь для сохранения в базе данных
-        image_path = f"src/web_app/static/img/courses/{unique_filename}"
+        # Сохраняем файл в хранилище изображений (путь относительно корня проекта)
+        try:
+            file_path = await save_image_upload(image)
+        except UploadTooLarge as e:
+            topic = await db.get_topic_by_id(topic_id)
+            return templates.TemplateResponse("add_edit_course.html", {
+                "request": request,
+                "course": current_course,
+                "topic": topic,
+                "error": str(e)
+            })
+        if file_path:
+            image_path = file_path
     
     # Проверка длины описания
     if len(description) > 1024:
@@ -3,8 +3,8 @@ from fastapi.responses import HTMLResponse, RedirectResponse
 from fastapi.templating import Jinja2Templates
 from ...config import DB_PATH
 from ...data_manager.database import Database
-import os
-import uuid
+from ..uploads import UploadTooLarge, save_image_upload
+from .thumbnails import register_template_helpers
 
 # Зависимость для получения базы данных
 async def get_db():
@@ -13,6 +13,7 @@ async def get_db():
 
 router = APIRouter()
 templates = Jinja2Templates(directory="src/web_app/templates")
+register_template_helpers(templates)
 
 
 @router.get("/menu_items", response_class=HTMLResponse)
@@ -102,25 +103,24 @@ async def post_edit_menu_item(
                 "error": "Ссылка должна быть действительным URL-адресом"
             })
     
-    # Создаем директорию для изображений меню, если она не существует
-    menu_images_dir = "src/web_app/static/img/menu_items"
-    os.makedirs(menu_images_dir, exist_ok=True)
-    
     # Обрабатываем загрузку изображения
     image_path = None
     if image and image.filename:
-        # Генерируем уникальное имя файла
-        ext = os.path.splitext(image.filename)[1]
-        unique_filename = f"{uuid.uuid4()}{ext}"
-        image_path = os.path.join(menu_images_dir, unique_filename)
-        
-        # Сохраняем файл
-        with open(image_path, "wb") as buffer:
-            buffer.write(await image.read())
-        
-        # Формируем относительный путь для сохранения в базу данных
-        image_path = f"src/web_app/static/img/menu_items/{unique_filename}"
-    else:
+        # Сохраняем файл в хранилище изображений (путь относительно корня проекта)
+        try:
+            image_path = await save_image_upload(image)
+        except UploadTooLarge as e:
+            current_menu_item = await db.get_menu_item(key)
+            return templates.TemplateResponse("edit_menu_item.html", {
+                "request": request,
+                "key": key,
+                "title": title,
+                "content": content,
+                "image_path": current_menu_item[4] if current_menu_item else None,
+                "url_link": url_link,
+                "error": str(e)
+            })
+    if not image_path:
         # Если новое изображение не загружено, получаем текущий путь к изображению из базы данных
         current_item = await db.get_menu_item(key)
         if current_item:
@@ -0,0 +1,31 @@
+# Метрики бота и веб-сервера в формате Prometheus
+import hmac
+from typing import Optional
+
+from fastapi import APIRouter, Header, HTTPException, Request
+from fastapi.responses import PlainTextResponse
+
+from ...config import METRICS_ALLOWED_HOSTS, METRICS_TOKEN
+from ...metrics import registry
+
+# Инициализация роутера
+router = APIRouter()
+
+
+def check_metrics_access(request: Request, authorization: Optional[str]):
+    """
+    Доступ к метрикам: только с адресов из METRICS_ALLOWED_HOSTS и, если задан METRICS_TOKEN,
+    только с заголовком Authorization: Bearer <токен>. Токен нужен, если админ-панель
+    опубликована через обратный прокси: тогда все запросы приходят с локального адреса.
+    """
+    client_host = request.client.host if request.client else None
+    if client_host not in METRICS_ALLOWED_HOSTS:
+        raise HTTPException(status_code=404)
+    if METRICS_TOKEN and not hmac.compare_digest(authorization or "", f"Bearer {METRICS_TOKEN}"):
+        raise HTTPException(status_code=401, detail="Требуется токен метрик")
+
+
+@router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def get_metrics(request: Request, authorization: Optional[str] = Header(None)):
+    check_metrics_access(request, authorization)
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
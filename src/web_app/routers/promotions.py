@@ -1,8 +1,6 @@
 from fastapi import APIRouter, Depends, Request, File, UploadFile, HTTPException, Form
 from fastapi.responses import HTMLResponse, RedirectResponse
 from fastapi.templating import Jinja2Templates
-import uuid
-import os
 from pydantic import BaseModel, Field, validator, ValidationError
 from typing import Optional
 import datetime
@@ -10,12 +8,15 @@ from typing_extensions import Annotated
 
 from ...data_manager.database import Database
 from ...config import DB_PATH
+from ..uploads import UploadTooLarge, save_image_upload
+from .thumbnails import register_template_helpers
 
 # Инициализация роутера
 router = APIRouter()
 
 # Шаблоны
 templates = Jinja2Templates(directory="src/web_app/templates")
+register_template_helpers(templates)
 
 # Pydantic модели для акций
 class PromotionBase(BaseModel):
@@ -107,13 +108,14 @@ async def add_promotion(
                 "promotion": None,
                 "error": "Файл должен быть изображением"
             })
-        os.makedirs("src/web_app/static/img/promotions", exist_ok=True)
-        file_extension = os.path.splitext(image.filename)[1]
-        unique_filename = f"{uuid.uuid4()}{file_extension}"
-        file_path = os.path.join("src/web_app/static/img/promotions", unique_filename)
-        with open(file_path, "wb") as f:
-            f.write(await image.read())
-        image_path = f"src/web_app/static/img/promotions/{unique_filename}"
+        try:
+            image_path = await save_image_upload(image)
+        except UploadTooLarge as e:
+            return templates.TemplateResponse("add_edit_promotion.html", {
+                "request": request,
+                "promotion": None,
+                "error": str(e)
+            })
 
     try:
         # Обработка значений в зависимости от состояния чекбоксов
@@ -259,20 +261,29 @@ async def edit_promotion(
                 "error": "Файл должен быть изображением"
             })
         
-        # Создаем директорию для изображений акций, если она не существует
-        os.makedirs("src/web_app/static/img/promotions", exist_ok=True)
-        
-        # Генерируем уникальное имя файла
-        file_extension = os.path.splitext(image.filename)[1]
-        unique_filename = f"{uuid.uuid4()}{file_extension}"
-        file_path = os.path.join("src/web_app/static/img/promotions", unique_filename)
-        
-        # Сохраняем файл
-        with open(file_path, "wb") as f:
-            f.write(await image.read())
-        
-        # Формируем относительный путь для сохранения в базе данных
-        image_path = f"src/web_app/static/img/promotions/{unique_filename}"
+        # Сохраняем файл в хранилище изображений (путь относительно корня проекта)
+        try:
+            file_path = await save_image_upload(image)
+        except UploadTooLarge as e:
+            promotion_dict = {
+                'id': current_promotion[0],
+                'name': current_promotion[1],
+                'description': current_promotion[2],
+                'course_link': current_promotion[3],
+                'discounted_price': current_promotion[4],
+                'start_date': current_promotion[5],
+                'end_date': current_promotion[6],
+                'is_period_enabled': current_promotion[8],
+                'is_price_enabled': current_promotion[9],
+                'image_path': current_promotion[7]
+            }
+            return templates.TemplateResponse("add_edit_promotion.html", {
+                "request": request,
+                "promotion": promotion_dict,
+                "error": str(e)
+            })
+        if file_path:
+            image_path = file_path
 
     try:
         # Обработка значений в зависимости от состояния чекбоксов
@@ -501,15 +512,10 @@ async def create_promotion_api(
         if not image.content_type.startswith("image/"):
             raise HTTPException(status_code=400, detail="Файл должен быть изображением")
         
-        os.makedirs("src/web_app/static/img/promotions", exist_ok=True)
-        file_extension = os.path.splitext(image.filename)[1]
-        unique_filename = f"{uuid.uuid4()}{file_extension}"
-        file_path = os.path.join("src/web_app/static/img/promotions", unique_filename)
-        
-        with open(file_path, "wb") as f:
-            f.write(await image.read())
-        
-        image_path = f"src/web_app/static/img/promotions/{unique_filename}"
+        try:
+            image_path = await save_image_upload(image)
+        except UploadTooLarge as e:
+            raise HTTPException(status_code=413, detail=str(e))
     
     try:
         # Обработка значений в зависимости от состояния чекбоксов
@@ -603,19 +609,13 @@ async def update_promotion_api(
         if not image.content_type.startswith("image/"):
             raise HTTPException(status_code=400, detail="Файл должен быть изображением")
         
-        # Удаляем старое изображение, если оно существует и не является стандартным
-        if current_image_path and os.path.exists(current_image_path):
-            os.remove(current_image_path)
-        
-        os.makedirs("src/web_app/static/img/promotions", exist_ok=True)
-        file_extension = os.path.splitext(image.filename)[1]
-        unique_filename = f"{uuid.uuid4()}{file_extension}"
-        file_path = os.path.join("src/web_app/static/img/promotions", unique_filename)
-        
-        with open(file_path, "wb") as f:
-            f.write(await image.read())
+        try:
+            file_path = await save_image_upload(image)
+        except UploadTooLarge as e:
+            raise HTTPException(status_code=413, detail=str(e))
         
-        image_path = f"src/web_app/static/img/promotions/{unique_filename}"
+        if file_path:
+            image_path = file_path
     
     # Используем значения из формы, если они предоставлены, иначе используем текущие значения
     name = name if name is not None else current_promotion[1]
@@ -661,6 +661,9 @@ async def update_promotion_api(
     if not success:
         raise HTTPException(status_code=500, detail="Ошибка при обновлении акции")
     
+    # Старое изображение не удаляем: файл без ссылок уберёт фоновая уборка после периода ожидания
+    # (тот же файл могла только что получить другая загрузка с таким же содержимым)
+    
     # Получаем обновленную акцию
     updated_promotion = await db.get_promotion_by_id(promotion_id)
     if not updated_promotion:
@@ -688,21 +691,14 @@ async def delete_promotion_api(promotion_id: int, db: Database = Depends(get_db)
     if not promotion:
         raise HTTPException(status_code=404, detail="Акция не найдена")
 
-    # 2. Удалить файл изображения, если он есть
-    image_path = promotion[7] # Индекс image_path
-    if image_path and os.path.exists(image_path):
-        try:
-            os.remove(image_path)
-        except OSError as e:
-            # Логировать ошибку, но продолжить, т.к. удаление из БД важнее
-            print(f"Error deleting file {image_path}: {e}")
-
-    # 3. Удалить акцию из базы данных
+    # 2. Удалить акцию из базы данных
     success = await db.delete_promotion(promotion_id)
     if not success:
         raise HTTPException(status_code=500, detail="Ошибка при удалении акции из базы данных")
 
-    # 4. Вернуть успешный ответ
+    # Файл изображения удаляет фоновая уборка, когда на него не останется ссылок
+
+    # 3. Вернуть успешный ответ
     return {"message": "Акция успешно удалена"}
 
 
@@ -0,0 +1,63 @@
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import FileResponse, RedirectResponse, Response
+from fastapi.templating import Jinja2Templates
+from typing import Sequence
+
+from ...assets.registry import image_url, static_relative_path
+from ...assets.thumbnails import ensure_thumbnail, resolve_static_file, source_key
+from ...config import THUMBNAIL_WIDTHS
+from ..static_files import IMMUTABLE_CACHE_CONTROL, static_url
+
+# Инициализация роутера
+router = APIRouter()
+
+
+# Миниатюры адресуются версией исходного файла (?v=...), поэтому их можно кэшировать в браузере бессрочно
+@router.get("/thumbs/{width}/{path:path}")
+async def get_thumbnail(request: Request, width: int, path: str):
+    """Отдача миниатюры изображения заданной ширины (создаётся при первом обращении)"""
+    if width not in THUMBNAIL_WIDTHS:
+        raise HTTPException(status_code=404)
+    file_path = resolve_static_file(path)
+    if file_path is None:
+        raise HTTPException(status_code=404)
+
+    etag = f'"{source_key(file_path)}-{width}"'
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": IMMUTABLE_CACHE_CONTROL})
+
+    thumbnail = await ensure_thumbnail(file_path, width)
+    if thumbnail is None:
+        # Pillow недоступен или файл не удалось обработать: отдаём оригинал
+        return RedirectResponse(url=f"/static/{path}", status_code=307)
+    return FileResponse(
+        thumbnail,
+        media_type="image/jpeg",
+        headers={"ETag": etag, "Cache-Control": IMMUTABLE_CACHE_CONTROL},
+    )
+
+
+def thumb_url(image_path: str, width: int) -> str:
+    """URL миниатюры изображения для шаблонов"""
+    if not image_path:
+        return ""
+    relative_path = static_relative_path(image_path)
+    file_path = resolve_static_file(relative_path)
+    if file_path is None:
+        return f"/static/{relative_path}"
+    return f"/thumbs/{width}/{relative_path}?v={source_key(file_path)}"
+
+
+def thumb_srcset(image_path: str, widths: Sequence[int] = None) -> str:
+    """Значение атрибута srcset со всеми доступными ширинами миниатюр"""
+    if not image_path:
+        return ""
+    return ", ".join(f"{thumb_url(image_path, width)} {width}w" for width in (widths or THUMBNAIL_WIDTHS))
+
+
+def register_template_helpers(templates: Jinja2Templates):
+    """Регистрация функций миниатюр и ссылок на изображения и статические файлы в окружении шаблонов"""
+    templates.env.globals["image_url"] = image_url
+    templates.env.globals["static_url"] = static_url
+    templates.env.globals["thumb_url"] = thumb_url
+    templates.env.globals["thumb_srcset"] = thumb_srcset
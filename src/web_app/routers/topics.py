@@ -1,18 +1,18 @@
 from fastapi import APIRouter, Depends, Request, UploadFile, File
-import aiofiles
 from fastapi.responses import HTMLResponse
 from fastapi.templating import Jinja2Templates
-import uuid
-import os
 
 from ...data_manager.database import Database
 from ...config import DB_PATH
+from ..uploads import UploadTooLarge, save_image_upload
+from .thumbnails import register_template_helpers
 
 # Инициализация роутера
 router = APIRouter()
 
 # Шаблоны
 templates = Jinja2Templates(directory="src/web_app/templates")
+register_template_helpers(templates)
 
 # Зависимость для получения базы данных
 async def get_db():
@@ -40,17 +40,7 @@ async def add_topic(request: Request, image: UploadFile = File(None), db: Databa
     if image and hasattr(image, 'filename'):
         print(f"Имя файла изображения: '{image.filename}'")
         print(f"Тип содержимого изображения: '{image.content_type}'")
-        if hasattr(image, 'size'):
-            print(f"Размер изображения: {image.size} байт")
-        else:
-            print("Размер изображения не определен напрямую, пытаемся получить из содержимого...")
-            # Проверяем содержимое файла
-            try:
-                content = await image.read()
-                print(f"Прочитано байт из файла: {len(content)}")
-                await image.seek(0)  # Возвращаем указатель в начало для дальнейшей обработки
-            except Exception as e:
-                print(f"Ошибка при чтении содержимого файла: {e}")
+        print(f"Размер изображения: {getattr(image, 'size', None)} байт")
     else:
         print("Объект изображения отсутствует или не является UploadFile")
     
@@ -58,29 +48,20 @@ async def add_topic(request: Request, image: UploadFile = File(None), db: Databa
     image_path = None
     if image and image.filename:
         print(f"Получено изображение: {image.filename}, тип: {image.content_type}")
-        # Проверяем, что файл не пустой
+        # Сохраняем файл в хранилище изображений; пустой файл не сохраняется
         try:
-            content = await image.read()
-            if len(content) == 0:
-                print("Предупреждение: файл изображения пустой")
-            else:
-                print(f"Файл изображения содержит {len(content)} байт данных")
-                # Генерируем уникальное имя файла
-                file_extension = os.path.splitext(image.filename)[1]
-                unique_filename = str(uuid.uuid4()) + file_extension
-                file_path = f"src/web_app/static/img/topics/{unique_filename}"
-                
-                # Создаем директорию, если она не существует
-                os.makedirs(os.path.dirname(file_path), exist_ok=True)
-                
-                # Сохраняем файл асинхронно
-                async with aiofiles.open(file_path, "wb") as buffer:
-                    await buffer.write(content)
+            file_path = await save_image_upload(image)
+            if file_path:
                 print(f"Изображение сохранено по пути: {file_path}")
-                
-                # Формируем путь для базы данных (URL-путь)
-                image_path = f"/topics_img/{unique_filename}"
-            await image.seek(0)  # Возвращаем указатель в начало на всякий случай
+                image_path = file_path
+            else:
+                print("Предупреждение: файл изображения пустой")
+        except UploadTooLarge as e:
+            return templates.TemplateResponse("add_edit_topic.html", {
+                "request": request,
+                "topic": None,
+                "error": str(e)
+            })
         except Exception as e:
             print(f"Ошибка при обработке файла изображения: {e}")
     else:
@@ -131,17 +112,7 @@ async def edit_topic(request: Request, topic_id: int, image: UploadFile = File(N
     if image and hasattr(image, 'filename'):
         print(f"Имя файла изображения: '{image.filename}'")
         print(f"Тип содержимого изображения: '{image.content_type}'")
-        if hasattr(image, 'size'):
-            print(f"Размер изображения: {image.size} байт")
-        else:
-            print("Размер изображения не определен напрямую, пытаемся получить из содержимого...")
-            # Проверяем содержимое файла
-            try:
-                content = await image.read()
-                print(f"Прочитано байт из файла: {len(content)}")
-                await image.seek(0)  # Возвращаем указатель в начало для дальнейшей обработки
-            except Exception as e:
-                print(f"Ошибка при чтении содержимого файла: {e}")
+        print(f"Размер изображения: {getattr(image, 'size', None)} байт")
     else:
         print("Объект изображения отсутствует или не является UploadFile")
     
@@ -155,29 +126,20 @@ async def edit_topic(request: Request, topic_id: int, image: UploadFile = File(N
     image_path = topic[3]  # Используем текущий путь к изображению по умолчанию
     if image and image.filename:
         print(f"Получено изображение: {image.filename}, тип: {image.content_type}")
-        # Проверяем, что файл не пустой
+        # Сохраняем файл в хранилище изображений; пустой файл не сохраняется
         try:
-            content = await image.read()
-            if len(content) == 0:
-                print("Предупреждение: файл изображения пустой")
-            else:
-                print(f"Файл изображения содержит {len(content)} байт данных")
-                # Генерируем уникальное имя файла
-                file_extension = os.path.splitext(image.filename)[1]
-                unique_filename = str(uuid.uuid4()) + file_extension
-                file_path = f"src/web_app/static/img/topics/{unique_filename}"
-                
-                # Создаем директорию, если она не существует
-                os.makedirs(os.path.dirname(file_path), exist_ok=True)
-                
-                # Сохраняем файл асинхронно
-                async with aiofiles.open(file_path, "wb") as buffer:
-                    await buffer.write(content)
+            file_path = await save_image_upload(image)
+            if file_path:
                 print(f"Изображение сохранено по пути: {file_path}")
-                
-                # Формируем путь для базы данных (URL-путь)
-                image_path = f"/topics_img/{unique_filename}"
-            await image.seek(0)  # Возвращаем указатель в начало на всякий случай
+                image_path = file_path
+            else:
+                print("Предупреждение: файл изображения пустой")
+        except UploadTooLarge as e:
+            return templates.TemplateResponse("add_edit_topic.html", {
+                "request": request,
+                "topic": topic,
+                "error": str(e)
+            })
         except Exception as e:
             print(f"Ошибка при обработке файла изображения: {e}")
     elif image and not image.filename:
@@ -0,0 +1,28 @@
+# Маршрут для приёма обновлений Telegram в режиме вебхука
+from fastapi import APIRouter, Request, Header, HTTPException
+from fastapi.responses import Response
+from typing import Optional
+
+from ...bot.webhook import get_receiver
+from ...config import WEBHOOK_PATH
+
+# Инициализация роутера
+router = APIRouter()
+
+
+@router.post(WEBHOOK_PATH, include_in_schema=False)
+async def telegram_webhook(
+    request: Request,
+    secret_token: Optional[str] = Header(None, alias="X-Telegram-Bot-Api-Secret-Token")
+):
+    receiver = get_receiver()
+    if receiver is None:
+        # Бот работает в режиме поллинга или ещё не запущен
+        raise HTTPException(status_code=503, detail="Вебхук не активен")
+    if not receiver.check_secret(secret_token):
+        raise HTTPException(status_code=401, detail="Неверный секрет")
+    try:
+        await receiver.submit(await request.json())
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Некорректное обновление")
+    return Response(status_code=200)
@@ -82,7 +82,7 @@ function displayPromotions(promotions) {
             <td>${endDate}</td>
             <td>
                 ${promotion.image_path ?
-                    `<img src="/${promotion.image_path.replace('src/web_app/static/', '')}" alt="Изображение акции" style="max-width: 100px; max-height: 100px;">` :
+                    `<img src="/thumbs/100/${promotion.image_path.replace('src/web_app/static/', '')}" srcset="/thumbs/100/${promotion.image_path.replace('src/web_app/static/', '')} 100w, /thumbs/200/${promotion.image_path.replace('src/web_app/static/', '')} 200w" sizes="100px" alt="Изображение акции" style="max-width: 100px; max-height: 100px;">` :
                     'Нет изображения'
                 }
             </td>
@@ -1,36 +1,102 @@
 from fastapi.staticfiles import StaticFiles
-from starlette.responses import FileResponse
-from typing import Optional
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qs
+import asyncio
+import hashlib
 import os
+import stat
+
+from ..assets.registry import STATIC_DIR, asset_registry
+from ..assets.store import file_digest
+
+# Файлы, адрес которых меняется вместе с содержимым (имя по UUID или хэшу, ?v=...), кэшируются бессрочно
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+# Хэш содержимого для каждого файла: (размер, время изменения, sha256); старая версия файла вытесняется новой
+_digests: Dict[str, Tuple[int, int, str]] = {}
+# При таком количестве файлов кэш хэшей очищается целиком
+MAX_DIGESTS = 1000
+
+
+def content_digest(file_path: str, size: int, mtime_ns: int) -> str:
+    """sha256 содержимого файла; пересчитывается только после изменения файла"""
+    cached = _digests.get(file_path)
+    if cached is not None and cached[:2] == (size, mtime_ns):
+        return cached[2]
+    digest = file_digest(file_path)
+    if len(_digests) >= MAX_DIGESTS:
+        _digests.clear()
+    _digests[file_path] = (size, mtime_ns, digest)
+    return digest
+
+
+def static_url(path: str) -> str:
+    """
+    URL статического файла с версией (/static/css/style.css?v=...).
+    Версия строится по размеру и времени изменения из реестра файлов, без чтения содержимого,
+    и меняется вместе с файлом, поэтому браузер может кэшировать такой адрес бессрочно.
+    """
+    info = asset_registry.info(os.path.join(STATIC_DIR, path))
+    if info is None:
+        return f"/static/{path}"
+    version = hashlib.sha1(f"{info.size}:{info.mtime_ns}".encode("utf-8")).hexdigest()[:12]
+    return f"/static/{path}?v={version}"
+
+
+def etag_matches(etag: str, if_none_match: Optional[str]) -> bool:
+    """Проверка заголовка If-None-Match (список ETag через запятую, допускаются слабые W/"..." и *)"""
+    if not if_none_match:
+        return False
+    candidates = [value.strip() for value in if_none_match.split(",")]
+    return "*" in candidates or any(candidate.removeprefix("W/") == etag for candidate in candidates)
+
 
 class CachedStaticFiles(StaticFiles):
     """
     Класс для статических файлов с кэшированием.
-    Устанавливает заголовки Cache-Control для улучшения производительности.
+    Политика задаётся для каждого монтирования:
+    immutable - для файлов с уникальными именами (загрузки по UUID и хэшу содержимого), кэш на год без перепроверки;
+    strong_etag - ETag по хэшу содержимого и ответ 304 на If-None-Match (CSS и JS).
+    Запрос с версией в адресе (?v=..., см. static_url) всегда кэшируется бессрочно.
     """
-    def __init__(self, directory: str, cache_time: int = 3600, **kwargs):
+    def __init__(self, directory: str, cache_time: int = 3600, immutable: bool = False, strong_etag: bool = False, **kwargs):
         """
         :param directory: Директория с файлами
-        :param cache_time: Время кэширования в секундах (по умолчанию 1 час)
+        :param cache_time: Время кэширования в секундах (по умолчанию 1 час; 0 - перепроверять при каждом запросе)
+        :param immutable: Файлы никогда не меняются под тем же именем
+        :param strong_etag: Отдавать ETag по содержимому файла и отвечать 304, если он не изменился
         """
         super().__init__(directory=directory, **kwargs)
         self.cache_time = cache_time
+        self.immutable = immutable
+        self.strong_etag = strong_etag
 
-    async def get_response(self, path: str, scope):
-        response = await super().get_response(path, scope)
-        
-        # Устанавливаем заголовки кэширования для успешного ответа
-        if isinstance(response, FileResponse):
-            # Устанавливаем заголовки кэширования
-            response.headers["Cache-Control"] = f"public, max-age={self.cache_time}"
-            response.headers["Expires"] = self.expires_header()
-        
-        return response
-
-    def expires_header(self) -> str:
-        """
-        Генерирует заголовок Expires в формате HTTP.
-        """
-        from datetime import datetime, timedelta, timezone
-        expires = datetime.now(timezone.utc) + timedelta(seconds=self.cache_time)
-        return expires.strftime('%a, %d %b %Y %H:%M:%S GMT')
\ No newline at end of file
+    def cache_control(self, scope) -> str:
+        """Значение Cache-Control для запроса"""
+        if self.immutable or "v" in parse_qs(scope.get("query_string", b"").decode("latin-1")):
+            return IMMUTABLE_CACHE_CONTROL
+        if self.cache_time:
+            return f"public, max-age={self.cache_time}"
+        return "public, no-cache"
+
+    async def get_response(self, path: str, scope) -> Response:
+        if self.strong_etag:
+            # Хэш содержимого считается в пуле потоков заранее, чтобы file_response взял его из кэша
+            full_path, stat_result = await asyncio.to_thread(self.lookup_path, path)
+            if stat_result is not None and stat.S_ISREG(stat_result.st_mode):
+                await asyncio.to_thread(content_digest, str(full_path), stat_result.st_size, stat_result.st_mtime_ns)
+        return await super().get_response(path, scope)
+
+    def file_response(self, full_path, stat_result: os.stat_result, scope, status_code: int = 200) -> Response:
+        headers = {"Cache-Control": self.cache_control(scope)}
+        if not self.strong_etag:
+            response = super().file_response(full_path, stat_result, scope, status_code)
+            response.headers.update(headers)
+            return response
+
+        headers["ETag"] = f'"{content_digest(str(full_path), stat_result.st_size, stat_result.st_mtime_ns)}"'
+        if status_code == 200 and etag_matches(headers["ETag"], Headers(scope=scope).get("if-none-match")):
+            return Response(status_code=304, headers=headers)
+        return FileResponse(full_path, status_code=status_code, stat_result=stat_result, method=scope["method"], headers=headers)
@@ -0,0 +1,67 @@
+import hashlib
+import logging
+import os
+from typing import BinaryIO, Optional, Tuple
+
+from fastapi import UploadFile
+from starlette.concurrency import run_in_threadpool
+
+from ..assets.derivatives import schedule_bot_derivative
+from ..assets.store import commit_blob, temp_path
+from ..config import UPLOAD_CHUNK_SIZE, UPLOAD_MAX_BYTES
+
+class UploadTooLarge(ValueError):
+    """Загруженный файл превышает допустимый размер"""
+
+    def __init__(self, max_bytes: int):
+        super().__init__(f"Файл слишком большой (максимум {max_bytes / (1024 * 1024):g} МБ)")
+        self.max_bytes = max_bytes
+
+
+def _copy_to_store(source: BinaryIO, extension: str, max_bytes: int, chunk_size: int) -> Tuple[Optional[str], int]:
+    """
+    Копирование загрузки блоками во временный файл с подсчётом sha256 и перенос в хранилище
+    по содержимому (выполняется в пуле потоков). Возвращает путь в хранилище и размер;
+    для пустой загрузки путь None. При превышении лимита временный файл удаляется.
+    """
+    temp_file = temp_path()
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with open(temp_file, "wb") as target:
+            while True:
+                chunk = source.read(chunk_size)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_bytes:
+                    raise UploadTooLarge(max_bytes)
+                digest.update(chunk)
+                target.write(chunk)
+        if not size:
+            return None, 0
+        return commit_blob(temp_file, digest.hexdigest(), extension), size
+    finally:
+        if os.path.exists(temp_file):
+            os.remove(temp_file)
+
+
+async def save_image_upload(upload: UploadFile, max_bytes: int = UPLOAD_MAX_BYTES,
+                            chunk_size: int = UPLOAD_CHUNK_SIZE) -> Optional[str]:
+    """
+    Сохранение загруженного изображения в хранилище по содержимому.
+    Файл копируется блоками в пуле потоков, поэтому цикл событий (общий с ботом) не блокируется,
+    а в хранилище файл появляется только целиком. Повторная загрузка того же изображения
+    не создаёт копию. После сохранения в фоне готовится уменьшенная копия для бота.
+    Возвращает путь к файлу (от корня проекта) или None для пустой загрузки.
+
+    :raises UploadTooLarge: Файл больше max_bytes
+    """
+    extension = os.path.splitext(upload.filename or "")[1]
+    file_path, size = await run_in_threadpool(_copy_to_store, upload.file, extension, max_bytes, chunk_size)
+    if file_path is None:
+        logging.warning(f"Загружен пустой файл изображения '{upload.filename}'")
+        return None
+    schedule_bot_derivative(file_path)
+    logging.info(f"Изображение '{upload.filename}' сохранено: {file_path} ({size} байт)")
+    return file_path